@@ -0,0 +1,296 @@
+"""
+JSON API of the website. It exposes every operation of mediator.py under "/api/v1/".
+
+Every response which contains a table has the keys:
+    "data": the labels of the table and its rows, either as a dictionary with a list of values for every column
+        (default, "?orient=columns") or as a list of rows ("?orient=rows")
+    "pagination": the page returned ("?page="), the rows per page ("?per_page=", at most API_MAX_PER_PAGE),
+        the total number of rows and of pages
+    "compute_time_ms": the time spent by mediator.py to compute the result, in milliseconds
+
+The tables are serialized directly from the numpy arrays of their columns with orjson if it's installed,
+otherwise with the json module of the standard library.
+"""
+
+from flask import Blueprint, request, Response, current_app
+from settings import *
+import json
+import hmac
+import math
+import time
+import numpy as np
+import mediator
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+api = Blueprint('api', __name__)
+
+
+def _default(obj):
+    """Converts the objects that the json encoder can't serialize by itself, like numpy arrays and numbers"""
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serializes obj to json. orjson serializes the numeric numpy arrays without converting them to lists.
+
+    :rtype: bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=_default).encode()
+
+
+def json_response(obj, status=200):
+    """Returns a response with obj serialized to json"""
+    return Response(dumps(obj), status=status, mimetype='application/json')
+
+
+class BadRequest(Exception):
+    """Raised when the arguments of the request are not valid"""
+
+
+@api.errorhandler(BadRequest)
+def bad_request(err):
+    return json_response({'error': str(err)}, status=400)
+
+
+def _int_argument(name, default, minimum=0):
+    """Returns the argument of the url "name" as an int, raises BadRequest if it's not a number or it's too small"""
+    value = request.args.get(name, default)
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"'{name}' must be an integer, not '{value}'")
+
+    if value < minimum:
+        raise BadRequest(f"'{name}' must be at least {minimum}")
+    return value
+
+
+def paginated(operation, *args):
+    """
+    Calls the function of mediator.py "operation" with the page requested, and returns the response with the
+    table, the pagination and the time needed to compute it.
+
+    :param operation: a function of mediator.py which accepts start, end and orient as last arguments
+    :param args: the arguments of the function before start, end and orient
+    :rtype: flask.Response
+    """
+    page = _int_argument('page', 1, minimum=1)
+    per_page = _int_argument('per_page', ROWS_PER_PAGE, minimum=1)
+    if per_page > API_MAX_PER_PAGE:
+        raise BadRequest(f"'per_page' must be at most {API_MAX_PER_PAGE}")
+
+    orient = request.args.get('orient', 'columns')
+    if orient not in ('columns', 'rows'):
+        raise BadRequest("'orient' must be 'columns' or 'rows'")
+
+    start, end = (page - 1) * per_page, page * per_page
+
+    begin = time.perf_counter()
+    data = operation(*args, start, end, orient)
+    compute_time = time.perf_counter() - begin
+
+    total = data.pop('length')
+    return json_response({
+        'data': data,
+        'pagination': {'page': page,
+                       'per_page': per_page,
+                       'total': total,
+                       'pages': math.ceil(total / per_page)},
+        'compute_time_ms': compute_time * 1000,
+    })
+
+
+@api.route('/info')
+def info():
+    """Information about the two datasets and a preview of heads and tails"""
+    begin = time.perf_counter()
+    gene_data, disease_data = mediator.getInfo()
+    compute_time = time.perf_counter() - begin
+
+    return json_response({'data': {'genes': gene_data, 'diseases': disease_data},
+                          'compute_time_ms': compute_time * 1000})
+
+
+@api.route('/version')
+def version():
+    """The version of the datasets, when it was loaded and if a reload is running"""
+    return json_response({'data': mediator.getDatasetsVersion()})
+
+
+@api.route('/admin/reload', methods=['POST'])
+def reload():
+    """
+    Reloads the datasets in the background, see "mediator.reload()". It needs the header
+    "Authorization: Bearer <RELOAD_TOKEN>" and it's not found if RELOAD_TOKEN is None.
+    With "?wait=1" it answers when the new version is in use, otherwise at once with status 202.
+    """
+    if RELOAD_TOKEN is None:
+        return json_response({'error': 'Not found'}, status=404)
+
+    token = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(token.encode(), f"Bearer {RELOAD_TOKEN}".encode()):
+        return json_response({'error': 'The token is not valid'}, status=403)
+
+    wait = request.args.get('wait', '0') not in ('', '0', 'false')
+    if not mediator.reload(wait=wait):
+        return json_response({'error': 'A reload is already running', 'data': mediator.getDatasetsVersion()},
+                             status=409)
+
+    return json_response({'data': mediator.getDatasetsVersion()}, status=200 if wait else 202)
+
+
+@api.route('/memo')
+def memo():
+    """The hits, misses and evictions of the cache of the results of the operations, and the memory it uses"""
+    return json_response({'data': mediator.getMemoStats()})
+
+
+@api.route('/cache')
+def cacheStats():
+    """
+    The hits, misses, evictions and expired values of the cache shared by the workers (see cache_backend.py), with the
+    number of values it contains and their size
+    """
+    backends = [backend for backend in current_app.extensions.get('cache', {}).values() if hasattr(backend, 'stats')]
+    if not backends:
+        return json_response({'error': 'The cache has no statistics'}, status=404)
+    return json_response({'data': backends[0].stats()})
+
+
+@api.route('/genes')
+def genes():
+    """The rows of the gene dataset"""
+    return paginated(mediator.getGeneTablePage)
+
+
+@api.route('/diseases')
+def diseases():
+    """The rows of the disease dataset"""
+    return paginated(mediator.getDiseaseTablePage)
+
+
+@api.route('/genes/distinct')
+def distinctGenes():
+    """The distinct genes of the gene dataset"""
+    return paginated(mediator.getDistinctGenes)
+
+
+@api.route('/diseases/distinct')
+def distinctDiseases():
+    """The distinct diseases of the disease dataset"""
+    return paginated(mediator.getDistinctDiseases)
+
+
+def suggestions(operation):
+    """
+    Returns the response with the suggestions for the beginning of a name "?q=", at most "?limit=" of them,
+    computed by the function of mediator.py "operation"
+
+    :rtype: flask.Response
+    """
+    limit = _int_argument('limit', AUTOCOMPLETE_SUGGESTIONS, minimum=1)
+    if limit > API_MAX_PER_PAGE:
+        raise BadRequest(f"'limit' must be at most {API_MAX_PER_PAGE}")
+
+    begin = time.perf_counter()
+    data = operation(request.args.get('q', ''), limit)
+    compute_time = time.perf_counter() - begin
+
+    return json_response({'data': data, 'compute_time_ms': compute_time * 1000})
+
+
+@api.route('/genes/autocomplete')
+def geneSuggestions():
+    """The genes whose symbol or geneid begins with "?q=", with their number of evidences"""
+    return suggestions(mediator.getGeneSuggestions)
+
+
+@api.route('/diseases/autocomplete')
+def diseaseSuggestions():
+    """The diseases whose name or diseaseid begins with "?q=", with their number of evidences"""
+    return suggestions(mediator.getDiseaseSuggestions)
+
+
+@api.route('/genes/<gene>/evidences')
+def geneEvidences(gene):
+    """The evidences in literature of the relation between the gene and COVID-19"""
+    return paginated(mediator.getGeneEvidences, gene)
+
+
+@api.route('/diseases/<path:disease>/evidences')
+def diseaseEvidences(disease):
+    """The evidences in literature of the relation between the disease and COVID-19"""
+    return paginated(mediator.getDiseaseEvidences, disease)
+
+
+@api.route('/genes/<gene>/diseases')
+def diseasesRelatedToGene(gene):
+    """The diseases related to the gene"""
+    return paginated(mediator.getDiseasesRelatedToGene, gene)
+
+
+@api.route('/diseases/<path:disease>/genes')
+def genesRelatedToDisease(disease):
+    """The genes related to the disease"""
+    return paginated(mediator.getGenesRelatedToDisease, disease)
+
+
+def _metric_argument():
+    """Returns the argument of the url "metric", raises BadRequest if it's not a measure of similarity"""
+    metric = request.args.get('metric', 'cosine')
+    if metric not in mediator.CooccurrenceMatrix.METRICS:
+        raise BadRequest(f"'metric' must be one of {', '.join(mediator.CooccurrenceMatrix.METRICS)}")
+    return metric
+
+
+@api.route('/genes/<gene>/similar')
+def similarGenes(gene):
+    """The genes most similar to the gene by the diseases they share. "?metric=" is 'cosine' (default) or 'jaccard'"""
+    return paginated(mediator.getSimilarGenes, gene, _metric_argument())
+
+
+@api.route('/diseases/<path:disease>/similar')
+def similarDiseases(disease):
+    """
+    The diseases most similar to the disease by the genes they share. "?metric=" is 'cosine' (default) or 'jaccard'
+    """
+    return paginated(mediator.getSimilarDiseases, disease, _metric_argument())
+
+
+@api.route('/search')
+def search():
+    """
+    The sentences which contain all the words and the phrases between double quotes of "?q=", sorted by their
+    BM25 score. "?gene=" and "?disease=" search only the sentences in which the gene or the disease are found.
+    """
+    query = request.args.get('q', '')
+    if not query.strip():
+        raise BadRequest("'q' must contain the words to search")
+    return paginated(mediator.getSearch, query, request.args.get('gene'), request.args.get('disease'))
+
+
+@api.route('/search/info')
+def searchInfo():
+    """The size of the search index, the time needed to build it and the memory it uses"""
+    return json_response({'data': mediator.getSearchIndexInfo()})
+
+
+@api.route('/correlation')
+def correlation():
+    """
+    The correlations between genes and diseases sorted by the highest number of occurrences.
+    "?rows=" is the number of correlations to return (0, the default, means all of them) and
+    "?min_occurrences=" the minimum number of occurrences of each correlation.
+    """
+    rows = _int_argument('rows', 0)
+    min_occurrences = _int_argument('min_occurrences', 0)
+    return paginated(mediator.getCorrelation, rows, min_occurrences)
@@ -0,0 +1,466 @@
+"""
+Measures the performance of the program on the datasets written in "settings.py".
+
+It must be run from the main directory of the program, like main.py:
+
+    python benchmark.py endpoints --repeat 20
+
+"endpoints" requests every page of the website through the Flask test client and prints the latency of the
+first request and of the following ones. Running it before and after a change (e.g. on two different commits)
+gives the difference in latency of every endpoint.
+
+"throughput" sends many requests at once to a running server and prints the requests answered per second, e.g.
+to compare the development server ("python main.py") and the production one with different numbers of workers and
+threads ("gunicorn wsgi:app", see gunicorn.conf.py). With "--pid" it prints also the memory of the server:
+
+    python benchmark.py throughput --url http://127.0.0.1:8000 --clients 8 --duration 20 --pid <pid of the server>
+
+"render" compares the time to the first byte and the memory used by the largest pages when they're streamed
+while they're rendered and when they're rendered whole before sending them, with "--rows-per-page" rows:
+
+    python benchmark.py render --rows-per-page 1000
+
+"correlation" compares the time needed to count the couples gene-disease by "count_gene_disease_pairs()" and by
+the previous implementation, based on the join of the two datasets, on the datasets repeated many times:
+
+    python benchmark.py correlation --scale 1 10 50
+
+"append" splits the rows of the datasets in parts, loads the first part and appends the others one at a time
+(see "DatasetStore.append()" and the methods "appended()" of the classes of functions.py), then checks that the
+result is identical to loading all the rows at once and compares the time of the two:
+
+    python benchmark.py append --parts 10 --seed 0
+"""
+
+import argparse
+import statistics
+import time
+import numpy as np
+import pandas as pd
+
+
+def _requests(args):
+    """The urls requested by "endpoints" and "throughput", with the arguments of their query string"""
+    return [
+        ('/info', None),
+        ('/distinctGenes', None),
+        ('/distinctDiseases', None),
+        ('/geneEvidences', {'gene': args.gene}),
+        ('/diseaseEvidences', {'disease': args.disease}),
+        ('/correlation', {'rows': '10', 'min_occurrences': ''}),
+        ('/diseasesRelatedToGene', {'gene': args.gene}),
+        ('/genesRelatedToDisease', {'disease': args.disease}),
+        ('/api/v1/search', {'q': args.query}),
+    ]
+
+
+def _time_request(client, url, query):
+    """Returns the time in seconds needed to request "url" with the test client"""
+    start = time.perf_counter()
+    response = client.get(url, query_string=query)
+    elapsed = time.perf_counter() - start
+
+    if response.status_code >= 400:
+        raise RuntimeError(f"{url} returned {response.status_code}")
+    return elapsed
+
+
+def endpoints(args):
+    """
+    Prints the latency of each endpoint in milliseconds.
+
+    The first request is reported on its own as it may include the work done only once (e.g. the correlations
+    computed by Testing.get_correlation()), while median and 95th percentile are computed on the following
+    "args.repeat" requests.
+    """
+
+    # The import loads the datasets, thus it's timed on its own
+    start = time.perf_counter()
+    import website
+    print(f"Startup (datasets loading): {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    client = website.create_app({'TESTING': True}).test_client()
+
+    print(f"{'endpoint':<28}{'first':>12}{'median':>12}{'p95':>12}")
+    for url, query in _requests(args):
+        first = _time_request(client, url, query)
+        times = sorted(_time_request(client, url, query) for _ in range(args.repeat))
+        p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+        print(f"{url:<28}{first * 1000:>10.1f}ms{statistics.median(times) * 1000:>10.1f}ms{p95 * 1000:>10.1f}ms")
+
+
+def _memory(pid):
+    """
+    Returns the memory in MiB of the process "pid" and of its children (e.g. the workers of gunicorn), read from
+    /proc (Linux only): the resident memory of every process, what it shares with the others and the sum of their
+    proportional set sizes, i.e. the memory really used by all of them together.
+
+    :rtype: dict
+    """
+    pids = [pid]
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        pids.extend(int(child) for child in f.read().split())
+
+    memory = {'processes': len(pids), 'rss': [], 'shared': [], 'pss': 0}
+    for process in pids:
+        with open(f'/proc/{process}/smaps_rollup') as f:
+            fields = {line.split(':')[0]: int(line.split()[1]) for line in f if line.endswith('kB\n')}
+        memory['rss'].append(fields['Rss'] / 1024)
+        memory['shared'].append((fields['Shared_Clean'] + fields['Shared_Dirty']) / 1024)
+        memory['pss'] += fields['Pss'] / 1024
+    return memory
+
+
+def throughput(args):
+    """
+    Prints the requests per second answered by a running server ("python main.py" or "gunicorn wsgi:app") and
+    their latency. "args.clients" threads request the pages of "endpoints" one after the other for "args.duration"
+    seconds, each on its own connection.
+    """
+    import http.client
+    import threading
+    from urllib.parse import urlsplit, urlencode
+
+    server = urlsplit(args.url)
+    paths = [url + ('?' + urlencode(query) if query else '') for url, query in _requests(args)]
+    latencies, errors = [], []
+    deadline = time.perf_counter() + args.duration
+
+    def client(first):
+        connection = http.client.HTTPConnection(server.hostname, server.port, timeout=60)
+        i = first
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                connection.request('GET', paths[i % len(paths)])
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors.append(response.status)
+            except (OSError, http.client.HTTPException) as err:
+                errors.append(err)
+                connection.close()
+                connection = http.client.HTTPConnection(server.hostname, server.port, timeout=60)
+            latencies.append(time.perf_counter() - start)
+            i += 1
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+    print(f"{len(latencies)} requests in {elapsed:.1f} s with {args.clients} clients, {len(errors)} errors")
+    print(f"Throughput: {len(latencies) / elapsed:.1f} requests/s")
+    print(f"Latency: median {statistics.median(latencies) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms")
+
+    if args.pid is not None:
+        memory = _memory(args.pid)
+        print(f"Memory of {memory['processes']} processes: "
+              f"resident {', '.join(f'{rss:.0f}' for rss in memory['rss'])} MiB, "
+              f"shared {', '.join(f'{shared:.0f}' for shared in memory['shared'])} MiB, "
+              f"total (PSS) {memory['pss']:.0f} MiB")
+
+
+def _render(client, url, query):
+    """
+    Requests "url" with the test client reading the response one chunk at a time, as a browser does.
+
+    :return: the seconds before the first chunk, the seconds before the last one and the length of the page
+    :rtype: tuple(float, float, int)
+    """
+    start = time.perf_counter()
+    response = client.get(url, query_string=query, buffered=False)
+    chunks = iter(response.response)
+    first = next(chunks)
+    first_byte = time.perf_counter() - start
+    length = len(first) + sum(len(chunk) for chunk in chunks)
+    total = time.perf_counter() - start
+    response.close()
+
+    if response.status_code >= 400:
+        raise RuntimeError(f"{url} returned {response.status_code}")
+    return first_byte, total, length
+
+
+def render(args):
+    """
+    Prints the time to the first byte, the total time and the peak memory allocated while rendering the largest
+    pages, when they're streamed (see "stream_page()" in website.py) and when they're rendered whole before sending
+    them (STREAM_CHUNK_BYTES = 0). The pages have "args.rows_per_page" rows instead of ROWS_PER_PAGE.
+    """
+    import tracemalloc
+    import website
+
+    website.ROWS_PER_PAGE = args.rows_per_page
+    client = website.create_app({'TESTING': True}).test_client()
+    pages = [
+        ('/correlation', {'rows': '0', 'min_occurrences': ''}),
+        ('/diseaseEvidences', {'disease': args.disease}),
+        ('/browseGenesDataset', None),
+    ]
+
+    print(f"{args.rows_per_page} rows per page\n")
+    print(f"{'endpoint':<22}{'mode':>8}{'size':>10}{'first byte':>13}{'total':>11}{'peak memory':>14}")
+    for url, query in pages:
+        for mode, chunk in (('stream', args.chunk), ('whole', 0)):
+            website.STREAM_CHUNK_BYTES = chunk
+            # The first request computes the result, which is then kept by the memoization of mediator.py
+            _render(client, url, query)
+            times = [_render(client, url, query) for _ in range(args.repeat)]
+
+            tracemalloc.start()
+            _render(client, url, query)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            first_byte = statistics.median(t[0] for t in times) * 1000
+            total = statistics.median(t[1] for t in times) * 1000
+            print(f"{url:<22}{mode:>8}{times[0][2] / 1024:>8.0f}KiB{first_byte:>11.1f}ms{total:>9.1f}ms"
+                  f"{peak / 1024 ** 2:>11.1f}MiB")
+
+
+def legacy_correlation(genes, diseases):
+    """
+    The previous implementation of "Testing.correlation_gene_disease()": the two datasets are merged on pmid and
+    nsentence, the duplicates dropped and the couples gene-disease counted with groupby.
+
+    :rtype: pandas.DataFrame
+    """
+    diseases = diseases[['pmid', 'nsentence', 'disease_name', 'diseaseid']]
+    genes = genes[['pmid', 'nsentence', 'gene_symbol', 'geneid']]
+
+    df = pd.DataFrame.merge(diseases, genes, how='inner', on=['pmid', 'nsentence'])
+    df.drop_duplicates(subset=['pmid', 'geneid', 'diseaseid', 'nsentence'], inplace=True)
+
+    df = df[['gene_symbol', 'disease_name']].groupby(['gene_symbol', 'disease_name'], observed=True).size()
+    return df.sort_values(ascending=False).to_frame('occurrences').reset_index()
+
+
+def _scale(table, factor):
+    """Returns the table repeated "factor" times, every copy with different pmids so that its sentences are new"""
+    offset = int(table['pmid'].max()) + 1
+    copies = []
+    for i in range(factor):
+        copy = table.copy()
+        copy['pmid'] = copy['pmid'].astype(np.int64) + i * offset
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+
+def _sorted_rows(table):
+    """Returns the rows of a table of correlations in a fixed order, to compare two of them"""
+    rows = zip(table['gene_symbol'].astype(str), table['disease_name'].astype(str), table['occurrences'].tolist())
+    return sorted(rows, key=lambda row: (-row[2], row[0], row[1]))
+
+
+def correlation(args):
+    """
+    Prints the time needed to count the couples gene-disease by "count_gene_disease_pairs()" and by
+    "legacy_correlation()" on the datasets repeated every number of times in "args.scale", and checks that
+    the results are identical.
+    """
+    from functions import DatasetStore, CorrelationTable, count_gene_disease_pairs
+    from settings import GENE_TABLE_PATH, DISEASE_TABLE_PATH, DATASET_SCHEMA
+
+    store = DatasetStore(schema=DATASET_SCHEMA)
+    genes = store.load(GENE_TABLE_PATH)
+    diseases = store.load(DISEASE_TABLE_PATH)
+
+    print(f"{'scale':>6}{'gene rows':>12}{'disease rows':>14}{'couples':>10}{'legacy':>12}{'engine':>12}{'speedup':>9}")
+    for factor in args.scale:
+        scaled_genes, scaled_diseases = _scale(genes, factor), _scale(diseases, factor)
+
+        legacy_times, engine_times = [], []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            legacy = legacy_correlation(scaled_genes, scaled_diseases)
+            legacy_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            engine = CorrelationTable(*count_gene_disease_pairs(scaled_genes, scaled_diseases)).frame()
+            engine_times.append(time.perf_counter() - start)
+
+        if _sorted_rows(legacy) != _sorted_rows(engine):
+            raise RuntimeError(f"The results are different with scale {factor}")
+
+        legacy_time, engine_time = min(legacy_times), min(engine_times)
+        print(f"{factor:>6}{len(scaled_genes):>12}{len(scaled_diseases):>14}{len(engine):>10}"
+              f"{legacy_time * 1000:>10.1f}ms{engine_time * 1000:>10.1f}ms{legacy_time / engine_time:>8.1f}x")
+
+
+def _build(store, gene_path, disease_path):
+    """Returns the classes of functions.py built from the two datasets, with what the website precomputes"""
+    from functions import GeneTable, DiseaseTable, Testing
+    from settings import EVIDENCE_TAGS, EVIDENCE_TAG
+
+    genes = GeneTable(gene_path, store=store, tags=EVIDENCE_TAGS)
+    diseases = DiseaseTable(disease_path, store=store, tags=EVIDENCE_TAGS)
+    test = Testing(gene_path, disease_path, store=store)
+
+    test.get_correlation()
+    test.get_cooccurrence()
+    for table in (genes, diseases):
+        table.distinct()
+        table.prefix_index(EVIDENCE_TAG)
+    return genes, diseases, test, store.search_index()
+
+
+def _appended(store, gene_path, disease_path, built):
+    """Returns the classes of "_build()" with the rows appended to the two datasets"""
+    genes, diseases, test, _ = built
+    gene_rows, disease_rows = store.append(gene_path), store.append(disease_path)
+    return (genes.appended(gene_rows), diseases.appended(disease_rows), test.appended(gene_rows, disease_rows),
+            store.search_index())
+
+
+def _results(built, queries):
+    """
+    Returns what the operations of the website return from the classes of "_build()", with the text of the
+    sentences instead of their ids, which depend on the order in which the sentences were loaded
+    """
+    from settings import EVIDENCE_TAG
+
+    genes, diseases, test, search_index = built
+    gene_inputs = genes.distinct()['geneid'].tolist() + genes.distinct()['gene_symbol'].astype(str).tolist()
+    disease_inputs = diseases.distinct()['diseaseid'].astype(str).tolist() + \
+        diseases.distinct()['disease_name'].tolist()
+    gene_prefixes = sorted({str(gene)[:2] for gene in gene_inputs})
+    disease_prefixes = sorted({str(disease)[:2] for disease in disease_inputs})
+
+    results = {'gene table': genes.get_table(),
+               'disease table': diseases.get_table(),
+               'distinct genes': genes.distinct(),
+               'distinct diseases': diseases.distinct(),
+               'gene evidences': genes.with_sentences(genes.batch_evidence(gene_inputs)),
+               'disease evidences': diseases.with_sentences(diseases.batch_evidence(disease_inputs)),
+               'correlation': test.correlation_gene_disease(),
+               'related diseases': test.find_diseases_related_to_genes(gene_inputs),
+               'related genes': test.find_genes_related_to_diseases(disease_inputs),
+               'similar genes': [test.find_similar_genes(gene) for gene in gene_inputs[:50]],
+               'similar diseases': [test.find_similar_diseases(disease) for disease in disease_inputs[:50]],
+               'gene suggestions': [genes.prefix_index(EVIDENCE_TAG).search(prefix, 50) for prefix in gene_prefixes],
+               'disease suggestions': [diseases.prefix_index(EVIDENCE_TAG).search(prefix, 50)
+                                       for prefix in disease_prefixes],
+               'search': [search_index.search(query).drop(columns='sentence_id') for query in queries]}
+    return results
+
+
+def _equal(a, b):
+    """Returns True if two results of "_results()" are identical, also in the types of the columns"""
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))
+    if isinstance(a, pd.DataFrame):
+        return a.equals(b) and a.index.equals(b.index) and list(a.dtypes) == list(b.dtypes)
+    return a == b
+
+
+def append(args):
+    """
+    Prints the time needed to append every part of the datasets and to load all the rows at once, and checks that
+    the results of all the operations are identical.
+    """
+    import os
+    import tempfile
+    from functions import DatasetStore, tokenize
+    from settings import GENE_TABLE_PATH, DISEASE_TABLE_PATH, DATASET_SCHEMA
+
+    rng = np.random.default_rng(args.seed)
+    files = []
+    for path in (GENE_TABLE_PATH, DISEASE_TABLE_PATH):
+        with open(path, 'rb') as f:
+            header, *rows = f.read().splitlines(keepends=True)
+        if args.seed is not None:
+            rows = [rows[i] for i in rng.permutation(len(rows))]
+        files.append((os.path.basename(path), header, np.array_split(np.array(rows, dtype=object), args.parts)))
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = [os.path.join(folder, name) for name, _, _ in files]
+        for path, (_, header, parts) in zip(paths, files):
+            with open(path, 'wb') as f:
+                f.write(header + b''.join(parts[0]))
+
+        store = DatasetStore(schema=DATASET_SCHEMA)
+        built = _build(store, *paths)
+
+        print(f"{'part':>6}{'gene rows':>12}{'disease rows':>14}{'append':>12}")
+        for part in range(1, args.parts):
+            for path, (_, _, parts) in zip(paths, files):
+                with open(path, 'ab') as f:
+                    f.write(b''.join(parts[part]))
+
+            start = time.perf_counter()
+            built = _appended(store, *paths, built)
+            elapsed = time.perf_counter() - start
+            print(f"{part:>6}{built[0].get_dimensions()[0]:>12}{built[1].get_dimensions()[0]:>14}"
+                  f"{elapsed * 1000:>10.1f}ms")
+
+        start = time.perf_counter()
+        full = _build(DatasetStore(schema=DATASET_SCHEMA), *paths)
+        print(f"{'full':>6}{full[0].get_dimensions()[0]:>12}{full[1].get_dimensions()[0]:>14}"
+              f"{(time.perf_counter() - start) * 1000:>10.1f}ms")
+
+    # Words and phrases of some sentences, and the first words of the vocabulary
+    sentences = built[0].get_table()['sentence'].tolist()[::max(len(built[0].get_table()) // 20, 1)]
+    queries = [' '.join(tokenize(sentence)[:2]) for sentence in sentences]
+    queries += ['"' + ' '.join(tokenize(sentence)[2:4]) + '"' for sentence in sentences]
+
+    results, expected = _results(built, queries), _results(full, queries)
+    different = [name for name in expected if not _equal(results[name], expected[name])]
+    if different:
+        raise RuntimeError(f"The results are different from loading all the rows at once: {', '.join(different)}")
+    print("The results are identical to loading all the rows at once")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    parser_endpoints = subparsers.add_parser('endpoints', help='latency of every endpoint of the website')
+    parser_endpoints.add_argument('--repeat', type=int, default=20, help='number of requests for every endpoint')
+    parser_endpoints.add_argument('--gene', default='ACE2', help='gene used as input')
+    parser_endpoints.add_argument('--disease', default='COVID-19', help='disease used as input')
+    parser_endpoints.add_argument('--query', default='receptor binding', help='words searched in the sentences')
+    parser_endpoints.set_defaults(func=endpoints)
+
+    parser_throughput = subparsers.add_parser('throughput', help='requests per second answered by a running server')
+    parser_throughput.add_argument('--url', default='http://127.0.0.1:8000', help='address of the server')
+    parser_throughput.add_argument('--clients', type=int, default=8, help='number of requests sent at once')
+    parser_throughput.add_argument('--duration', type=float, default=20, help='seconds of the measure')
+    parser_throughput.add_argument('--pid', type=int, default=None,
+                                   help='pid of the server, to print the memory of its processes (Linux only)')
+    parser_throughput.add_argument('--gene', default='ACE2', help='gene used as input')
+    parser_throughput.add_argument('--disease', default='COVID-19', help='disease used as input')
+    parser_throughput.add_argument('--query', default='receptor binding', help='words searched in the sentences')
+    parser_throughput.set_defaults(func=throughput)
+
+    parser_render = subparsers.add_parser('render', help='streamed and whole rendering of the largest pages')
+    parser_render.add_argument('--rows-per-page', type=int, default=1000, help='rows of the tables in every page')
+    parser_render.add_argument('--chunk', type=int, default=8 * 1024, help='STREAM_CHUNK_BYTES of the streamed pages')
+    parser_render.add_argument('--repeat', type=int, default=10, help='number of requests for every page')
+    parser_render.add_argument('--disease', default='COVID-19', help='disease used as input')
+    parser_render.set_defaults(func=render)
+
+    parser_correlation = subparsers.add_parser('correlation', help='counting of the couples gene-disease')
+    parser_correlation.add_argument('--scale', type=int, nargs='+', default=[1, 10],
+                                    help='number of times the datasets are repeated')
+    parser_correlation.add_argument('--repeat', type=int, default=3, help='the best time of this number of runs')
+    parser_correlation.set_defaults(func=correlation)
+
+    parser_append = subparsers.add_parser('append', help='rows appended to the datasets')
+    parser_append.add_argument('--parts', type=int, default=10, help='number of parts in which the rows are split')
+    parser_append.add_argument('--seed', type=int, default=None,
+                               help='if given the rows are shuffled with this seed before splitting them')
+    parser_append.set_defaults(func=append)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
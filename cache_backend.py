@@ -0,0 +1,389 @@
+"""
+Cache of Flask-Caching shared by all the processes of the website, stored in a SQLite database on disk.
+
+The cache "simple" of Flask-Caching keeps the values in the memory of the process which saved them, thus with more
+than one worker (see gunicorn.conf.py) a value saved by a worker is not found by the others. This backend needs no
+other service: every process opens the same database file, and SQLite serializes the writes of the processes.
+The website keeps in it the pages which change only when the datasets change, see "prerendered()" in website.py.
+
+It's used setting CACHE_TYPE to 'cache_backend.sqlite' in CACHE_CONFIG (see settings.py). The database is the file
+"cache.sqlite" in CACHE_DIR. The cache keeps at most CACHE_THRESHOLD values and "max_bytes" bytes (CACHE_OPTIONS):
+when a limit is exceeded the values used least recently are removed. The hits, misses and removals are counted in
+the database, thus they're the same for all the processes, see "SQLiteCache.stats()".
+
+The values are saved with "dumps()", a compact binary encoding of the types of Python used by the website (None,
+bool, int, float, str, bytes, lists, tuples, dicts) and of the numpy arrays, compressed with zlib when it's worth it.
+"""
+
+from flask_caching.backends.base import BaseCache
+from contextlib import contextmanager
+import os
+import time
+import zlib
+import struct
+import sqlite3
+import logging
+import threading
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# The first byte of every value encoded: a value written by a different version of the encoding is not decoded
+ENCODING_VERSION = 1
+
+# The values encoded longer than this number of bytes are compressed, if it makes them shorter
+COMPRESS_MIN_BYTES = 512
+
+
+def _write_size(out, size):
+    """Writes the non-negative integer "size" in "out" with 7 bits per byte, the lowest first (LEB128)"""
+    while size >= 0x80:
+        out.append(size & 0x7f | 0x80)
+        size >>= 7
+    out.append(size)
+
+
+def _read_size(data, pos):
+    """Reads an integer written by "_write_size()", returns it and the position after it"""
+    size = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        size |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return size, pos
+        shift += 7
+
+
+def _encode(value, out):
+    """
+    Writes "value" in the bytearray "out": one byte with its type, then its content.
+
+    :raise TypeError: if the value (or one of its items) is not of a type supported
+    """
+    if value is None:
+        out += b'N'
+    elif value is True or value is False:
+        out += b'T' if value else b'F'
+    elif isinstance(value, (int, np.integer)):
+        value = int(value)
+        if -2 ** 63 <= value < 2 ** 63:
+            out += b'i' + struct.pack('<q', value)
+        else:
+            raw = value.to_bytes((value.bit_length() + 8) // 8, 'little', signed=True)
+            out += b'I'
+            _write_size(out, len(raw))
+            out += raw
+    elif isinstance(value, (float, np.floating)):
+        out += b'd' + struct.pack('<d', value)
+    elif isinstance(value, str):
+        raw = value.encode('utf-8')
+        out += b's'
+        _write_size(out, len(raw))
+        out += raw
+    elif isinstance(value, (bytes, bytearray)):
+        out += b'b'
+        _write_size(out, len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out += b'l' if isinstance(value, list) else b't'
+        _write_size(out, len(value))
+        for item in value:
+            _encode(item, out)
+    elif isinstance(value, dict):
+        out += b'm'
+        _write_size(out, len(value))
+        for key, item in value.items():
+            _encode(key, out)
+            _encode(item, out)
+    elif isinstance(value, np.ndarray) and value.dtype != object:
+        # the buffer of the array as it is, with its type and its shape
+        dtype = value.dtype.str.encode()
+        out += b'a'
+        _write_size(out, len(dtype))
+        out += dtype
+        _write_size(out, value.ndim)
+        for dimension in value.shape:
+            _write_size(out, dimension)
+        out += np.ascontiguousarray(value).tobytes()
+    else:
+        raise TypeError(f"Values of type {type(value).__name__} can't be saved in the cache")
+
+
+def _decode(data, pos):
+    """Reads a value written by "_encode()" starting at "pos", returns it and the position after it"""
+    tag = data[pos:pos + 1]
+    pos += 1
+
+    if tag == b'N':
+        return None, pos
+    if tag == b'T' or tag == b'F':
+        return tag == b'T', pos
+    if tag == b'i':
+        return struct.unpack_from('<q', data, pos)[0], pos + 8
+    if tag == b'd':
+        return struct.unpack_from('<d', data, pos)[0], pos + 8
+    if tag in (b'I', b's', b'b'):
+        size, pos = _read_size(data, pos)
+        raw = bytes(data[pos:pos + size])
+        if tag == b'I':
+            return int.from_bytes(raw, 'little', signed=True), pos + size
+        return (raw.decode('utf-8') if tag == b's' else raw), pos + size
+    if tag in (b'l', b't'):
+        size, pos = _read_size(data, pos)
+        items = []
+        for _ in range(size):
+            item, pos = _decode(data, pos)
+            items.append(item)
+        return (items if tag == b'l' else tuple(items)), pos
+    if tag == b'm':
+        size, pos = _read_size(data, pos)
+        items = {}
+        for _ in range(size):
+            key, pos = _decode(data, pos)
+            items[key], pos = _decode(data, pos)
+        return items, pos
+    if tag == b'a':
+        size, pos = _read_size(data, pos)
+        dtype = np.dtype(bytes(data[pos:pos + size]).decode())
+        ndim, pos = _read_size(data, pos + size)
+        shape = []
+        for _ in range(ndim):
+            dimension, pos = _read_size(data, pos)
+            shape.append(dimension)
+        count = int(np.prod(shape))
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=pos).reshape(shape).copy()
+        return array, pos + count * dtype.itemsize
+
+    raise ValueError(f"Unknown type {tag!r} at byte {pos - 1}")
+
+
+def dumps(value):
+    """
+    Encodes the value in the binary format of the cache. The first byte is the version of the encoding, the second
+    tells if the rest is compressed with zlib.
+
+    :raise TypeError: if the value contains objects of a type which can't be encoded
+    :rtype: bytes
+    """
+    out = bytearray()
+    _encode(value, out)
+    if len(out) > COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(out, 1)
+        if len(compressed) < len(out):
+            return bytes((ENCODING_VERSION, 1)) + compressed
+    return bytes((ENCODING_VERSION, 0)) + out
+
+
+def loads(data):
+    """
+    Decodes a value encoded by "dumps()"
+
+    :raise ValueError: if the data was not written by this version of "dumps()"
+    """
+    if len(data) < 2 or data[0] != ENCODING_VERSION:
+        raise ValueError('The value was written by a different version of the cache')
+    body = zlib.decompress(data[2:]) if data[1] else memoryview(data)[2:]
+    value, pos = _decode(body, 0)
+    if pos != len(body):
+        raise ValueError('The value has trailing bytes')
+    return value
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache kept in a SQLite database, shared by all the processes which open the same file.
+
+    Every process, and every thread of a process, uses its own connection to the database. The database is in WAL
+    mode, so reading doesn't wait for the other processes which are writing.
+    """
+
+    def __init__(self, path, threshold=500, max_bytes=64 * 1024 ** 2, default_timeout=300, ignore_errors=False):
+        """
+        :param path: the database file, created with its folder if it doesn't exist
+        :type path: str
+        :param threshold: the maximum number of values kept
+        :type threshold: int
+        :param max_bytes: the maximum size of the values kept, once encoded. A larger value is not saved at all
+        :type max_bytes: int
+        :param default_timeout: the seconds after which a value expires, 0 means never
+        :type default_timeout: int
+        :param ignore_errors: accepted like the backends of Flask-Caching, the values are deleted one at a time
+        :type ignore_errors: bool
+        """
+        super().__init__(default_timeout)
+        self.ignore_errors = ignore_errors
+        self.__path = path
+        self.__threshold = threshold
+        self.__max_bytes = max_bytes
+        self.__local = threading.local()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+
+        db = self.__connection()
+        with self.__transaction(db):
+            db.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                       'size INTEGER NOT NULL, expires REAL NOT NULL, used REAL NOT NULL)')
+            db.execute('CREATE INDEX IF NOT EXISTS entries_used ON entries (used)')
+            db.execute('CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+            db.executemany('INSERT OR IGNORE INTO stats VALUES (?, 0)',
+                           [('hits',), ('misses',), ('evictions',), ('expired',)])
+
+    def __connection(self):
+        """
+        Returns the connection to the database of this thread. A connection can't be used by the process forked
+        from the one which opened it, thus a new one is opened also when the process has changed.
+
+        :rtype: sqlite3.Connection
+        """
+        local = self.__local
+        if getattr(local, 'pid', None) != os.getpid():
+            local.db = sqlite3.connect(self.__path, timeout=30, isolation_level=None)
+            local.db.execute('PRAGMA journal_mode=WAL')
+            local.db.execute('PRAGMA synchronous=NORMAL')
+            local.pid = os.getpid()
+        return local.db
+
+    @staticmethod
+    @contextmanager
+    def __transaction(db):
+        """Writes in the database in a transaction. "BEGIN IMMEDIATE" waits at once for the other processes which
+        are writing, so that two processes never both read and then try to write"""
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def _normalize_timeout(self, timeout):
+        """Returns when the value expires as a unix time, or 0 if it never expires"""
+        timeout = BaseCache._normalize_timeout(self, timeout)
+        return time.time() + timeout if timeout > 0 else 0
+
+    @staticmethod
+    def __count(db, name, amount=1):
+        db.execute('UPDATE stats SET value = value + ? WHERE name = ?', (amount, name))
+
+    def __prune(self, db, now):
+        """
+        Removes the values expired, then the values used least recently until the cache is within its limits.
+
+        Steps:
+        1) Remove the values expired
+        2) If there are more than "threshold" values or they're larger than "max_bytes", remove the values in order of
+            last use until both limits are respected
+        """
+
+        # Step 1)
+        expired = db.execute('DELETE FROM entries WHERE expires != 0 AND expires <= ?', (now,)).rowcount
+        if expired:
+            self.__count(db, 'expired', expired)
+
+        # Step 2)
+        entries, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        if entries <= self.__threshold and size <= self.__max_bytes:
+            return
+
+        evicted = []
+        for key, key_size in db.execute('SELECT key, size FROM entries ORDER BY used'):
+            if entries <= self.__threshold and size <= self.__max_bytes:
+                break
+            evicted.append((key,))
+            entries -= 1
+            size -= key_size
+
+        db.executemany('DELETE FROM entries WHERE key = ?', evicted)
+        self.__count(db, 'evictions', len(evicted))
+
+    def get(self, key):
+        """
+        Returns the value saved with "key", or None if there is none or it has expired. Reading the value marks it
+        as used now, for the removal of the values used least recently.
+        """
+        db = self.__connection()
+        now = time.time()
+        try:
+            with self.__transaction(db):
+                row = db.execute('SELECT value FROM entries WHERE key = ? AND (expires = 0 OR expires > ?)',
+                                 (key, now)).fetchone()
+                if row is None:
+                    self.__count(db, 'misses')
+                    return None
+                db.execute('UPDATE entries SET used = ? WHERE key = ?', (now, key))
+                self.__count(db, 'hits')
+            return loads(row[0])
+        except (sqlite3.Error, ValueError, zlib.error):
+            logger.warning('The value %r could not be read from the cache', key, exc_info=True)
+            return None
+
+    def set(self, key, value, timeout=None, overwrite=True):
+        """
+        Saves the value with "key", encoded with "dumps()". If "overwrite" is False and the key already has a value
+        not expired, nothing is saved.
+
+        :return: True if the value has been saved
+        :rtype: bool
+        """
+        data = dumps(value)
+        if len(data) > self.__max_bytes:
+            return False
+
+        db = self.__connection()
+        now = time.time()
+        try:
+            with self.__transaction(db):
+                if not overwrite and db.execute('SELECT 1 FROM entries WHERE key = ? AND (expires = 0 OR expires > ?)',
+                                                (key, now)).fetchone():
+                    return False
+                db.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                           (key, data, len(data), self._normalize_timeout(timeout), now))
+                self.__prune(db, now)
+            return True
+        except sqlite3.Error:
+            logger.warning('The value %r could not be saved in the cache', key, exc_info=True)
+            return False
+
+    def add(self, key, value, timeout=None):
+        """Saves the value only if the key doesn't have one yet"""
+        return self.set(key, value, timeout, overwrite=False)
+
+    def delete(self, key):
+        db = self.__connection()
+        return db.execute('DELETE FROM entries WHERE key = ?', (key,)).rowcount > 0
+
+    def has(self, key):
+        db = self.__connection()
+        return db.execute('SELECT 1 FROM entries WHERE key = ? AND (expires = 0 OR expires > ?)',
+                          (key, time.time())).fetchone() is not None
+
+    def clear(self):
+        """Removes all the values, the statistics are kept"""
+        db = self.__connection()
+        db.execute('DELETE FROM entries')
+        return True
+
+    def stats(self):
+        """
+        Returns the number of hits, misses, values removed to respect the limits (evictions) and values expired,
+        counted by all the processes since the database was created, and the number of values kept and their size.
+
+        :return: dictionary with the keys 'hits', 'misses', 'evictions', 'expired', 'entries', 'bytes', 'threshold'
+            and 'max_bytes'
+        :rtype: dict
+        """
+        db = self.__connection()
+        stats = dict(db.execute('SELECT name, value FROM stats'))
+        entries, size = db.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        return dict(stats, entries=entries, bytes=size, threshold=self.__threshold, max_bytes=self.__max_bytes)
+
+
+def sqlite(app, config, args, kwargs):
+    """Creates the cache for Flask-Caching when CACHE_TYPE is 'cache_backend.sqlite', like the backends of
+    Flask-Caching. The database is "cache.sqlite" in CACHE_DIR"""
+    args.insert(0, os.path.join(config['CACHE_DIR'] or '.', 'cache.sqlite'))
+    kwargs.update(threshold=config['CACHE_THRESHOLD'], ignore_errors=config['CACHE_IGNORE_ERRORS'])
+    return SQLiteCache(*args, **kwargs)
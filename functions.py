@@ -1,8 +1,38 @@
 from abc import ABC, abstractmethod
-import re
+import numpy as np
 import pandas as pd
 import os
+import sys
+import time
+import logging
+import json
+import re
+import hashlib
+import threading
+import copy
+import io
+from bisect import bisect_left
+from collections import OrderedDict
 from pathlib import Path
+from pandas.api.types import union_categoricals
+
+# pyarrow is needed to save the snapshots of the datasets as Feather files, without it the snapshots are not used
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# Returned by the indexes when a key is not found
+_NO_ROWS = np.empty(0, dtype=np.intp)
+
+# The couples gene-disease are counted with an array as long as all the possible couples if they're at most this many,
+# see "count_gene_disease_pairs()"
+_MAX_DENSE_PAIRS = 1 << 22
+
+# Tags searched in the sentences when no other tag is given to GeneTable and DiseaseTable
+DEFAULT_TAGS = {'COVID-19': '>COVID-19<'}
 
 
 class DataTables(ABC):
@@ -34,6 +64,10 @@ class DataTables(ABC):
     def evidence(self, user_input):
         pass
 
+    @abstractmethod
+    def get_sentences(self, sentence_ids):
+        pass
+
 
 class Analysis(ABC):
     @abstractmethod
@@ -49,394 +83,3071 @@ class Analysis(ABC):
         pass
 
 
-class GeneTable(DataTables):
+def find_delimiter(path):
+    """
+    The function finds the delimiter of a dataset based on the extension of its file
+
+    :param path: the path to the dataset
+    :type path: str
+    :return: '\\t' for .tsv files, ',' otherwise
+    :rtype: str
+    """
+    if Path(path).suffix == '.tsv':
+        return '\t'
+    else:
+        return ','
+
+
+def apply_schema(table, schema):
+    """
+    The function converts the columns of the table to the types written in the schema, to reduce the memory used:
+        'category': for columns with few distinct values repeated in many rows. Every distinct value is stored once
+            and the rows keep only an integer code, which is also used when the column is filtered or merged.
+        'integer': for integer columns, which are stored with the narrowest integer type that fits their values.
+    The columns not present in the table are ignored.
+
+    :param table: the table to convert
+    :type table: pandas.DataFrame
+    :param schema: dictionary with the name of the column as key and its type as value
+    :type schema: dict
+    :return: the table converted
+    :rtype: pandas.DataFrame
+    """
+    for column, kind in schema.items():
+        if column not in table.columns:
+            continue
+
+        if kind == 'category':
+            table[column] = table[column].astype('category')
+        elif kind == 'integer':
+            table[column] = pd.to_numeric(table[column], downcast='integer')
+        else:
+            raise ValueError(f"Unknown type '{kind}' for the column '{column}'")
+
+    return table
+
+
+def sentence_key(pmid, nsentence):
+    """
+    The function packs pmid and nsentence in a single integer which identifies the sentence, as in the same
+    publication the nth sentence ("nsentence") is always the same sentence.
+
+    :param pmid: the pmids
+    :type pmid: pandas.Series or numpy.ndarray
+    :param nsentence: the number of the sentences in the publications
+    :type nsentence: pandas.Series or numpy.ndarray
+    :return: the keys of the sentences
+    :rtype: numpy.ndarray
+    """
+    pmid = np.asarray(pmid, dtype=np.int64)
+    nsentence = np.asarray(nsentence, dtype=np.int64)
+    if len(nsentence) and (nsentence.min() < 0 or nsentence.max() >= 1 << SentenceStore.NSENTENCE_BITS):
+        raise ValueError(f"nsentence must be between 0 and {1 << SentenceStore.NSENTENCE_BITS}")
 
-    def __init__(self, table: str, delimiter=None):
+    return (pmid << SentenceStore.NSENTENCE_BITS) | nsentence
+
+
+class SentenceStore:
+    """
+    Stores every sentence only once, even if it's found in many rows of the gene and disease datasets.
+
+    Every sentence is identified by its (pmid, nsentence), see "sentence_key()", and receives an integer id
+    which is what the tables keep instead of the whole sentence. The text is retrieved with "get()" only when
+    it needs to be shown.
+    """
+
+    # Number of bits of the key used for nsentence
+    NSENTENCE_BITS = 20
+
+    def __init__(self):
+        self.__keys = np.empty(0, dtype=np.int64)
+        self.__texts = np.empty(0, dtype=object)
+        self.__index = pd.Index(self.__keys)
+        self.__flags = {}
+
+    def add(self, pmid, nsentence, sentences):
         """
-        The function creates the GeneTable with the parameter table
-        :param table: tha tsv file containing the table
-        :type table: pandas.DataFrame
+        The function adds the sentences not already stored and returns the ids of all of them.
+
+        :param pmid: the pmids of the sentences
+        :type pmid: pandas.Series
+        :param nsentence: the number of the sentences in the publications
+        :type nsentence: pandas.Series
+        :param sentences: the text of the sentences
+        :type sentences: pandas.Series
+        :return: the id of every sentence
+        :rtype: numpy.ndarray
         """
+        keys = sentence_key(pmid, nsentence)
+        unique_keys, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
 
-        table = Path(table)
-        # Finds the delimiter based on the extension
-        if delimiter is None:
-            extension = table.suffix
-            if extension == '.tsv':
-                delimiter = '\t'
-            else:
-                delimiter = ','
+        # The sentences not found in the index are new, and they get the ids after the last one
+        ids = self.__index.get_indexer(unique_keys)
+        new = ids == -1
+        ids[new] = np.arange(len(self.__keys), len(self.__keys) + new.sum())
 
-        self.__geneTable = pd.read_csv(table, delimiter=delimiter)
+        if new.any():
+            self.__keys = np.concatenate([self.__keys, unique_keys[new]])
+            self.__texts = np.concatenate([self.__texts, np.asarray(sentences, dtype=object)[first[new]]])
+            self.__index = pd.Index(self.__keys)
 
-    def __getitem__(self, item):
-        """Allows the use of slicing on the instance of the class.
+        return ids[inverse.ravel()]
 
-        :param item: the index of the row(s) used for slicing
+    def intern(self, table):
+        """
+        The function replaces the column 'sentence' of the table with 'sentence_id', the ids of the sentences
+        added to the store.
 
-        :return: The data table sliced by index(es)
-        :rtype: pandas.DataFrame"""
-        return self.__geneTable.iloc[item]
+        :param table: a table with the columns 'pmid', 'nsentence' and 'sentence'
+        :type table: pandas.DataFrame
+        :return: the table with 'sentence_id' instead of 'sentence'
+        :rtype: pandas.DataFrame
+        """
+        ids = self.add(table['pmid'], table['nsentence'], table['sentence'])
 
-    def get_table(self):
-        """The function returns the table
+        position = table.columns.get_loc('sentence')
+        table = table.drop(columns='sentence')
+        table.insert(position, 'sentence_id', ids.astype(np.int32 if len(self) < 2 ** 31 else np.int64))
+        return table
 
-        :return: The data table
-        :rtype: pandas.DataFrame"""
-        return self.__geneTable
+    def get(self, sentence_ids):
+        """
+        The function returns the text of the sentences
 
-    def get_dimensions(self):
+        :param sentence_ids: the ids of the sentences
+        :type sentence_ids: numpy.ndarray or pandas.Series
+        :return: the sentences
+        :rtype: numpy.ndarray
         """
-        The function records the number of rows and column of dataframe
+        return self.__texts[np.asarray(sentence_ids, dtype=np.intp)]
 
-        :return: tuple with rows and columns
-        :rtype: tuple
+    def locate(self, sentence_ids):
         """
-        return self.__geneTable.shape
+        The function returns the pmid and the nsentence of the sentences, unpacked from their keys
 
-    def get_labels(self):
+        :param sentence_ids: the ids of the sentences
+        :type sentence_ids: numpy.ndarray or pandas.Series
+        :return: the pmids and the number of the sentences in the publications
+        :rtype: tuple(numpy.ndarray, numpy.ndarray)
         """
-        The function records the labels of each column of a dataframe
+        keys = self.__keys[np.asarray(sentence_ids, dtype=np.intp)]
+        return keys >> self.NSENTENCE_BITS, keys & ((1 << self.NSENTENCE_BITS) - 1)
 
-        :return: list with all the column labels
-        :rtype: list
+    def contains(self, text):
         """
-        return list(self.__geneTable.columns)
+        The function returns for every sentence if it contains "text". It's computed only the first time,
+        and only for the sentences added since the last time, and then it's reused.
 
-    def get_head(self):
+        :param text: the text to search
+        :type text: str
+        :return: numpy array of booleans, the element i tells if the sentence with id i contains the text
+        :rtype: numpy.ndarray
         """
-        The function returns the first ten rows of the dataframe
+        flags = self.__flags.get(text, np.empty(0, dtype=bool))
+        if len(flags) < len(self.__texts):
+            new = pd.Series(self.__texts[len(flags):], dtype=object).str.contains(text, regex=False, na=False)
+            flags = np.concatenate([flags, new.to_numpy(dtype=bool)])
+            self.__flags[text] = flags
 
-        :return: dataframe with the first 10 rows of dataframe
-        :rtype: panda.DataFrame
+        return flags
+
+    def digest(self):
         """
-        return self.__geneTable.head()
+        The function returns the sha256 of the keys of the sentences in the order of their ids, which tells which
+        id every sentence has: the ids depend on the order in which the sentences were added
 
-    def get_tail(self):
+        :rtype: str
         """
-        The function returns the last ten rows of the dataframe
+        return hashlib.sha256(self.__keys.tobytes()).hexdigest()
 
-        :return: dataframe with the last 10 rows of dataframe
-        :rtype: panda.DataFrame
+    def memory(self):
         """
-        return self.__geneTable.tail()
+        The function returns the memory used by the store in bytes
 
-    def distinct(self):
+        :rtype: int
         """
-        It returns a dataframe of unique genes (gene_symbol, geneid) present in the dataframe
+        return int(self.__keys.nbytes + self.__index.memory_usage(deep=True)
+                   + sum(sys.getsizeof(text) for text in self.__texts) + self.__texts.nbytes)
+
+    def __len__(self):
+        return len(self.__keys)
+
+
+def _sha256(f, size):
+    """Returns the sha256 of the next "size" bytes of the file f, read in chunks"""
+    sha256 = hashlib.sha256()
+    while size > 0:
+        chunk = f.read(min(size, 1 << 20))
+        if not chunk:
+            break
+        sha256.update(chunk)
+        size -= len(chunk)
+    return sha256.hexdigest()
+
+
+def _is_text(column):
+    """Returns True if the values of the column are not numbers, also when it's a category"""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return not pd.api.types.is_numeric_dtype(column.cat.categories)
+    return not pd.api.types.is_numeric_dtype(column)
+
+
+def _concat_rows(table, rows, schema):
+    """
+    The function returns the rows of "table" followed by "rows", with the columns converted with the schema as if
+    all of them had been read together (see "apply_schema()"):
+        'category': the categories of the two parts are merged and sorted, as "astype('category')" sorts them
+        'integer': the narrowest integer type that fits the values of both parts
+
+    :param table: the rows already converted with the schema
+    :type table: pandas.DataFrame
+    :param rows: the new rows, as they're read from the file
+    :type rows: pandas.DataFrame
+    :param schema: dictionary with the name of the column as key and its type as value
+    :type schema: dict
+    :rtype: pandas.DataFrame
+    :raises ValueError: if a column is text in the new rows and numeric in the table, as it would be text if all
+        the rows were read together
+    """
+    columns = {}
+    for column in table.columns:
+        kind = schema.get(column)
+        if _is_text(rows[column]) and not _is_text(table[column]):
+            raise ValueError(f"The new rows of the column '{column}' are not numbers")
+
+        if kind == 'category':
+            try:
+                columns[column] = union_categoricals([table[column], rows[column].astype('category')],
+                                                     sort_categories=True)
+            except TypeError as err:
+                raise ValueError(f"The new rows of the column '{column}' have a different type: {err}")
+        else:
+            values = pd.concat([table[column], rows[column]], ignore_index=True)
+            columns[column] = pd.to_numeric(values, downcast='integer') if kind == 'integer' else values
 
-        :return: dataframe of unique genes
+    return pd.DataFrame({column: np.asarray(values) if isinstance(values, pd.Series) else values
+                         for column, values in columns.items()})
+
+
+class DatasetStore:
+    """
+    Registry of the datasets already loaded.
+
+    Every file is read only once, the first time it is requested, and then the same DataFrame is shared
+    between all the classes built from the store (GeneTable, DiseaseTable and Testing) instead of each
+    of them parsing and keeping its own copy of the dataset.
+
+    If "schema" is given, the columns of the datasets are converted to the types written in it, see "apply_schema()".
+
+    The sentences of the datasets are stored only once in "sentences", a SentenceStore shared by all the datasets,
+    and the DataFrames have the column 'sentence_id' instead of 'sentence'.
+
+    If "snapshots" is True, after a file is parsed a binary copy of the DataFrame (the snapshot) is saved next to
+    it as a Feather file, and it's loaded at the following starts instead of parsing the file again. The snapshot
+    is used only if the file and the schema have not changed since it was made: with validation='mtime' it checks
+    the size and the modification time of the file, with validation='hash' its size and its sha256. Feather files
+    contain only data, thus a snapshot can't run code when it's read. Without pyarrow the snapshots are not used.
+
+    "search_index()" returns the SearchIndex of the sentences of all the datasets loaded. With snapshots, it's saved
+    next to the first dataset and it's used until any of the datasets changes.
+
+    When rows are only appended at the end of a file, "append()" parses only the new rows and adds them to the
+    dataset already loaded, instead of reading the whole file again.
+    """
+
+    # Changing it makes all the snapshots already saved invalid
+    SNAPSHOT_VERSION = 2
+
+    # Number of bytes at the end of a file compared by "changes()" to know if rows have only been appended
+    TAIL_BYTES = 4096
+
+    def __init__(self, snapshots=False, validation='mtime', schema=None):
+        if validation not in ('mtime', 'hash'):
+            raise ValueError(f"validation must be 'mtime' or 'hash', not '{validation}'")
+
+        if snapshots and pyarrow is None:
+            logger.warning("pyarrow is not installed: the snapshots of the datasets are not used")
+            snapshots = False
+
+        self.__tables = {}
+        self.__memory = {}
+        self.__snapshots = snapshots
+        self.__validation = validation
+        self.__schema = schema if schema is not None else {}
+        self.__signatures = {}
+        self.__sources = {}
+        self.__searchIndex = None
+        self.sentences = SentenceStore()
+
+    def load(self, path, delimiter=None):
+        """
+        Returns the dataset stored in "path", reading it only if it has not been loaded yet.
+
+        :param path: the path to the dataset
+        :type path: str
+        :param delimiter: the delimiter of the file. If None it's found based on the extension
+        :type delimiter: str
+        :return: the dataset
         :rtype: pandas.DataFrame
         """
-        genes = self.__geneTable[['gene_symbol', 'geneid']]
-        return genes.drop_duplicates(subset='gene_symbol').sort_values('gene_symbol')
+        key = os.path.abspath(path)
+        if key not in self.__tables:
+            if delimiter is None:
+                delimiter = find_delimiter(path)
+
+            start = time.perf_counter()
+            table = None
+            signature = {}
+            if self.__snapshots:
+                signature = self.__signature(key, delimiter)
+                self.__signatures[key] = signature
+                table, memory_before = self.__read_snapshot(key, signature)
+            source = self.__source(key, delimiter, signature.get('size'), signature.get('sha256'))
+
+            if table is None:
+                table = pd.read_csv(path, delimiter=delimiter)
+                memory_before = int(table.memory_usage(deep=True).sum())
+                table = apply_schema(table, self.__schema)
+                logger.info("%s parsed in %.1f ms", path, (time.perf_counter() - start) * 1000)
+
+                if self.__snapshots:
+                    self.__write_snapshot(key, signature, table, memory_before)
+            else:
+                logger.info("%s loaded from the snapshot in %.1f ms", path, (time.perf_counter() - start) * 1000)
 
-    def evidence(self, gene):
-        """Receives as input a geneID or a gene symbol and returns a dataframe with the
-        sentences that relates the COVID-19 with the gene.
+            # The columns of the file and their types, used by "append()" to parse the rows added later
+            source['columns'] = list(table.columns)
+            source['text'] = [column for column in table.columns if _is_text(table[column])]
+            self.__sources[key] = source
 
-        :param gene: the geneID or gene symbol input
-        :type gene: str
-        :returns: dataframe of evidences of the gene relation to COVID-19
-        :rtype: pandas.DataFrame
+            # The sentences are moved to the store
+            if 'sentence' in table.columns:
+                table = self.sentences.intern(table)
+
+            self.__tables[key] = table
+            self.__memory[key] = {'before': memory_before,
+                                  'after': int(table.memory_usage(deep=True).sum())}
+
+            logger.info("%s uses %.1f MiB without the sentences, %.1f MiB before applying the schema", path,
+                        self.__memory[key]['after'] / 2 ** 20, self.__memory[key]['before'] / 2 ** 20)
+            logger.info("The sentence store has %d sentences and uses %.1f MiB",
+                        len(self.sentences), self.sentences.memory() / 2 ** 20)
+
+        return self.__tables[key]
+
+    def __signature(self, path, delimiter):
+        """
+        Returns what identifies the content of the file: if it's different from the one saved with the snapshot,
+        the snapshot is not valid anymore.
         """
-        if type(gene) is int:
-            evid = self.__geneTable[self.__geneTable['geneid'] == gene]
+        stat = os.stat(path)
+        signature = {'version': self.SNAPSHOT_VERSION,
+                     'format': 'feather',
+                     'delimiter': delimiter,
+                     'schema': self.__schema,
+                     'size': stat.st_size}
+
+        if self.__validation == 'mtime':
+            signature['mtime'] = stat.st_mtime_ns
         else:
-            evid = self.__geneTable[self.__geneTable['gene_symbol'] == gene]
-        evid = evid[evid['sentence'].str.contains('>COVID-19<')]
+            with open(path, 'rb') as f:
+                signature['sha256'] = _sha256(f, stat.st_size)
 
-        # keeping only these columns
-        return evid[['sentence', 'nsentence', 'pmid']]
+        return signature
+
+    def __source(self, path, delimiter, size=None, sha256=None):
+        """
+        Returns what "changes()" needs to know if the file has changed since it was read until "size" (by default
+        its whole size): its size, its modification time, its last bytes and, with validation='hash', the sha256
+        of its content, which is computed only if it's not given.
+        """
+        stat = os.stat(path)
+        size = stat.st_size if size is None else size
+        source = {'delimiter': delimiter, 'size': size, 'mtime': stat.st_mtime_ns if size == stat.st_size else None}
 
+        with open(path, 'rb') as f:
+            f.seek(max(size - self.TAIL_BYTES, 0))
+            source['tail'] = f.read(min(size, self.TAIL_BYTES))
 
-class DiseaseTable(DataTables):
-    def __init__(self, table: str, delimiter=None):
+            if self.__validation == 'hash':
+                f.seek(0)
+                source['sha256'] = sha256 if sha256 is not None else _sha256(f, size)
+
+        return source
+
+    def changes(self, path):
         """
-        The function creates the GeneTable with the parameter table
-        :param table: tha tsv file containing the table
-        :type table: pandas.DataFrame
+        Returns how the file of a dataset has changed since it was loaded:
+            'unchanged': it has the same size and modification time
+            'appended': new rows have been written after the ones already loaded, which are the same (their last
+                bytes, or all of them with validation='hash'). They can be read with "append()"
+            'modified': anything else, the dataset must be loaded again. Also if it was not loaded from a file
+
+        :param path: the path to the dataset
+        :type path: str
+        :rtype: str
         """
+        key = os.path.abspath(path)
+        source = self.__sources.get(key)
+        if source is None:
+            return 'modified'
 
-        table = Path(table)
-        # Finds the delimiter based on the extension
-        if delimiter is None:
-            extension = table.suffix
-            if extension == '.tsv':
-                delimiter = '\t'
-            else:
-                delimiter = ','
+        stat = os.stat(key)
+        if stat.st_size == source['size'] and stat.st_mtime_ns == source['mtime']:
+            return 'unchanged'
 
-        self.__diseaseTable = pd.read_csv(table, delimiter=delimiter)
+        # The rows already loaded must end with a new line, otherwise the first bytes added complete their last row
+        if stat.st_size <= source['size'] or not source['tail'].endswith(b'\n'):
+            return 'modified'
 
-    def __getitem__(self, item):
+        with open(key, 'rb') as f:
+            f.seek(source['size'] - len(source['tail']))
+            if f.read(len(source['tail'])) != source['tail']:
+                return 'modified'
+
+            if self.__validation == 'hash':
+                f.seek(0)
+                if _sha256(f, source['size']) != source['sha256']:
+                    return 'modified'
+
+        return 'appended'
+
+    def append(self, path):
         """
-        Allows the use of slicing on the instance of the class.
+        Adds to a dataset already loaded the rows written at the end of its file since it was read, and returns
+        the whole dataset. Only the new rows are parsed, then they're converted with the schema and added after the
+        rows already loaded: the result is the same as loading the whole file again.
+        The DataFrame returned is a new one, the one returned before is not modified.
 
-        :param item: the index of the row(s) to use for slicing
+        A row which is still being written (without the final new line) is read by the following call.
 
-        :return: The data table sliced by index(es)
+        :param path: the path to the dataset
+        :type path: str
+        :return: the dataset with the new rows
         :rtype: pandas.DataFrame
+        :raises ValueError: if the file has not only grown (see "changes()") or the new rows change the type of
+            a column, in which case the dataset must be loaded again
         """
-        return self.__diseaseTable.iloc[item]
-
-    def get_table(self):
+        key = os.path.abspath(path)
+        change = self.changes(key)
+        if change == 'unchanged':
+            return self.__tables[key]
+        if change == 'modified':
+            raise ValueError(f"{path} has been modified, not only appended to, it must be loaded again")
+
+        start = time.perf_counter()
+        source = self.__sources[key]
+        with open(key, 'rb') as f:
+            f.seek(source['size'])
+            data = f.read()
+        data = data[:data.rfind(b'\n') + 1]
+        if not data.strip():
+            return self.__tables[key]
+
+        # The columns which are text in the dataset are read as text also if the new values look like numbers
+        rows = pd.read_csv(io.BytesIO(data), delimiter=source['delimiter'], header=None, names=source['columns'],
+                           dtype={column: str for column in source['text']})
+        memory_before = int(rows.memory_usage(deep=True).sum())
+        if 'sentence' in rows.columns:
+            rows = self.sentences.intern(rows)
+
+        table = _concat_rows(self.__tables[key], rows, self.__schema)
+        logger.info("%s: %d rows appended in %.1f ms", path, len(rows), (time.perf_counter() - start) * 1000)
+
+        self.__tables[key] = table
+        self.__memory[key] = {'before': self.__memory[key]['before'] + memory_before,
+                              'after': int(table.memory_usage(deep=True).sum())}
+
+        # The snapshot is saved again only if it contains the whole file
+        size = source['size'] + len(data)
+        signature = {}
+        if self.__snapshots:
+            signature = self.__signature(key, source['delimiter'])
+            if signature['size'] == size:
+                self.__signatures[key] = signature
+                self.__write_snapshot(key, signature, _with_sentences(table, self.sentences),
+                                      self.__memory[key]['before'])
+
+        sha256 = signature.get('sha256') if signature.get('size') == size else None
+        self.__sources[key] = dict(source, **self.__source(key, source['delimiter'], size, sha256))
+        return table
+
+    def fingerprint(self, *paths):
         """
-        The function returns the table
-        
-        :return: The data table
-        :rtype: pandas.DataFrame
+        Returns a short string which identifies the content of the datasets loaded from "paths": it's the same in every
+        process which has loaded the same files, also if it has appended the rows instead of loading them again,
+        and it changes when the files change (see "changes()").
+
+        :param paths: the paths to the datasets
+        :type paths: str
+        :return: the first 16 hexadecimal digits of a sha256, None if a dataset was not loaded from a file
+        :rtype: str or None
         """
-        return self.__diseaseTable
+        digest = hashlib.sha256()
+        for path in paths:
+            source = self.__sources.get(os.path.abspath(path))
+            if source is None:
+                return None
+            digest.update(repr((source['size'], source['mtime'], source.get('sha256'))).encode())
+            digest.update(source['tail'])
+        return digest.hexdigest()[:16]
+
+    def modified(self, *paths):
+        """
+        Returns when the files of the datasets loaded from "paths" were modified last, as unix time in seconds
 
-    def get_dimensions(self):
+        :param paths: the paths to the datasets
+        :type paths: str
+        :return: the time, None if a dataset was not loaded from a file or only a part of it was read
+        :rtype: float or None
         """
-        The function records the number of rows and column of dataframe
+        sources = [self.__sources.get(os.path.abspath(path)) for path in paths]
+        if any(source is None or source['mtime'] is None for source in sources):
+            return None
+        return max(source['mtime'] for source in sources) / 1e9
 
-        :return: tuple with rows and columns
-        :rtype: tuple
+    def copy(self):
         """
-        return self.__diseaseTable.shape
+        Returns a copy of the store which shares the DataFrames and the sentence store with this one, e.g. to
+        append rows to the datasets (see "append()") while this store is still used: the copy replaces its
+        DataFrames instead of modifying them, and the sentence store only adds sentences.
 
-    def get_labels(self):
+        :rtype: DatasetStore
         """
-        The function records the labels of each column of a dataframe
+        store = copy.copy(self)
+        store.__tables = dict(self.__tables)
+        store.__memory = dict(self.__memory)
+        store.__signatures = dict(self.__signatures)
+        store.__sources = dict(self.__sources)
+        return store
+
+    @staticmethod
+    def snapshot_paths(path):
+        """
+        Returns the paths of the snapshot of the dataset in "path" and of the file with its signature
 
-        :return: list with all the column labels
-        :rtype: list
+        :rtype: tuple(str, str)
         """
-        return list(self.__diseaseTable.columns)
+        return path + '.snapshot.feather', path + '.snapshot.json'
 
-    def get_head(self):
+    def __read_snapshot(self, path, signature):
         """
-        The function returns the first ten rows of the dataframe
+        Returns the snapshot of the dataset and the memory the dataset used before applying the schema,
+        if the snapshot is still valid, otherwise (None, None)
+        """
+        snapshot_path, signature_path = self.snapshot_paths(path)
 
-        :return: dataframe with the first 10 rows of dataframe
-        :rtype: panda.DataFrame
+        try:
+            with open(signature_path) as f:
+                saved = json.load(f)
+            if saved.get('signature') != signature:
+                return None, None
+
+            return pd.read_feather(snapshot_path), saved['memory_before']
+
+        except Exception as err:
+            # A missing or corrupted snapshot only means the file needs to be parsed
+            if not isinstance(err, FileNotFoundError):
+                logger.warning("Could not read the snapshot of %s: %s", path, err)
+            return None, None
+
+    def __write_snapshot(self, path, signature, table, memory_before):
         """
-        return self.__diseaseTable.head()
+        Saves the snapshot of the dataset and its signature. The files are first written with a temporary name
+        and then renamed, so that a process reading them never finds them half written.
+        """
+        snapshot_path, signature_path = self.snapshot_paths(path)
 
-    def get_tail(self):
+        try:
+            table.to_feather(snapshot_path + '.tmp')
+            os.replace(snapshot_path + '.tmp', snapshot_path)
+
+            with open(signature_path + '.tmp', 'w') as f:
+                json.dump({'signature': signature, 'memory_before': memory_before}, f)
+            os.replace(signature_path + '.tmp', signature_path)
+
+        except OSError as err:
+            # e.g. the folder of the datasets is read-only: the program works anyway, just without snapshots
+            logger.warning("Could not save the snapshot of %s: %s", path, err)
+
+    def search_index(self):
         """
-        The function returns the last ten rows of the dataframe
+        Returns the SearchIndex of the sentences of the datasets loaded. It's built the first time, or loaded from its
+        snapshot, and then it's extended with only the new sentences if new sentences have been added since then.
 
-        :return: dataframe with the last 10 rows of dataframe
-        :rtype: panda.DataFrame
+        :rtype: SearchIndex
         """
-        return self.__diseaseTable.tail()
+        if self.__searchIndex is None or len(self.__searchIndex) != len(self.sentences):
+            start = time.perf_counter()
+            index = None
+
+            # The ids of the sentences depend on the datasets and on the order in which they were added to the store
+            signature = None
+            if self.__snapshots and self.__signatures:
+                signature = {'version': SearchIndex.SNAPSHOT_VERSION,
+                             'datasets': [[path, self.__signatures[path]] for path in self.__tables],
+                             'sentences': self.sentences.digest()}
+                if self.__searchIndex is None:
+                    index = self.__read_search_snapshot(signature)
+
+            if index is None:
+                if self.__searchIndex is not None:
+                    # Sentences have been added since the index was built, e.g. by "append()": only they are indexed
+                    index = self.__searchIndex.appended()
+                    logger.info("Search index extended to %d sentences in %.1f ms", len(index),
+                                (time.perf_counter() - start) * 1000)
+                else:
+                    index = SearchIndex(self.sentences)
+                    logger.info("Search index built in %.1f ms", (time.perf_counter() - start) * 1000)
+
+                if signature is not None:
+                    self.__write_search_snapshot(signature, index)
+            else:
+                logger.info("Search index loaded from the snapshot in %.1f ms", (time.perf_counter() - start) * 1000)
 
-    def distinct(self):
+            info = index.info()
+            logger.info("The search index has %d words and %d postings and uses %.1f MiB",
+                        info['words'], info['postings'], info['memory'] / 2 ** 20)
+            self.__searchIndex = index
+
+        return self.__searchIndex
+
+    def search_snapshot_paths(self):
         """
-        It returns a dataframe of unique diseases (disease_name, diseaseid) present in the dataframe.
-        Every word of the diseases is capitalized to allow the sorting algorithm to sort them correctly
-        instead of putting the lowercase at the end.
+        Returns the paths of the snapshot of the search index and of the file with its signature, which are in the
+        folder of the first dataset loaded
 
-        :return: dataframe with unique diseases
-        :rtype: pandas.DataFrame
+        :rtype: tuple(str, str)
         """
+        path = os.path.join(os.path.dirname(next(iter(self.__tables))), 'search_index')
+        return path + '.snapshot.npz', path + '.snapshot.json'
 
-        disease = self.__diseaseTable[['disease_name', 'diseaseid']]
-        disease['disease_name'] = disease['disease_name'].str.title()
-        return disease.drop_duplicates(subset='disease_name').sort_values('disease_name')
+    def __read_search_snapshot(self, signature):
+        """Returns the search index saved in the snapshot if it's still valid, otherwise None"""
+        snapshot_path, signature_path = self.search_snapshot_paths()
 
-    def evidence(self, disease):
-        """Receives as input a diseaseID or a disease name and returns a dataframe with the
-        sentences that relates the COVID-19 with the disease.
+        try:
+            with open(signature_path) as f:
+                if json.load(f).get('signature') != signature:
+                    return None
 
-        :param disease: the diseaseID or disease name input
-        :type disease: str
-        :returns: dataframe of evidences of the disease relation to COVID-19
-        :rtype: pandas.DataFrame
+            with np.load(snapshot_path, allow_pickle=False) as arrays:
+                arrays = {name: arrays[name] for name in arrays.files}
+            return SearchIndex(self.sentences, arrays)
+
+        except Exception as err:
+            if not isinstance(err, FileNotFoundError):
+                logger.warning("Could not read the snapshot of the search index: %s", err)
+            return None
+
+    def __write_search_snapshot(self, signature, index):
+        """Saves the snapshot of the search index and its signature, see "__write_snapshot()" """
+        snapshot_path, signature_path = self.search_snapshot_paths()
+
+        try:
+            with open(snapshot_path + '.tmp', 'wb') as f:
+                np.savez(f, **index.arrays())
+            os.replace(snapshot_path + '.tmp', snapshot_path)
+
+            with open(signature_path + '.tmp', 'w') as f:
+                json.dump({'signature': signature}, f)
+            os.replace(signature_path + '.tmp', signature_path)
+
+        except OSError as err:
+            logger.warning("Could not save the snapshot of the search index: %s", err)
+
+    def memory_report(self):
+        """
+        Returns the memory used by every dataset loaded, computed with DataFrame.memory_usage(deep=True),
+        before applying the schema and after (without the sentences, that are in the sentence store).
+        The memory used by the sentence store is under the key 'sentences', and the one used by the search index,
+        if it has been built, under 'search_index'.
+
+        :return: dictionary with the path of the dataset as key and a dictionary with 'before' and 'after'
+            in bytes as value
+        :rtype: dict
+        """
+        report = {path: dict(memory) for path, memory in self.__memory.items()}
+        report['sentences'] = self.sentences.memory()
+        if self.__searchIndex is not None:
+            report['search_index'] = self.__searchIndex.memory()
+        return report
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self.__tables
+
+    def __len__(self):
+        return len(self.__tables)
+
+
+def _load_table(table, delimiter=None, store=None):
+    """
+    Returns the DataFrame of "table" which can be either the path to the dataset, a DataFrame or
+    an instance of DataTables. If "store" is given the path is loaded through it, so that the dataset
+    is shared with the other classes built from the same store.
+
+    :param table: the path to the dataset, the dataset or the DataTables containing it
+    :type table: str or pandas.DataFrame or DataTables
+    :param delimiter: the delimiter of the file, used only if table is a path
+    :type delimiter: str
+    :param store: the store used to load the dataset
+    :type store: DatasetStore
+    :rtype: pandas.DataFrame
+    """
+    if isinstance(table, DataTables):
+        return table.get_compact_table()
+    if isinstance(table, pd.DataFrame):
+        return table
+    if store is not None:
+        return store.load(table, delimiter)
+
+    if delimiter is None:
+        delimiter = find_delimiter(table)
+    return pd.read_csv(table, delimiter=delimiter)
+
+
+def build_index(column):
+    """
+    The function builds a hash index of a column: a dictionary which maps every value of the column
+    to the numpy array of the positions of the rows containing it.
+    Looking up a value in the index costs as much as the number of rows found, instead of a scan of the whole column.
+
+    :param column: the column to index
+    :type column: pandas.Series
+    :return: the index
+    :rtype: dict
+    """
+    return column.groupby(column.values, sort=False, observed=True).indices
+
+
+def append_index(index, column, offset):
+    """
+    The function returns a copy of an index built with "build_index()" with also the rows of "column", which are
+    the rows of the table from position "offset" on. The positions of every value are still sorted, as the new rows
+    come after the others, thus the index is the same as the one built from the whole table.
+
+    :param index: the index of the rows before offset
+    :type index: dict
+    :param column: the column of the rows added
+    :type column: pandas.Series
+    :param offset: the position of the first row added
+    :type offset: int
+    :return: the new index
+    :rtype: dict
+    """
+    index = dict(index)
+    for key, positions in build_index(column.reset_index(drop=True)).items():
+        positions = positions + offset
+        index[key] = np.concatenate((index[key], positions)) if key in index else positions
+    return index
+
+
+def build_flags(sentence_ids, sentences, tags):
+    """
+    The function computes for every tag a flag which tells if the sentence of each row contains the tag.
+    It's done once when the table is loaded, so that the evidences are filtered without scanning the sentences.
+
+    :param sentence_ids: the column with the ids of the sentences
+    :type sentence_ids: pandas.Series
+    :param sentences: the store containing the sentences
+    :type sentences: SentenceStore
+    :param tags: dictionary with the name of the tag as key and the text to search in the sentences as value
+    :type tags: dict
+    :return: dictionary with the name of the tag as key and a numpy array of booleans as value
+    :rtype: dict
+    """
+    sentence_ids = sentence_ids.to_numpy()
+    return {name: sentences.contains(tag)[sentence_ids] for name, tag in tags.items()}
+
+
+def _with_sentences(table, sentences):
+    """
+    Returns a copy of the table with the column 'sentence', containing the text of the sentences,
+    instead of 'sentence_id'.
+
+    :param table: the table with the column 'sentence_id'
+    :type table: pandas.DataFrame
+    :param sentences: the store containing the sentences
+    :type sentences: SentenceStore
+    :rtype: pandas.DataFrame
+    """
+    position = table.columns.get_loc('sentence_id')
+    texts = sentences.get(table['sentence_id'])
+
+    table = table.drop(columns='sentence_id')
+    table.insert(position, 'sentence', texts)
+    return table
+
+
+def _first_labels(codes, n_codes, column):
+    """
+    The function returns the label of every code, taken from the first row with that code
+
+    :param codes: the code of every row, negative for the missing values
+    :type codes: numpy.ndarray
+    :param n_codes: the number of codes
+    :type n_codes: int
+    :param column: the column with the labels
+    :type column: pandas.Series
+    :rtype: numpy.ndarray
+    """
+    first = np.flatnonzero(~pd.Series(codes).duplicated().to_numpy())
+    first = first[codes[first] >= 0]
+
+    labels = np.empty(n_codes, dtype=object)
+    labels[codes[first]] = column.iloc[first].to_numpy(dtype=object)
+    return labels
+
+
+def _extend_factorize(values, uniques):
+    """
+    The function replaces the values with integer codes like "pd.factorize()", but the values already in "uniques"
+    keep their position in it as code, and the new ones receive the codes after them in the order they're found.
+    Factorizing the rows of a column in two parts, the second part with the uniques of the first one, gives the
+    same codes as factorizing all the rows at once.
+
+    :param values: the values to replace
+    :type values: pandas.Series
+    :param uniques: the values which already have a code
+    :type uniques: numpy.ndarray
+    :return: the code of every value, -1 for the missing ones, and the values of all the codes
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    codes, new = pd.factorize(values)
+    new = np.asarray(new)
+
+    positions = pd.Index(uniques).get_indexer(new)
+    added = positions == -1
+    positions[added] = np.arange(len(uniques), len(uniques) + added.sum())
+
+    codes = np.where(codes >= 0, positions[codes], -1)
+    return codes, np.concatenate((uniques, new[added]))
+
+
+class Resolver:
+    """
+    Resolves a gene or a disease written by the user to a canonical integer key: the code of its id, which is the
+    same whether it's written as id or as name, in any case (e.g. "ACE2", "ace2" and "59272").
+    It's built once when the dataset is loaded, then every lookup is a dictionary lookup.
+
+    A name which belongs to more than one id is resolved to the tuple of their codes, and anything not found
+    in the dataset to None.
+    """
+
+    def __init__(self, ids, names):
+        """
+        Steps:
+        1) Replacing every id with an integer code, from 0 to the number of ids - 1
+        2) Mapping the ids and the names to their code. The ids have the precedence over the names, and what is written
+            as in the dataset over the case-folded forms, which are added last
+
+        :param ids: the column with the ids (geneid or diseaseid)
+        :type ids: pandas.Series
+        :param names: the column with the names (gene_symbol or disease_name)
+        :type names: pandas.Series
         """
 
-        if re.match("C\d{7,}", disease):
-            evid = self.__diseaseTable[self.__diseaseTable['diseaseid'] == disease]
-        else:
-            evid = self.__diseaseTable[self.__diseaseTable['disease_name'] == disease]
-        evid = evid[evid['sentence'].str.contains('>COVID-19<')]
+        # Step 1)
+        self.codes, uniques = pd.factorize(ids)
+        self.ids = np.asarray(uniques)
+        self.names = _first_labels(self.codes, len(self.ids), names)
 
-        # keeping only these columns
-        evid = evid[['sentence', 'nsentence', 'pmid']]
+        # Step 2)
+        self.__pairs = self.__name_pairs(names, self.codes)
+        self.__keys = self.__build_keys()
 
-        return evid
+    @staticmethod
+    def __name_pairs(names, codes):
+        """Returns the distinct couples (name, code) in the order they're found, without the missing values"""
+        pairs = pd.DataFrame({'name': names.to_numpy(dtype=object), 'code': codes})
+        return pairs[pairs['code'] >= 0].dropna().drop_duplicates()
 
+    def __build_keys(self):
+        """Returns the dictionary which maps the ids and the names, also case-folded, to their code"""
+        keys = {str(id_): code for code, id_ in enumerate(self.ids.tolist())}
 
-class Testing(Analysis):
-    def __init__(self, geneTable, diseaseTable, geneDelimiter=None, diseaseDelimiter=None):
+        pairs = self.__pairs
+        ambiguous = pairs['name'].duplicated(keep=False).to_numpy()
+        for name, code in zip(pairs['name'][~ambiguous].tolist(), pairs['code'][~ambiguous].tolist()):
+            keys.setdefault(name, code)
+        for name, codes in pairs[ambiguous].groupby('name', sort=False)['code']:
+            keys.setdefault(name, tuple(sorted(codes.tolist())))
 
-        # Finds the delimiter of the gene dataset based on the extension
-        if geneDelimiter is None:
-            extension = os.path.splitext(geneTable)[1]
-            if extension == '.tsv':
-                geneDelimiter = '\t'
-            else:
-                geneDelimiter = ','
+        for key, code in list(keys.items()):
+            keys.setdefault(key.casefold(), code)
 
-        # Finds the delimiter of the disease dataset based on the extension
-        if diseaseDelimiter is None:
-            extension = os.path.splitext(diseaseTable)[1]
-            if extension == '.tsv':
-                diseaseDelimiter = '\t'
-            else:
-                diseaseDelimiter = ','
+        return keys
 
-        self.__diseaseTable = pd.read_csv(diseaseTable, delimiter=geneDelimiter)
-        self.__geneTable = pd.read_csv(geneTable, delimiter=diseaseDelimiter)
+    def appended(self, ids, names):
+        """
+        The function returns a new resolver of the rows of this one followed by new rows, the same as the resolver
+        built from all the rows. The codes of the ids already found don't change, the new ids receive the codes
+        after them (see "_extend_factorize()") and the keys are built again from the distinct couples (name, code).
+
+        :param ids: the column with the ids of the new rows
+        :type ids: pandas.Series
+        :param names: the column with the names of the new rows
+        :type names: pandas.Series
+        :rtype: Resolver
+        """
+        n_codes = len(self.ids)
+        codes, ids = _extend_factorize(ids, self.ids)
+
+        resolver = copy.copy(self)
+        resolver.codes = np.concatenate((self.codes, codes))
+        resolver.ids = ids
+        resolver.names = np.concatenate((self.names, _first_labels(codes - n_codes, len(ids) - n_codes, names)))
+        resolver.__pairs = pd.concat([self.__pairs, self.__name_pairs(names, codes)]).drop_duplicates()
+        resolver.__keys = resolver.__build_keys()
+        return resolver
+
+    def resolve(self, x):
+        """
+        The function returns the key of a gene or a disease given as id or as name
 
-    def correlation_gene_disease(self):
+        :param x: the id or the name
+        :type x: str or int
+        :return: the code of its id, the tuple of the codes if it's a name of many ids, or None if it's not found
+        :rtype: int or tuple or None
         """
-        The function returns a dataframe with the correlation between genes and diseases sorted by the most frequent.
+        x = str(x).strip()
+        key = self.__keys.get(x)
+        if key is None:
+            key = self.__keys.get(x.casefold())
+        return key
 
-        Steps:
-        1) Merging of the two dataframes:
-            The merge occurs on pmid and nsentence (instead of sentence) because they are interchangeable as
-            in the same publication the nth sentence ("nsentence") will always be "sentence".
-            But in this way the program runs faster because it has to check only some numbers instead of whole strings
-            to know which rows to merge.
-        2) Dropping duplicates:
-            The same concept goes for "drop_duplicates". When the function drop_duplicates() search for duplicates
-            of the subset, with "nsentence" it avoids checking for whole strings as it would instead do with sentences.
-            "geneid" and "diseaseid" follow the same concept and are used instead of "gene_symbol" and "disease_name".
-        3) Keeping only the columns needed, thus one for gene and one for disease
-        4) Count occurrences of the couple gene-disease and create a new dataframe with a couple as row and their
-            occurrences in a new column; labels: ['gene_symbol', 'disease_name', 'occurrences'].
+    def canonical(self, x):
+        """
+        The function returns how a gene or a disease is written however the user wrote it: its id if it's found,
+        otherwise (a name of many ids or not found) x stripped
 
+        :param x: the id or the name
+        :type x: str or int
+        :rtype: str
+        """
+        key = self.resolve(x)
+        if isinstance(key, (int, np.integer)):
+            return str(self.ids[key])
+        return str(x).strip()
 
-        :returns: a DataFrame containing the correlations between genes and diseases and their count
-        :rtype: pandas.DataFrame
+    def resolve_all(self, values):
+        """
+        The function resolves many genes or diseases at once. The ones given more than once, also written in
+        different ways, are kept only the first time.
+
+        :param values: the ids or the names
+        :type values: list
+        :return: the list of tuples (value, key) of the ones found, in the order given and with the value stripped,
+            and the list of the ones not found
+        :rtype: tuple(list, list)
+        """
+        found, missing, seen = [], [], set()
+        for x in values:
+            key = self.resolve(x)
+            if key is None:
+                missing.append(x)
+            elif key not in seen:
+                seen.add(key)
+                found.append((str(x).strip(), key))
+        return found, missing
+
+    @staticmethod
+    def codes_of(key):
         """
+        The function returns the codes of a key returned by "resolve()"
 
-        # Step 1)
-        df = pd.DataFrame.merge(self.__diseaseTable, self.__geneTable, how='inner', on=['pmid', 'nsentence'])
+        :rtype: numpy.ndarray
+        """
+        if key is None:
+            return _NO_ROWS
+        return np.atleast_1d(np.asarray(key, dtype=np.intp))
+
+    def memory(self):
+        """The function estimates the memory used by the resolver in bytes"""
+        return self.codes.nbytes + self.ids.nbytes + self.names.nbytes + sys.getsizeof(self.__keys) + \
+            sum(sys.getsizeof(key) for key in self.__keys)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+def result_size(result):
+    """
+    The function estimates the memory used by a result kept in a ResultCache
+
+    :param result: the result
+    :type result: pandas.DataFrame or numpy.ndarray or dict or tuple
+    :return: the memory used in bytes
+    :rtype: int
+    """
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return int(result.memory_usage(index=True, deep=True).sum())
+    if isinstance(result, np.ndarray):
+        return result.nbytes
+    if isinstance(result, dict):
+        return sys.getsizeof(result) + sum(result_size(value) for value in result.values())
+    if isinstance(result, (tuple, list)):
+        return sys.getsizeof(result) + sum(result_size(value) for value in result)
+    return sys.getsizeof(result)
+
+
+class ResultCache:
+    """
+    Keeps the results of the operations on the datasets, so that when the same operation is requested again
+    (e.g. the next page of the same evidences) it's not computed again.
+
+    The cache has a maximum size in bytes: when it's exceeded the results used least recently are removed.
+    The results kept must not be modified by who receives them.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        :param max_bytes: the maximum memory used by the results, estimated with "result_size()"
+        :type max_bytes: int
+        """
+        self.__max_bytes = max_bytes
+        self.__results = OrderedDict()
+        self.__bytes = 0
+        self.__lock = threading.Lock()
+        self.__stats = {'hits': 0, 'misses': 0, 'evictions': 0}
 
-        # Step 2)
-        df.drop_duplicates(subset=['pmid', 'geneid', 'diseaseid', 'nsentence'], inplace=True)
+    def get(self, key, compute, *args):
+        """
+        Returns the result saved with "key" or, if it's not in the cache, computes it calling compute(*args)
+        and saves it.
 
-        # Step 3)
-        df = df[['gene_symbol', 'disease_name']]
+        The key must identify the result, thus it has to contain the operation and its arguments in a canonical form
+        (e.g. the gene resolved with "GeneTable.resolve()"), otherwise the same result is saved more than once.
 
-        # Step 4)
-        df = df.value_counts().to_frame('occurrences').reset_index()
-        return df
+        :param key: the key of the result
+        :type key: tuple
+        :param compute: the function which computes the result
+        :type compute: callable
+        :param args: the arguments of the function
+        """
+        with self.__lock:
+            if key in self.__results:
+                self.__results.move_to_end(key)
+                self.__stats['hits'] += 1
+                return self.__results[key][0]
+            self.__stats['misses'] += 1
+
+        # The result is computed without holding the lock, so that the other requests are not blocked
+        result = compute(*args)
+        size = result_size(result) + sys.getsizeof(key)
+
+        with self.__lock:
+            if size > self.__max_bytes or key in self.__results:
+                return result
+
+            self.__results[key] = (result, size)
+            self.__bytes += size
+            while self.__bytes > self.__max_bytes:
+                _, (_, evicted_size) = self.__results.popitem(last=False)
+                self.__bytes -= evicted_size
+                self.__stats['evictions'] += 1
+
+        return result
+
+    def clear(self):
+        """Removes all the results from the cache"""
+        with self.__lock:
+            self.__results.clear()
+            self.__bytes = 0
+
+    def stats(self):
+        """
+        Returns the number of hits, misses and evictions of the cache, the number of results it contains and
+        the memory they use.
 
-    def find_diseases_related_to_gene(self, gene):
+        :return: dictionary with the keys 'hits', 'misses', 'evictions', 'entries', 'bytes' and 'max_bytes'
+        :rtype: dict
+        """
+        with self.__lock:
+            return dict(self.__stats, entries=len(self.__results), bytes=self.__bytes, max_bytes=self.__max_bytes)
+
+    def __len__(self):
+        return len(self.__results)
+
+
+class PrefixIndex:
+    """
+    Finds the names and the ids which begin with a prefix, to suggest them while the user types.
+
+    The keys, which are the names case-folded and the ids, are kept in a sorted list, thus the keys beginning with
+    a prefix are a slice of the list found with a binary search, without scanning all the names.
+    """
 
+    def __init__(self, names, ids, counts):
         """
-        The function receive as input a geneID or a gene symbol and then returns a dataframe with the
-        diseases related to the gene.
-        
-        Steps:
-        1) Merging of the two dataframes:
-            The merge occurs on pmid and nsentence (instead of sentence) because they are interchangeable as
-            in the same publication the nth sentence ("nsentence") will always be "sentence". 
-            But in this way the program runs faster because it has to check only some numbers instead of whole strings
-            to know which rows to merge.
-        2) Dropping duplicates:
-            The same concept goes for "drop_duplicates". When the function drop_duplicates() search for duplicates 
-            of the subset, with "nsentence" it avoids checking for whole strings as it would instead do with sentences.
-            "geneid" and "diseaseid" follow the same concept and are used instead of "gene_symbol" and "disease_name".
-        3) Performing search: 
-            It first tries to convert gene (string) given as input to an int. If it can, then it means it's a genid and
-            only the rows whose value in the columns 'geneid' will be "gene" will be kept. Otherwise, it means "gene"
-            given as input is a "gene_symbol" and only the rows whose value in the columns 'gene_symbol' will be 
-            "gene" given as input will be kept.  
-        4) Keeping only the columns needed
-        5) Using title() on all diseases:
-            Some diseases are all lowercase and when sorted will be placed at the end of the table as the majority 
-            have the first letter uppercase. With title() all words of the diseases are now capitalized, 
-            and sort_values() will do what we want.
-        6) Dropping duplicates and sorting
-            
-            
-        :param gene: the geneid or gene_symbol input
-        :type gene: str or int
-        :returns: a dataframe with the diseases related to gene
-        :rtype: pandas.DataFrame
+        :param names: the names (gene symbols or disease names)
+        :type names: list
+        :param ids: the id of every name
+        :type ids: list
+        :param counts: the number of evidences of every name
+        :type counts: list
+        """
+        self.__names = list(names)
+        self.__ids = list(ids)
+        self.__counts = [int(count) for count in counts]
+
+        keys = [(str(name).casefold(), i) for i, name in enumerate(self.__names)] + \
+               [(str(id_).casefold(), i) for i, id_ in enumerate(self.__ids)]
+        keys.sort()
+        self.__keys = [key for key, _ in keys]
+        self.__entries = [i for _, i in keys]
+
+    def search(self, prefix, limit=10):
+        """
+        The function returns the names whose name or id begins with the prefix, ignoring the case,
+        in alphabetical order.
+
+        :param prefix: the beginning of the name or of the id
+        :type prefix: str
+        :param limit: the maximum number of names returned
+        :type limit: int
+        :return: list of dictionaries with the keys 'name', 'id' and 'evidences'
+        :rtype: list
         """
+        prefix = prefix.strip().casefold()
+        if not prefix:
+            return []
 
-        # step 1)
-        df = pd.DataFrame.merge(self.__diseaseTable, self.__geneTable, how='inner', on=['pmid', 'nsentence'])
+        # All the keys beginning with the prefix are between the prefix and the prefix followed by the last character
+        start = bisect_left(self.__keys, prefix)
+        end = bisect_left(self.__keys, prefix + '\U0010ffff', start)
 
-        # step 2)
-        df.drop_duplicates(subset=['pmid', 'geneid', 'diseaseid', 'nsentence'], inplace=True)
+        found = []
+        for position in range(start, end):
+            i = self.__entries[position]
+            if i in found:
+                continue
+            found.append(i)
+            if len(found) == limit:
+                break
 
-        # step 3)
-        try:
-            gene = int(gene)
-            df = df[df['geneid'] == gene]
-        except ValueError:
-            df = df[df['gene_symbol'] == gene]
+        return [{'name': self.__names[i], 'id': self.__ids[i], 'evidences': self.__counts[i]} for i in found]
 
-        # step 4)
-        df = df[['disease_name', 'diseaseid']]
+    def __len__(self):
+        return len(self.__names)
 
-        # step 5)
-        df['disease_name'] = df['disease_name'].str.title()
 
-        # step 6)
-        df = df.drop_duplicates(subset='diseaseid').sort_values('disease_name')
+# HTML tags of the sentences (e.g. <span class="gene" id="59272">), which are not indexed, and the words of the text
+_TAG_PATTERN = re.compile(r'<[^>]*>')
+_WORD_PATTERN = re.compile(r'\w+')
 
-        return df
 
-    def find_genes_related_to_disease(self, disease):
+def tokenize(text):
+    """
+    The function returns the words of a text case-folded, without the HTML tags. It's how both the sentences and
+    the queries are split by "SearchIndex".
+
+    :param text: the text
+    :type text: str
+    :return: the words in the order they are found
+    :rtype: list
+    """
+    return _WORD_PATTERN.findall(_TAG_PATTERN.sub(' ', text).casefold())
+
+
+class SearchIndex:
+    """
+    Inverted index of the sentences of a SentenceStore, to search them by keywords and phrases without scanning
+    their text.
+
+    Every word found in the sentences (see "tokenize()") has an id, and its postings are the sorted ids of the
+    sentences containing it with the number of times it's found in each of them. The postings of all the words
+    are kept in two arrays, one after the other in the order of the ids of the words, and "offsets" tells where
+    the postings of every word begin, thus the postings of a word are a slice of the arrays.
+    The positions of the word in the sentences of its postings are kept in the same order, and they are used to
+    find the phrases.
+
+    A query is made of words and phrases between double quotes. The sentences found contain all the words and
+    the phrases, and are sorted by their BM25 score.
+    """
+
+    # Changing it makes all the snapshots of the index already saved invalid
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, sentences, arrays=None):
         """
-        The function receive as input a diseaseid or a disease_name and then returns a dataframe with the
-        diseases related to the gene.
+        :param sentences: the store with the sentences to index
+        :type sentences: SentenceStore
+        :param arrays: the arrays of the index returned by "arrays()", e.g. read from a snapshot.
+            If None the index is built from the sentences
+        :type arrays: dict
+        """
+        start = time.perf_counter()
+        self.__sentences = sentences
+        if arrays is None:
+            arrays = self.__build(sentences.get(np.arange(len(sentences))))
+
+        self.__terms = arrays['terms']
+        self.__offsets = arrays['offsets']
+        self.__documents = arrays['documents']
+        self.__frequencies = arrays['frequencies']
+        self.__positions = arrays['positions']
+        self.__lengths = arrays['lengths']
+
+        # Where the positions of every posting begin, and a number larger than any position
+        self.__positionOffsets = np.zeros(len(self.__frequencies) + 1, dtype=np.int64)
+        np.cumsum(self.__frequencies, out=self.__positionOffsets[1:])
+        self.__step = int(self.__lengths.max()) + 1 if len(self.__lengths) else 1
+
+        words = self.__terms.tobytes().decode().split('\n') if len(self.__terms) else []
+        self.__vocabulary = {word: i for i, word in enumerate(words)}
+        self.__averageLength = float(self.__lengths.mean()) if len(self.__lengths) else 0.0
+        self.__buildTime = time.perf_counter() - start
+
+    @staticmethod
+    def __build(texts):
+        """Returns the arrays of the index of the texts, see "arrays()" """
+        words = pd.Series(texts, dtype=object).map(tokenize)
+        lengths = words.map(len).to_numpy(dtype=np.int32)
+
+        # One element for every word of every sentence, with the id of the sentence as index
+        words = words.explode().dropna()
+        codes, vocabulary = pd.factorize(words.to_numpy(), sort=True)
+        documents = words.index.to_numpy(dtype=np.int64)
+        positions = words.groupby(level=0).cumcount().to_numpy()
+
+        # The positions sorted by word and sentence are in the same order as the postings
+        positions = positions[np.lexsort((positions, documents, codes))]
+
+        terms, documents, frequencies = count_pairs(codes.astype(np.int64), documents, len(vocabulary), len(texts))
+        order = np.lexsort((documents, terms))
+        offsets = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(vocabulary)), out=offsets[1:])
+
+        # The words are saved as a single string, separated by '\n' which is never part of a word
+        return {'terms': np.frombuffer('\n'.join(vocabulary).encode(), dtype=np.uint8),
+                'offsets': offsets,
+                'documents': documents[order].astype(np.int32 if len(texts) < 2 ** 31 else np.int64),
+                'frequencies': frequencies[order].astype(np.int32),
+                'positions': positions.astype(np.int32),
+                'lengths': lengths}
+
+    def appended(self):
+        """
+        The function returns a new index of the sentences of the store, which contains also the sentences added
+        after this index was built, e.g. by "DatasetStore.append()". Only the new sentences are split in words.
 
-        Steps:
-        1) Merging of the two dataframes:
-            The merge occurs on pmid and nsentence (instead of sentence) because they are interchangeable as
-            in the same publication the nth sentence ("nsentence") will always be "sentence".
-            But in this way the program runs faster because it has to check only some numbers instead of whole strings
-            to know which rows to merge.
-        2) Dropping duplicates:
-            The same concept goes for "drop_duplicates". When the function drop_duplicates() search for duplicates
-            of the subset, with "nsentence" it avoids checking for whole strings as it would instead do with sentences.
-            "geneid" and "diseaseid" follow the same concept and are used instead of "gene_symbol" and "disease_name".
-        3) Performing search:
-            Check if the disease matches a pattern which consist of the first element as a 'C' and then at least
-            7 numbers until the end of the string. If it matches, then it means it's a "diseaseid" and only
-            the rows whose value in the columns "diseaseid" are "disease" will be kept. Otherwise, it means "disease"
-            given as input is a "disease_name" and only the rows whose value in the columns 'disease_name' are the
-            "gene" given as input will be kept.
-        4) Keeping only the columns needed.
-        6) Dropping duplicates and sorting
-
-
-        :param disease: the geneid or gene_symbol input
-        :type disease: str
-        :returns: a dataframe with the diseases related to gene
+        The ids of the new sentences are larger than the ones already indexed, thus the postings of every word are
+        still sorted if the new ones are put after the old ones: every posting is moved to its position in the
+        merged arrays, without sorting them, and the result is the same as building the index of all the sentences.
+
+        :rtype: SearchIndex
+        """
+        start = time.perf_counter()
+        n_sentences = len(self.__lengths)
+        if n_sentences == len(self.__sentences):
+            return self
+
+        old = self.arrays()
+        new = self.__build(self.__sentences.get(np.arange(n_sentences, len(self.__sentences))))
+
+        # The words of both indexes, sorted, and the id of the words of every index among them
+        old_words = list(self.__vocabulary)
+        new_words = new['terms'].tobytes().decode().split('\n') if len(new['terms']) else []
+        words = sorted(set(old_words).union(new_words))
+        old_terms = pd.Index(words).get_indexer(old_words) if old_words else _NO_ROWS
+        new_terms = pd.Index(words).get_indexer(new_words) if new_words else _NO_ROWS
+
+        # The postings of every word: first the old ones, then the new ones
+        old_counts, new_counts = np.diff(old['offsets']), np.diff(new['offsets'])
+        before = np.bincount(old_terms, old_counts, minlength=len(words)).astype(np.int64)
+        offsets = np.zeros(len(words) + 1, dtype=np.int64)
+        np.cumsum(before + np.bincount(new_terms, new_counts, minlength=len(words)).astype(np.int64), out=offsets[1:])
+
+        # The position in the merged arrays of every posting
+        old_postings = _ranges(offsets[old_terms], old_counts)
+        new_postings = _ranges(offsets[new_terms] + before[new_terms], new_counts)
+
+        n_total = len(self.__sentences)
+        documents = np.empty(offsets[-1], dtype=np.int32 if n_total < 2 ** 31 else np.int64)
+        documents[old_postings] = old['documents']
+        documents[new_postings] = new['documents'] + n_sentences
+        frequencies = np.empty(offsets[-1], dtype=np.int32)
+        frequencies[old_postings] = old['frequencies']
+        frequencies[new_postings] = new['frequencies']
+
+        # The positions of every posting are moved with it
+        position_offsets = np.cumsum(frequencies, dtype=np.int64) - frequencies
+        positions = np.empty(len(old['positions']) + len(new['positions']), dtype=np.int32)
+        positions[_ranges(position_offsets[old_postings], old['frequencies'])] = old['positions']
+        positions[_ranges(position_offsets[new_postings], new['frequencies'])] = new['positions']
+
+        index = SearchIndex(self.__sentences, {'terms': np.frombuffer('\n'.join(words).encode(), dtype=np.uint8),
+                                               'offsets': offsets,
+                                               'documents': documents,
+                                               'frequencies': frequencies,
+                                               'positions': positions,
+                                               'lengths': np.concatenate((old['lengths'], new['lengths']))})
+        index.__buildTime = time.perf_counter() - start
+        return index
+
+    def arrays(self):
+        """
+        The function returns the arrays of the index, which are enough to rebuild it, e.g. to save it in a snapshot.
+
+        :return: dictionary with 'terms' (the words separated by '\\n' as bytes), 'offsets', 'documents',
+            'frequencies', 'positions' and 'lengths' (the number of words of every sentence)
+        :rtype: dict
+        """
+        return {'terms': self.__terms,
+                'offsets': self.__offsets,
+                'documents': self.__documents,
+                'frequencies': self.__frequencies,
+                'positions': self.__positions,
+                'lengths': self.__lengths}
+
+    @staticmethod
+    def parse(query):
+        """
+        The function splits a query in its words and its phrases, written between double quotes. A phrase of
+        a single word is a word.
+
+        :param query: the query
+        :type query: str
+        :return: the distinct words, and the phrases as tuples of words. The same query written in a different way
+            (e.g. in another case) gives the same result
+        :rtype: tuple(tuple, tuple)
+        """
+        phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+        words = tokenize(re.sub(r'"[^"]*"?', ' ', query))
+
+        words += [phrase[0] for phrase in phrases if len(phrase) == 1]
+        phrases = {tuple(phrase) for phrase in phrases if len(phrase) > 1}
+        return tuple(sorted(set(words))), tuple(sorted(phrases))
+
+    def __postings(self, term):
+        """Returns the ids of the sentences containing the word with id "term" and how many times it's found"""
+        start, end = self.__offsets[term], self.__offsets[term + 1]
+        return self.__documents[start:end], self.__frequencies[start:end]
+
+    def __with_phrase(self, documents, phrase):
+        """
+        Returns the sentences among "documents", which contain all the words of the phrase, where the words are
+        one after the other. Every occurrence of the i-th word is packed with its sentence in an integer, minus i,
+        thus the phrase begins where the integers of all its words are equal.
+        """
+        matches = None
+        for i, word in enumerate(phrase):
+            term = self.__vocabulary[word]
+            start, end = self.__offsets[term], self.__offsets[term + 1]
+            postings = start + np.searchsorted(self.__documents[start:end], documents)
+
+            frequencies = self.__frequencies[postings]
+            positions = self.__positions[_ranges(self.__positionOffsets[postings], frequencies)]
+            keys = np.repeat(documents, frequencies) * self.__step + positions - i
+
+            matches = keys if matches is None else np.intersect1d(matches, keys, assume_unique=True)
+
+        return np.unique(matches // self.__step)
+
+    def search(self, query, within=None, k1=1.2, b=0.75):
+        """
+        The function returns the sentences containing all the words and the phrases of the query, sorted by their
+        BM25 score, the highest first.
+
+        The sentences containing all the words are found intersecting their postings, starting from the shortest.
+        Among them, the ones containing the phrases are found with the positions of the words.
+
+        :param query: the words and the phrases between double quotes to search, see "parse()"
+        :type query: str or tuple
+        :param within: the sorted ids of the sentences where to search, e.g. the ones of a gene. If None all of them
+        :type within: numpy.ndarray
+        :param k1: the saturation of the frequency of the words in BM25
+        :type k1: float
+        :param b: how much the length of the sentences normalizes the score in BM25
+        :type b: float
+        :return: dataframe with the columns 'sentence_id', 'pmid', 'nsentence' and 'score', sorted by the highest
+            score and then by pmid and nsentence
         :rtype: pandas.DataFrame
         """
+        words, phrases = self.parse(query) if isinstance(query, str) else query
+        terms = {self.__vocabulary.get(word, -1) for word in words}
+        terms.update(self.__vocabulary.get(word, -1) for phrase in phrases for word in phrase)
+
+        found = _NO_ROWS
+        if terms and -1 not in terms:
+            # Step 1) the sentences containing every word, from the word found in the fewest sentences
+            postings = {term: self.__postings(term) for term in terms}
+            terms = sorted(terms, key=lambda term: len(postings[term][0]))
+            found = postings[terms[0]][0] if within is None else np.intersect1d(
+                postings[terms[0]][0], within, assume_unique=True)
+            for term in terms[1:]:
+                found = np.intersect1d(found, postings[term][0], assume_unique=True)
+
+            # Step 2) the sentences containing the phrases
+            found = np.asarray(found, dtype=np.int64)
+            for phrase in phrases:
+                found = self.__with_phrase(found, phrase)
+
+        # Step 3) the BM25 score of the sentences found
+        found = np.asarray(found, dtype=np.int64)
+        scores = np.zeros(len(found))
+        if len(found):
+            norms = k1 * (1 - b + b * self.__lengths[found] / self.__averageLength)
+            for term in terms:
+                documents, frequencies = postings[term]
+                idf = np.log(1 + (len(self.__lengths) - len(documents) + 0.5) / (len(documents) + 0.5))
+                tf = frequencies[np.searchsorted(documents, found)]
+                scores += idf * tf * (k1 + 1) / (tf + norms)
+
+        # The sentences with the same score are sorted by pmid and nsentence, which don't depend on the ids
+        pmid, nsentence = self.__sentences.locate(found)
+        order = np.lexsort((nsentence, pmid, -scores))
+        return pd.DataFrame({'sentence_id': found[order], 'pmid': pmid[order], 'nsentence': nsentence[order],
+                             'score': scores[order]})
+
+    def info(self):
+        """
+        The function returns the size of the index, the time needed to build it (or to load it) and the memory it uses
 
-        # Step 1)
-        df = pd.DataFrame.merge(self.__diseaseTable, self.__geneTable, how='inner',
-                                on=['pmid', 'nsentence'])
+        :return: dictionary with 'sentences', 'words', 'postings', 'build_time' in seconds and 'memory' in bytes
+        :rtype: dict
+        """
+        return {'sentences': len(self.__lengths),
+                'words': len(self.__vocabulary),
+                'postings': len(self.__documents),
+                'build_time': self.__buildTime,
+                'memory': self.memory()}
 
-        # Step 2)
-        df.drop_duplicates(subset=['pmid', 'geneid', 'diseaseid', 'nsentence'], inplace=True)
+    def memory(self):
+        """
+        The function returns the memory used by the index in bytes
 
-        # Step 3)
-        if re.match('^C\d{7,}$', disease) is not None:
-            # First select all rows which match the diseaseid, then take its disease_name from the first row
-            df = df[df['diseaseid'] == disease]
-        else:
-            df = df[df['disease_name'] == disease]
+        :rtype: int
+        """
+        arrays = sum(array.nbytes for array in self.arrays().values()) + self.__positionOffsets.nbytes
+        return int(arrays + sys.getsizeof(self.__vocabulary) + sum(sys.getsizeof(word) for word in self.__vocabulary))
 
-        # Step 4)
-        df = df[['gene_symbol', 'geneid']]
+    def __len__(self):
+        return len(self.__lengths)
+
+
+def _positions(index, key):
+    """
+    The function returns the positions of the rows of a key returned by "Resolver.resolve()", in the order of the
+    table, from an index of the codes built with "build_index()"
+
+    :rtype: numpy.ndarray
+    """
+    codes = Resolver.codes_of(key)
+    if len(codes) == 1:
+        return index.get(codes[0], _NO_ROWS)
+    if len(codes) == 0:
+        return _NO_ROWS
+    return np.sort(np.concatenate([index.get(code, _NO_ROWS) for code in codes]))
+
+
+def _batch_positions(index, found):
+    """
+    The function returns the positions of the rows of many keys, one key after the other, from an index built with
+    "build_index()", and the value given by the user for every row.
 
-        # Step 5)
-        df = df.drop_duplicates(subset='geneid').sort_values('gene_symbol')
+    :param index: the index of the codes
+    :type index: dict
+    :param found: the tuples (value, key) returned by "Resolver.resolve_all()"
+    :type found: list
+    :return: the positions and the value of every row
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    positions = [_positions(index, key) for _, key in found]
+    lengths = np.array([len(rows) for rows in positions], dtype=np.intp)
+    values = np.repeat(np.array([value for value, _ in found], dtype=object), lengths)
 
-        return df
+    return (np.concatenate(positions) if positions else _NO_ROWS), values
+
+
+def index_memory(index):
+    """
+    The function estimates the memory used by an index built with "build_index()"
+
+    :param index: the index
+    :type index: dict
+    :return: the memory used in bytes
+    :rtype: int
+    """
+    return sys.getsizeof(index) + sum(sys.getsizeof(key) + positions.nbytes for key, positions in index.items())
+
+
+class GeneTable(DataTables):
+
+    def __init__(self, table, delimiter=None, store=None, tags=None):
+        """
+        The function creates the GeneTable with the parameter table
+
+        :param table: tha tsv file containing the table, or the table itself
+        :type table: str or pandas.DataFrame
+        :param delimiter: the delimiter of the file. If None it's found based on the extension
+        :type delimiter: str
+        :param store: the store from which the table is loaded, to share it with the other classes
+        :type store: DatasetStore
+        :param tags: the tags searched in the sentences, see "build_flags()". If None it's DEFAULT_TAGS
+        :type tags: dict
+        """
+
+        self.__geneTable = _load_table(table, delimiter, store)
+
+        # The sentences are kept in the store and the table has only their ids. When the table is not loaded
+        # through a store, the sentences are moved to a store used only by this table
+        self.__sentences = store.sentences if store is not None else SentenceStore()
+        if 'sentence' in self.__geneTable.columns:
+            self.__geneTable = self.__sentences.intern(self.__geneTable)
+        self.__labels = ['sentence' if label == 'sentence_id' else label for label in self.__geneTable.columns]
+
+        # For every tag, which sentences contain it
+        if tags is None:
+            tags = DEFAULT_TAGS
+        self.__tags = dict(tags)
+        self.__flags = build_flags(self.__geneTable['sentence_id'], self.__sentences, tags)
+
+        # The resolver of the genes written by the user (see "Resolver") and the index of the rows of every gene,
+        # used by "evidence()" to find them without scanning the whole table
+        start = time.perf_counter()
+        self.__resolver = Resolver(self.__geneTable['geneid'], self.__geneTable['gene_symbol'])
+        self.__index = build_index(pd.Series(self.__resolver.codes))
+        self.__indexInfo = {'build_time': time.perf_counter() - start,
+                            'memory': index_memory(self.__index) + self.__resolver.memory()}
+
+        logger.info("GeneTable: indexes built in %.1f ms, %.1f KiB",
+                    self.__indexInfo['build_time'] * 1000, self.__indexInfo['memory'] / 1024)
+
+        # The distinct genes and the indexes used by "prefix_index()" for every tag, computed only when needed
+        self.__distinct = None
+        self.__prefixIndexes = {}
+
+    def __getitem__(self, item):
+        """Allows the use of slicing on the instance of the class.
+
+        :param item: the index of the row(s) used for slicing
+
+        :return: The data table sliced by index(es)
+        :rtype: pandas.DataFrame"""
+        rows = self.__geneTable.iloc[item]
+
+        # a single row is returned as a Series
+        if isinstance(rows, pd.Series):
+            return _with_sentences(rows.to_frame().T, self.__sentences).iloc[0]
+        return _with_sentences(rows, self.__sentences)
+
+    def get_table(self):
+        """The function returns the table.
+        The sentences are retrieved from the store for every row, thus it should be used only when the whole table
+        is needed.
+
+        :return: The data table
+        :rtype: pandas.DataFrame"""
+        return _with_sentences(self.__geneTable, self.__sentences)
+
+    def get_compact_table(self):
+        """
+        The function returns the table as it's stored, with the ids of the sentences in the column 'sentence_id'
+        instead of their text. It's not a copy, thus it must not be modified.
+
+        :return: The data table
+        :rtype: pandas.DataFrame
+        """
+        return self.__geneTable
+
+    def get_dimensions(self):
+        """
+        The function records the number of rows and column of dataframe
+
+        :return: tuple with rows and columns
+        :rtype: tuple
+        """
+        return self.__geneTable.shape
+
+    def get_labels(self):
+        """
+        The function records the labels of each column of a dataframe
+
+        :return: list with all the column labels
+        :rtype: list
+        """
+        return list(self.__labels)
+
+    def get_head(self):
+        """
+        The function returns the first ten rows of the dataframe
+
+        :return: dataframe with the first 10 rows of dataframe
+        :rtype: panda.DataFrame
+        """
+        return _with_sentences(self.__geneTable.head(), self.__sentences)
+
+    def get_tail(self):
+        """
+        The function returns the last ten rows of the dataframe
+
+        :return: dataframe with the last 10 rows of dataframe
+        :rtype: panda.DataFrame
+        """
+        return _with_sentences(self.__geneTable.tail(), self.__sentences)
+
+    def get_sentences(self, sentence_ids):
+        """
+        The function returns the text of the sentences, e.g. of the column 'sentence_id' returned by "evidence()"
+
+        :param sentence_ids: the ids of the sentences
+        :type sentence_ids: pandas.Series or numpy.ndarray
+        :return: the sentences
+        :rtype: numpy.ndarray
+        """
+        return self.__sentences.get(sentence_ids)
+
+    def with_sentences(self, table):
+        """
+        The function returns a copy of the table, e.g. the one returned by "evidence()", with the column 'sentence'
+        containing the text of the sentences instead of 'sentence_id'.
+        It should be called only on the rows that are going to be shown.
+
+        :param table: a table with the column 'sentence_id'
+        :type table: pandas.DataFrame
+        :rtype: pandas.DataFrame
+        """
+        return _with_sentences(table, self.__sentences)
+
+    def get_index_info(self):
+        """
+        The function returns the time needed to build the indexes of the table and the memory they use
+
+        :return: dictionary with 'build_time' in seconds and 'memory' in bytes
+        :rtype: dict
+        """
+        return dict(self.__indexInfo)
+
+    def distinct(self):
+        """
+        It returns a dataframe of unique genes (gene_symbol, geneid) present in the dataframe.
+        It's computed only the first time and it's not a copy, thus it must not be modified.
+
+        :return: dataframe of unique genes
+        :rtype: pandas.DataFrame
+        """
+        if self.__distinct is None:
+            genes = self.__geneTable[['gene_symbol', 'geneid']]
+            self.__distinct = genes.drop_duplicates(subset='gene_symbol').sort_values('gene_symbol')
+        return self.__distinct
+
+    def prefix_index(self, tag='COVID-19'):
+        """
+        The function returns the index used to suggest the genes while the user types, built from "distinct()"
+        the first time it's requested. The evidences of every gene are the sentences with its geneid which
+        contain the tag.
+
+        :param tag: the name of the tag the evidences must contain
+        :type tag: str
+        :rtype: PrefixIndex
+        """
+        if tag not in self.__prefixIndexes:
+            genes = self.distinct()
+            counts = pd.Series(self.__flags[tag]).groupby(self.__geneTable['geneid'].to_numpy()).sum()
+            counts = counts.reindex(genes['geneid'].to_numpy(), fill_value=0)
+
+            self.__prefixIndexes[tag] = PrefixIndex(genes['gene_symbol'].tolist(), genes['geneid'].tolist(),
+                                                    counts.tolist())
+        return self.__prefixIndexes[tag]
+
+    def resolve(self, gene):
+        """
+        The function returns the canonical key of a gene written by the user, which is the same however the gene
+        is written: as geneid or gene symbol, in any case. See "Resolver".
+
+        :param gene: the geneID or gene symbol input
+        :type gene: str or int
+        :return: the key of the gene, None if it's not in the dataset
+        :rtype: int or tuple or None
+        """
+        return self.__resolver.resolve(gene)
+
+    def canonical(self, gene):
+        """
+        The function returns the geneid of a gene written by the user, or the gene stripped if it's not found,
+        see "Resolver.canonical()"
+
+        :param gene: the geneID or gene symbol input
+        :type gene: str or int
+        :rtype: str
+        """
+        return self.__resolver.canonical(gene)
+
+    def evidence(self, gene, tag='COVID-19'):
+        """Receives as input a geneID or a gene symbol and returns a dataframe with the
+        sentences that relates the COVID-19 (or any other tag) with the gene.
+        The sentences are returned as ids in the column 'sentence_id', their text is obtained with "with_sentences()".
+
+        :param gene: the geneID or gene symbol input, in any case
+        :type gene: str or int
+        :param tag: the name of the tag the sentences must contain, one of the tags given to the class
+        :type tag: str
+        :returns: dataframe of evidences of the gene relation to COVID-19
+        :rtype: pandas.DataFrame
+        """
+        positions = _positions(self.__index, self.resolve(gene))
+
+        # keeping only the rows whose sentence contains the tag
+        positions = positions[self.__flags[tag][positions]]
+        evid = self.__geneTable.iloc[positions]
+
+        # keeping only these columns
+        return evid[['sentence_id', 'nsentence', 'pmid']]
+
+    def batch_evidence(self, genes, tag='COVID-19'):
+        """Receives as input many geneIDs or gene symbols and returns a dataframe with the evidences of all of them,
+        one gene after the other, like "evidence()" with the column 'query' with the gene as given in "genes".
+        The genes not found and the ones given more than once are skipped, see "Resolver.resolve_all()".
+
+        :param genes: the geneIDs or gene symbols input, in any case
+        :type genes: list
+        :param tag: the name of the tag the sentences must contain, one of the tags given to the class
+        :type tag: str
+        :returns: dataframe with the labels ['query', 'sentence_id', 'nsentence', 'pmid']
+        :rtype: pandas.DataFrame
+        """
+        positions, queries = _batch_positions(self.__index, self.resolve_all(genes)[0])
+
+        # keeping only the rows whose sentence contains the tag
+        keep = self.__flags[tag][positions]
+        evid = self.__geneTable.iloc[positions[keep]][['sentence_id', 'nsentence', 'pmid']]
+        evid.insert(0, 'query', queries[keep])
+
+        return evid
+
+    def resolve_all(self, genes):
+        """
+        The function resolves many genes at once, see "Resolver.resolve_all()"
+
+        :param genes: the geneIDs or gene symbols input
+        :type genes: list
+        :return: the list of tuples (gene, key) of the genes found and the list of the ones not found
+        :rtype: tuple(list, list)
+        """
+        return self.__resolver.resolve_all(genes)
+
+    def sentence_ids(self, gene):
+        """
+        The function returns the ids of the sentences in which the gene is found, e.g. to search only among them
+        with "SearchIndex.search()"
+
+        :param gene: the geneID or gene symbol input, in any case
+        :type gene: str or int
+        :return: the sorted ids of the sentences
+        :rtype: numpy.ndarray
+        """
+        positions = _positions(self.__index, self.resolve(gene))
+        return np.unique(self.__geneTable['sentence_id'].to_numpy()[positions])
+
+    def appended(self, table):
+        """
+        The function returns a new GeneTable with the rows of "table" added after the ones of this table, e.g. the
+        table returned by "DatasetStore.append()". Only the new rows are processed: their flags, codes and
+        positions are added to the ones of this table, and the new genes to the distinct ones if they have been
+        computed. The result is the same as the GeneTable of the whole table.
+        This table is not modified, thus it can still be used while the new one is built.
+
+        :param table: the whole table with the column 'sentence_id', whose first rows are the ones of this table
+        :type table: pandas.DataFrame
+        :rtype: GeneTable
+        """
+        start = time.perf_counter()
+        offset = len(self.__geneTable)
+        rows = table.iloc[offset:]
+
+        genes = copy.copy(self)
+        genes.__geneTable = table
+        flags = build_flags(rows['sentence_id'], self.__sentences, self.__tags)
+        genes.__flags = {tag: np.concatenate((self.__flags[tag], flags[tag])) for tag in self.__flags}
+
+        genes.__resolver = self.__resolver.appended(rows['geneid'], rows['gene_symbol'])
+        genes.__index = append_index(self.__index, pd.Series(genes.__resolver.codes[offset:]), offset)
+        genes.__indexInfo = {'build_time': time.perf_counter() - start,
+                             'memory': index_memory(genes.__index) + genes.__resolver.memory()}
+
+        # The genes not found before are the first row of the symbols which are not among the distinct ones
+        if self.__distinct is not None:
+            new = rows[['gene_symbol', 'geneid']].drop_duplicates(subset='gene_symbol')
+            new = new[~new['gene_symbol'].isin(self.__distinct['gene_symbol'])]
+            genes.__distinct = table.loc[self.__distinct.index.append(new.index), ['gene_symbol', 'geneid']]
+            genes.__distinct = genes.__distinct.sort_values('gene_symbol')
+        genes.__prefixIndexes = {}
+
+        logger.info("GeneTable: %d rows appended in %.1f ms", len(rows), (time.perf_counter() - start) * 1000)
+        return genes
+
+
+class DiseaseTable(DataTables):
+    def __init__(self, table, delimiter=None, store=None, tags=None):
+        """
+        The function creates the DiseaseTable with the parameter table
+
+        :param table: tha tsv file containing the table, or the table itself
+        :type table: str or pandas.DataFrame
+        :param delimiter: the delimiter of the file. If None it's found based on the extension
+        :type delimiter: str
+        :param store: the store from which the table is loaded, to share it with the other classes
+        :type store: DatasetStore
+        :param tags: the tags searched in the sentences, see "build_flags()". If None it's DEFAULT_TAGS
+        :type tags: dict
+        """
+
+        self.__diseaseTable = _load_table(table, delimiter, store)
+
+        # The sentences are kept in the store and the table has only their ids. When the table is not loaded
+        # through a store, the sentences are moved to a store used only by this table
+        self.__sentences = store.sentences if store is not None else SentenceStore()
+        if 'sentence' in self.__diseaseTable.columns:
+            self.__diseaseTable = self.__sentences.intern(self.__diseaseTable)
+        self.__labels = ['sentence' if label == 'sentence_id' else label for label in self.__diseaseTable.columns]
+
+        # For every tag, which sentences contain it
+        if tags is None:
+            tags = DEFAULT_TAGS
+        self.__tags = dict(tags)
+        self.__flags = build_flags(self.__diseaseTable['sentence_id'], self.__sentences, tags)
+
+        # The resolver of the diseases written by the user (see "Resolver") and the index of the rows of every
+        # disease, used by "evidence()" to find them without scanning the whole table
+        start = time.perf_counter()
+        self.__resolver = Resolver(self.__diseaseTable['diseaseid'], self.__diseaseTable['disease_name'])
+        self.__index = build_index(pd.Series(self.__resolver.codes))
+        self.__indexInfo = {'build_time': time.perf_counter() - start,
+                            'memory': index_memory(self.__index) + self.__resolver.memory()}
+
+        logger.info("DiseaseTable: indexes built in %.1f ms, %.1f KiB",
+                    self.__indexInfo['build_time'] * 1000, self.__indexInfo['memory'] / 1024)
+
+        # The distinct diseases and the indexes used by "prefix_index()" for every tag, computed only when needed
+        self.__distinct = None
+        self.__prefixIndexes = {}
+
+    def __getitem__(self, item):
+        """
+        Allows the use of slicing on the instance of the class.
+
+        :param item: the index of the row(s) to use for slicing
+
+        :return: The data table sliced by index(es)
+        :rtype: pandas.DataFrame
+        """
+        rows = self.__diseaseTable.iloc[item]
+
+        # a single row is returned as a Series
+        if isinstance(rows, pd.Series):
+            return _with_sentences(rows.to_frame().T, self.__sentences).iloc[0]
+        return _with_sentences(rows, self.__sentences)
+
+    def get_table(self):
+        """
+        The function returns the table
+        
+        The sentences are retrieved from the store for every row, thus it should be used only when the whole table
+        is needed.
+
+        :return: The data table
+        :rtype: pandas.DataFrame
+        """
+        return _with_sentences(self.__diseaseTable, self.__sentences)
+
+    def get_compact_table(self):
+        """
+        The function returns the table as it's stored, with the ids of the sentences in the column 'sentence_id'
+        instead of their text. It's not a copy, thus it must not be modified.
+
+        :return: The data table
+        :rtype: pandas.DataFrame
+        """
+        return self.__diseaseTable
+
+    def get_dimensions(self):
+        """
+        The function records the number of rows and column of dataframe
+
+        :return: tuple with rows and columns
+        :rtype: tuple
+        """
+        return self.__diseaseTable.shape
+
+    def get_labels(self):
+        """
+        The function records the labels of each column of a dataframe
+
+        :return: list with all the column labels
+        :rtype: list
+        """
+        return list(self.__labels)
+
+    def get_head(self):
+        """
+        The function returns the first ten rows of the dataframe
+
+        :return: dataframe with the first 10 rows of dataframe
+        :rtype: panda.DataFrame
+        """
+        return _with_sentences(self.__diseaseTable.head(), self.__sentences)
+
+    def get_tail(self):
+        """
+        The function returns the last ten rows of the dataframe
+
+        :return: dataframe with the last 10 rows of dataframe
+        :rtype: panda.DataFrame
+        """
+        return _with_sentences(self.__diseaseTable.tail(), self.__sentences)
+
+    def get_sentences(self, sentence_ids):
+        """
+        The function returns the text of the sentences, e.g. of the column 'sentence_id' returned by "evidence()"
+
+        :param sentence_ids: the ids of the sentences
+        :type sentence_ids: pandas.Series or numpy.ndarray
+        :return: the sentences
+        :rtype: numpy.ndarray
+        """
+        return self.__sentences.get(sentence_ids)
+
+    def with_sentences(self, table):
+        """
+        The function returns a copy of the table, e.g. the one returned by "evidence()", with the column 'sentence'
+        containing the text of the sentences instead of 'sentence_id'.
+        It should be called only on the rows that are going to be shown.
+
+        :param table: a table with the column 'sentence_id'
+        :type table: pandas.DataFrame
+        :rtype: pandas.DataFrame
+        """
+        return _with_sentences(table, self.__sentences)
+
+    def get_index_info(self):
+        """
+        The function returns the time needed to build the indexes of the table and the memory they use
+
+        :return: dictionary with 'build_time' in seconds and 'memory' in bytes
+        :rtype: dict
+        """
+        return dict(self.__indexInfo)
+
+    def distinct(self):
+        """
+        It returns a dataframe of unique diseases (disease_name, diseaseid) present in the dataframe.
+        Every word of the diseases is capitalized to allow the sorting algorithm to sort them correctly
+        instead of putting the lowercase at the end.
+        It's computed only the first time and it's not a copy, thus it must not be modified.
+
+        Only the first row of every disease name is capitalized, not the whole column, then the names which are
+        the same once capitalized are dropped.
+
+        :return: dataframe with unique diseases
+        :rtype: pandas.DataFrame
+        """
+
+        if self.__distinct is None:
+            disease = self.__diseaseTable[['disease_name', 'diseaseid']].drop_duplicates(subset='disease_name')
+            disease = disease.assign(disease_name=disease['disease_name'].astype(object).str.title())
+            self.__distinct = disease.drop_duplicates(subset='disease_name').sort_values('disease_name')
+        return self.__distinct
+
+    def prefix_index(self, tag='COVID-19'):
+        """
+        The function returns the index used to suggest the diseases while the user types, built from "distinct()"
+        the first time it's requested. The evidences of every disease are the sentences with its diseaseid which
+        contain the tag.
+
+        :param tag: the name of the tag the evidences must contain
+        :type tag: str
+        :rtype: PrefixIndex
+        """
+        if tag not in self.__prefixIndexes:
+            diseases = self.distinct()
+            counts = pd.Series(self.__flags[tag]).groupby(self.__diseaseTable['diseaseid'].to_numpy()).sum()
+            counts = counts.reindex(diseases['diseaseid'].to_numpy(dtype=object), fill_value=0)
+
+            self.__prefixIndexes[tag] = PrefixIndex(diseases['disease_name'].tolist(), diseases['diseaseid'].tolist(),
+                                                    counts.tolist())
+        return self.__prefixIndexes[tag]
+
+    def resolve(self, disease):
+        """
+        The function returns the canonical key of a disease written by the user, which is the same however the
+        disease is written: as diseaseid or disease name, in any case. See "Resolver".
+
+        :param disease: the diseaseID or disease name input
+        :type disease: str
+        :return: the key of the disease, None if it's not in the dataset
+        :rtype: int or tuple or None
+        """
+        return self.__resolver.resolve(disease)
+
+    def canonical(self, disease):
+        """
+        The function returns the diseaseid of a disease written by the user, or the disease stripped if it's not found,
+        see "Resolver.canonical()"
+
+        :param disease: the diseaseID or disease name input
+        :type disease: str
+        :rtype: str
+        """
+        return self.__resolver.canonical(disease)
+
+    def evidence(self, disease, tag='COVID-19'):
+        """Receives as input a diseaseID or a disease name and returns a dataframe with the
+        sentences that relates the COVID-19 (or any other tag) with the disease.
+        The sentences are returned as ids in the column 'sentence_id', their text is obtained with "with_sentences()".
+
+        :param disease: the diseaseID or disease name input, in any case
+        :type disease: str
+        :param tag: the name of the tag the sentences must contain, one of the tags given to the class
+        :type tag: str
+        :returns: dataframe of evidences of the disease relation to COVID-19
+        :rtype: pandas.DataFrame
+        """
+
+        positions = _positions(self.__index, self.resolve(disease))
+
+        # keeping only the rows whose sentence contains the tag
+        positions = positions[self.__flags[tag][positions]]
+        evid = self.__diseaseTable.iloc[positions]
+
+        # keeping only these columns
+        evid = evid[['sentence_id', 'nsentence', 'pmid']]
+
+        return evid
+
+    def batch_evidence(self, diseases, tag='COVID-19'):
+        """Receives as input many diseaseIDs or disease names and returns a dataframe with the evidences of all of
+        them, one disease after the other, like "evidence()" with the column 'query' with the disease as given in
+        "diseases". The diseases not found and the ones given more than once are skipped, see
+        "Resolver.resolve_all()".
+
+        :param diseases: the diseaseIDs or disease names input, in any case
+        :type diseases: list
+        :param tag: the name of the tag the sentences must contain, one of the tags given to the class
+        :type tag: str
+        :returns: dataframe with the labels ['query', 'sentence_id', 'nsentence', 'pmid']
+        :rtype: pandas.DataFrame
+        """
+        positions, queries = _batch_positions(self.__index, self.resolve_all(diseases)[0])
+
+        # keeping only the rows whose sentence contains the tag
+        keep = self.__flags[tag][positions]
+        evid = self.__diseaseTable.iloc[positions[keep]][['sentence_id', 'nsentence', 'pmid']]
+        evid.insert(0, 'query', queries[keep])
+
+        return evid
+
+    def resolve_all(self, diseases):
+        """
+        The function resolves many diseases at once, see "Resolver.resolve_all()"
+
+        :param diseases: the diseaseIDs or disease names input
+        :type diseases: list
+        :return: the list of tuples (disease, key) of the diseases found and the list of the ones not found
+        :rtype: tuple(list, list)
+        """
+        return self.__resolver.resolve_all(diseases)
+
+    def sentence_ids(self, disease):
+        """
+        The function returns the ids of the sentences in which the disease is found, e.g. to search only among them
+        with "SearchIndex.search()"
+
+        :param disease: the diseaseID or disease name input, in any case
+        :type disease: str
+        :return: the sorted ids of the sentences
+        :rtype: numpy.ndarray
+        """
+        positions = _positions(self.__index, self.resolve(disease))
+        return np.unique(self.__diseaseTable['sentence_id'].to_numpy()[positions])
+
+    def appended(self, table):
+        """
+        The function returns a new DiseaseTable with the rows of "table" added after the ones of this table, e.g.
+        the table returned by "DatasetStore.append()". Only the new rows are processed: their flags, codes and
+        positions are added to the ones of this table, and the new diseases to the distinct ones if they have been
+        computed. The result is the same as the DiseaseTable of the whole table.
+        This table is not modified, thus it can still be used while the new one is built.
+
+        :param table: the whole table with the column 'sentence_id', whose first rows are the ones of this table
+        :type table: pandas.DataFrame
+        :rtype: DiseaseTable
+        """
+        start = time.perf_counter()
+        offset = len(self.__diseaseTable)
+        rows = table.iloc[offset:]
+
+        diseases = copy.copy(self)
+        diseases.__diseaseTable = table
+        flags = build_flags(rows['sentence_id'], self.__sentences, self.__tags)
+        diseases.__flags = {tag: np.concatenate((self.__flags[tag], flags[tag])) for tag in self.__flags}
+
+        diseases.__resolver = self.__resolver.appended(rows['diseaseid'], rows['disease_name'])
+        diseases.__index = append_index(self.__index, pd.Series(diseases.__resolver.codes[offset:]), offset)
+        diseases.__indexInfo = {'build_time': time.perf_counter() - start,
+                                'memory': index_memory(diseases.__index) + diseases.__resolver.memory()}
+
+        # The distinct diseases keep the first row of every capitalized name, thus the new ones are the first row
+        # of the capitalized names which are not among the distinct ones
+        if self.__distinct is not None:
+            new = rows[['disease_name', 'diseaseid']].drop_duplicates(subset='disease_name')
+            new = new.assign(disease_name=new['disease_name'].astype(object).str.title())
+            new = new.drop_duplicates(subset='disease_name')
+            new = new[~new['disease_name'].isin(self.__distinct['disease_name'])]
+
+            disease = table.loc[self.__distinct.index.append(new.index), ['disease_name', 'diseaseid']]
+            disease = disease.assign(disease_name=disease['disease_name'].astype(object).str.title())
+            diseases.__distinct = disease.sort_values('disease_name')
+        diseases.__prefixIndexes = {}
+
+        logger.info("DiseaseTable: %d rows appended in %.1f ms", len(rows), (time.perf_counter() - start) * 1000)
+        return diseases
+
+
+def _first_rows(sentences, ids):
+    """
+    The function returns the position of the first row of every distinct couple (sentence, id).
+
+    :param sentences: the dense id of the sentence of every row
+    :type sentences: numpy.ndarray
+    :param ids: the id of the gene or of the disease of every row
+    :type ids: pandas.Series
+    :rtype: numpy.ndarray
+    """
+    codes, uniques = pd.factorize(ids)
+
+    # The missing ids are considered all equal, as "drop_duplicates()" does
+    codes = np.where(codes < 0, len(uniques), codes)
+    keys = sentences * (len(uniques) + 1) + codes
+
+    return np.flatnonzero(~pd.Series(keys).duplicated().to_numpy())
+
+
+def _ranges(starts, lengths):
+    """
+    The function returns the concatenation of the ranges of positions which begin at "starts" and are as long as
+    "lengths", e.g. starts=[5, 0] and lengths=[2, 3] give [5, 6, 0, 1, 2]. It's used to take many slices of an array
+    at once without a python loop.
+
+    :param starts: the first position of every range
+    :type starts: numpy.ndarray
+    :param lengths: the length of every range
+    :type lengths: numpy.ndarray
+    :rtype: numpy.ndarray
+    """
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def pair_gene_disease_rows(genes, diseases):
+    """
+    The function finds the couples gene-disease found in the same sentence, working only on integer arrays instead
+    of joining the two datasets. It returns the same couples as merging the datasets on pmid and nsentence and
+    dropping the duplicates (see "legacy_correlation()" in benchmark.py).
+
+    Steps:
+    1) Packing pmid and nsentence of every row in an integer (see "sentence_key()") and replacing it with a dense id,
+        the same for the two datasets. The integers are hashed by "pd.factorize()", which is faster than sorting them
+    2) Dropping duplicates:
+        only the first row of every couple (sentence, geneid) and (sentence, diseaseid) is kept, as the join does
+        with "drop_duplicates()" on ['pmid', 'geneid', 'diseaseid', 'nsentence']. The gene rows kept are sorted by
+        sentence.
+    3) Pairing every disease with all the genes of its sentence:
+        as the genes are sorted by sentence, the genes of a sentence are a slice whose start and length are found
+        with "bincount()". Each disease is repeated as many times as the genes of its sentence and the slices
+        are concatenated.
+
+    :param genes: the gene dataset, with the columns 'pmid', 'nsentence' and 'geneid'
+    :type genes: pandas.DataFrame
+    :param diseases: the disease dataset, with the columns 'pmid', 'nsentence' and 'diseaseid'
+    :type diseases: pandas.DataFrame
+    :return: the position in the gene dataset and the position in the disease dataset of the rows of every couple
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+
+    # Step 1)
+    gene_keys = sentence_key(genes['pmid'], genes['nsentence'])
+    disease_keys = sentence_key(diseases['pmid'], diseases['nsentence'])
+    sentences, uniques = pd.factorize(np.concatenate((gene_keys, disease_keys)))
+    n_sentences = len(uniques)
+
+    gene_sentences = sentences[:len(gene_keys)]
+    disease_sentences = sentences[len(gene_keys):]
+
+    # Step 2)
+    gene_rows = _first_rows(gene_sentences, genes['geneid'])
+    gene_rows = gene_rows[np.argsort(gene_sentences[gene_rows], kind='stable')]
+    disease_rows = _first_rows(disease_sentences, diseases['diseaseid'])
+    gene_sentences = gene_sentences[gene_rows]
+    disease_sentences = disease_sentences[disease_rows]
+
+    # Step 3)
+    gene_count = np.bincount(gene_sentences, minlength=n_sentences)
+    gene_start = np.cumsum(gene_count) - gene_count
+
+    repeats = gene_count[disease_sentences]
+    return gene_rows[_ranges(gene_start[disease_sentences], repeats)], np.repeat(disease_rows, repeats)
+
+
+def _match(keys, new_keys):
+    """
+    The function finds, for every key of "new_keys", the positions of the same key in the sorted array "keys",
+    which are a slice found with a binary search.
+
+    :return: the position in new_keys and the position in keys of every match
+    :rtype: tuple(numpy.ndarray, numpy.ndarray)
+    """
+    starts = np.searchsorted(keys, new_keys, side='left')
+    lengths = np.searchsorted(keys, new_keys, side='right') - starts
+    return np.repeat(np.arange(len(new_keys)), lengths), _ranges(starts, lengths)
+
+
+class SentencePairs:
+    """
+    The distinct couples (sentence, gene) and (sentence, disease) of the two datasets, each with the position of its
+    first row, kept sorted by sentence. They're what is needed to pair the rows appended to the datasets without
+    joining again all the rows: the couples of the new rows are paired only with the couples of the same sentences,
+    which are found with a binary search on the sentences (see "appended()").
+
+    Every couple is kept as three arrays, sorted by the first one: the key of the sentence (see "sentence_key()"),
+    the code of the geneid or of the diseaseid (see "_extend_factorize()") and the position of the row.
+    """
+
+    def __init__(self, genes, diseases):
+        """
+        :param genes: the gene dataset, with the columns 'pmid', 'nsentence' and 'geneid'
+        :type genes: pandas.DataFrame
+        :param diseases: the disease dataset, with the columns 'pmid', 'nsentence' and 'diseaseid'
+        :type diseases: pandas.DataFrame
+        """
+        empty = (np.empty(0, dtype=np.int64), _NO_ROWS, _NO_ROWS)
+        self.__genes, self.__diseases = empty, empty
+        self.__geneIds, self.__diseaseIds = np.empty(0, dtype=object), np.empty(0, dtype=object)
+        self.__add(genes, diseases, 0, 0)
+
+    def appended(self, genes, diseases, gene_offset, disease_offset):
+        """
+        The function returns new SentencePairs with also the rows appended to the datasets, and the couples
+        gene-disease found in the same sentence which contain at least one of the new rows.
+        With the couples returned by "pair_gene_disease_rows()" for the rows before, they are the same couples it
+        returns for all the rows.
+
+        :param genes: the rows appended to the gene dataset
+        :type genes: pandas.DataFrame
+        :param diseases: the rows appended to the disease dataset
+        :type diseases: pandas.DataFrame
+        :param gene_offset: the position of the first new row in the gene dataset
+        :type gene_offset: int
+        :param disease_offset: the position of the first new row in the disease dataset
+        :type disease_offset: int
+        :return: the new SentencePairs, and the position in the gene dataset and the position in the disease dataset
+            of the rows of every new couple
+        :rtype: tuple(SentencePairs, tuple(numpy.ndarray, numpy.ndarray))
+        """
+        pairs = copy.copy(self)
+        return pairs, pairs.__add(genes, diseases, gene_offset, disease_offset)
+
+    @staticmethod
+    def __new_couples(couples, uniques, table, column, offset):
+        """
+        Returns the couples of the rows of "table" which are not among "couples", each with its first row, and
+        the values of all the codes of the ids
+        """
+        keys = sentence_key(table['pmid'], table['nsentence'])
+        codes, uniques = _extend_factorize(table[column], uniques)
+
+        # The first row of every couple among the new rows. The missing ids are considered all equal, as they
+        # have all the code -1
+        first = ~pd.DataFrame({'key': keys, 'code': codes}).duplicated().to_numpy()
+        keys, codes, rows = keys[first], codes[first], np.flatnonzero(first) + offset
+
+        # The couples already found before
+        new, positions = _match(couples[0], keys)
+        found = np.zeros(len(keys), dtype=bool)
+        found[new[couples[1][positions] == codes[new]]] = True
+
+        return (keys[~found], codes[~found], rows[~found]), uniques
+
+    @staticmethod
+    def __insert(couples, new):
+        """Returns the couples with the new ones, sorted by sentence"""
+        order = np.argsort(new[0], kind='stable')
+        positions = np.searchsorted(couples[0], new[0][order], side='right')
+        return tuple(np.insert(array, positions, added[order]) for array, added in zip(couples, new))
+
+    def __add(self, genes, diseases, gene_offset, disease_offset):
+        """
+        Adds the couples of the new rows and returns the new couples gene-disease.
+
+        Steps:
+        1) Finding the couples (sentence, geneid) and (sentence, diseaseid) not found before, see "__new_couples()"
+        2) Pairing the new diseases with the genes found before in their sentences, then adding them
+        3) Pairing the new genes with all the diseases of their sentences, then adding them
+        """
+
+        # Step 1)
+        new_genes, self.__geneIds = self.__new_couples(self.__genes, self.__geneIds, genes, 'geneid', gene_offset)
+        new_diseases, self.__diseaseIds = self.__new_couples(self.__diseases, self.__diseaseIds, diseases,
+                                                             'diseaseid', disease_offset)
+
+        # Step 2)
+        new, positions = _match(self.__genes[0], new_diseases[0])
+        gene_rows, disease_rows = [self.__genes[2][positions]], [new_diseases[2][new]]
+        self.__diseases = self.__insert(self.__diseases, new_diseases)
+
+        # Step 3)
+        new, positions = _match(self.__diseases[0], new_genes[0])
+        gene_rows.append(new_genes[2][new])
+        disease_rows.append(self.__diseases[2][positions])
+        self.__genes = self.__insert(self.__genes, new_genes)
+
+        return np.concatenate(gene_rows), np.concatenate(disease_rows)
+
+    def memory(self):
+        """The function returns the memory used by the arrays in bytes"""
+        return sum(array.nbytes for array in self.__genes + self.__diseases + (self.__geneIds, self.__diseaseIds))
+
+    def __len__(self):
+        return len(self.__genes[0]) + len(self.__diseases[0])
+
+
+def count_pairs(rows, cols, n_rows, n_cols, weights=None):
+    """
+    The function counts how many times every couple (row, col) is found. Every couple is packed in an integer and
+    "bincount()" counts them. If the possible couples are too many for an array as long as all of them,
+    the integers are first replaced with a dense id.
+    The couples with a negative code, which stands for a missing value, are not counted.
+
+    :param rows: the first code of every couple, from 0 to n_rows - 1
+    :type rows: numpy.ndarray
+    :param cols: the second code of every couple, from 0 to n_cols - 1
+    :type cols: numpy.ndarray
+    :param weights: how many times every couple counts, e.g. the occurrences already counted, to sum two counts.
+        If None every couple counts once
+    :type weights: numpy.ndarray
+    :return: the first code, the second code and the number of occurrences of every distinct couple
+    :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    observed = (rows >= 0) & (cols >= 0)
+    n_cols = max(n_cols, 1)
+    keys = rows[observed].astype(np.int64) * n_cols + cols[observed]
+    if weights is not None:
+        weights = weights[observed]
+
+    if n_rows * n_cols <= max(len(keys), _MAX_DENSE_PAIRS):
+        # There are few possible couples, thus they're counted directly with an array as long as all of them
+        occurrences = np.bincount(keys, weights, minlength=n_rows * n_cols)
+        keys = np.flatnonzero(occurrences)
+        occurrences = occurrences[keys]
+    else:
+        pairs, keys = pd.factorize(keys)
+        occurrences = np.bincount(pairs, weights, minlength=len(keys))
+
+    return keys // n_cols, keys % n_cols, occurrences.astype(np.int64)
+
+
+def count_gene_disease_pairs(genes, diseases, pairs=None):
+    """
+    The function counts in how many sentences every gene symbol is found together with every disease name.
+
+    :param genes: the gene dataset, with the columns 'pmid', 'nsentence', 'geneid' and 'gene_symbol'
+    :type genes: pandas.DataFrame
+    :param diseases: the disease dataset, with the columns 'pmid', 'nsentence', 'diseaseid' and 'disease_name'
+    :type diseases: pandas.DataFrame
+    :param pairs: the couples returned by "pair_gene_disease_rows()". If None they're computed
+    :type pairs: tuple(numpy.ndarray, numpy.ndarray)
+    :return: the code of the gene, the code of the disease and the occurrences of every couple, and the labels of
+        the codes of genes and diseases
+    :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    if pairs is None:
+        pairs = pair_gene_disease_rows(genes, diseases)
+    gene_rows, disease_rows = pairs
+
+    # The genes and diseases without a name are not counted, as "groupby()" does with the missing values
+    gene_names, gene_labels = pd.factorize(genes['gene_symbol'])
+    disease_names, disease_labels = pd.factorize(diseases['disease_name'])
+
+    return (*count_pairs(gene_names[gene_rows], disease_names[disease_rows], len(gene_labels), len(disease_labels)),
+            np.asarray(gene_labels, dtype=object), np.asarray(disease_labels, dtype=object))
+
+
+class CorrelationTable:
+    """
+    The correlations between genes and diseases, sorted by the highest number of occurrences, kept as numpy arrays.
+
+    It's computed once from the couples counted by "count_gene_disease_pairs()", then the correlations with at least
+    a number of occurrences are found with a binary search on the sorted occurrences, and the top N are a slice
+    of the arrays.
+    The genes and the diseases are kept as integer codes of their labels, which are converted to text only for
+    the rows returned.
+    """
+
+    def __init__(self, genes, diseases, occurrences, gene_labels, disease_labels):
+        """
+        Steps:
+        1) Sorting the couples by the highest number of occurrences. The couples with the same number of occurrences
+            are sorted by gene and disease, so that the order is always the same
+        2) Computing the cumulative histogram of the occurrences: the number of couples with at least k occurrences
+            for every k
+
+        :param genes: the code of the gene of every couple gene-disease, see "count_gene_disease_pairs()"
+        :type genes: numpy.ndarray
+        :param diseases: the code of the disease of every couple
+        :type diseases: numpy.ndarray
+        :param occurrences: the number of occurrences of every couple
+        :type occurrences: numpy.ndarray
+        :param gene_labels: the gene symbol of every code
+        :type gene_labels: numpy.ndarray
+        :param disease_labels: the disease name of every code
+        :type disease_labels: numpy.ndarray
+        """
+
+        self.__geneLabels = np.asarray(gene_labels, dtype=object)
+        self.__diseaseLabels = np.asarray(disease_labels, dtype=object)
+
+        # Step 1)
+        # The position of every label in alphabetical order, as the labels may not be sorted
+        gene_rank = np.argsort(np.argsort(self.__geneLabels.astype(str), kind='stable'))
+        disease_rank = np.argsort(np.argsort(self.__diseaseLabels.astype(str), kind='stable'))
+        order = np.lexsort((disease_rank[diseases], gene_rank[genes], -occurrences))
+
+        self.__genes = genes[order]
+        self.__diseases = diseases[order]
+        self.__occurrences = occurrences[order]
+
+        # Ascending, to find the number of couples with at least k occurrences with a binary search
+        self.__negOccurrences = -self.__occurrences
+
+        # Step 2)
+        # __atLeast[k] is the number of couples with at least k occurrences
+        self.__atLeast = np.cumsum(np.bincount(self.__occurrences)[::-1])[::-1]
+
+    def appended(self, genes, diseases, gene_offset, disease_offset, pairs):
+        """
+        The function returns the correlations with also the couples gene-disease of the rows appended to the datasets.
+        Only the new couples are counted, then their occurrences are added to the ones of this table: the result is
+        the same as counting all the couples again.
+
+        :param genes: the whole gene dataset, whose first rows are the ones of this table
+        :type genes: pandas.DataFrame
+        :param diseases: the whole disease dataset, whose first rows are the ones of this table
+        :type diseases: pandas.DataFrame
+        :param gene_offset: the position of the first new row in the gene dataset
+        :type gene_offset: int
+        :param disease_offset: the position of the first new row in the disease dataset
+        :type disease_offset: int
+        :param pairs: the new couples returned by "SentencePairs.appended()"
+        :type pairs: tuple(numpy.ndarray, numpy.ndarray)
+        :rtype: CorrelationTable
+        """
+        gene_rows, disease_rows = pairs
+
+        # The labels found in the new rows receive the codes after the others, as "count_gene_disease_pairs()" does
+        _, gene_labels = _extend_factorize(genes['gene_symbol'].iloc[gene_offset:], self.__geneLabels)
+        _, disease_labels = _extend_factorize(diseases['disease_name'].iloc[disease_offset:], self.__diseaseLabels)
+        gene_names = pd.Index(gene_labels).get_indexer(genes['gene_symbol'].iloc[gene_rows].to_numpy(dtype=object))
+        disease_names = pd.Index(disease_labels).get_indexer(
+            diseases['disease_name'].iloc[disease_rows].to_numpy(dtype=object))
+
+        added = count_pairs(gene_names, disease_names, len(gene_labels), len(disease_labels))
+        counts = count_pairs(np.concatenate((self.__genes, added[0])), np.concatenate((self.__diseases, added[1])),
+                             len(gene_labels), len(disease_labels),
+                             np.concatenate((self.__occurrences, added[2])))
+        return CorrelationTable(*counts, gene_labels, disease_labels)
+
+    def count_at_least(self, min_occurrences):
+        """
+        The function returns the number of correlations with at least min_occurrences occurrences, which are the
+        first ones as they're sorted. It's a binary search on the occurrences.
+
+        :param min_occurrences: the minimum number of occurrences
+        :type min_occurrences: int
+        :rtype: int
+        """
+        return int(np.searchsorted(self.__negOccurrences, -min_occurrences, side='right'))
+
+    def histogram(self, thresholds):
+        """
+        The function returns the number of correlations with at least k occurrences for every k in thresholds,
+        read from the cumulative histogram of the occurrences.
+
+        :param thresholds: the numbers of occurrences
+        :type thresholds: list
+        :return: list of tuples (k, number of correlations with at least k occurrences)
+        :rtype: list
+        """
+        return [(k, int(self.__atLeast[max(k, 0)]) if k < len(self.__atLeast) else 0) for k in thresholds]
+
+    def max_occurrences(self):
+        """The function returns the highest number of occurrences of a correlation"""
+        return int(self.__occurrences[0]) if len(self.__occurrences) else 0
+
+    def frame(self, start=0, end=None):
+        """
+        The function returns the correlations from index start to index end as a dataframe with the labels
+        ['gene_symbol', 'disease_name', 'occurrences']
+
+        :rtype: pandas.DataFrame
+        """
+        genes = self.__genes[start:end]
+        diseases = self.__diseases[start:end]
+
+        return pd.DataFrame({'gene_symbol': self.__geneLabels[genes],
+                             'disease_name': self.__diseaseLabels[diseases],
+                             'occurrences': self.__occurrences[start:end]})
+
+    def memory(self):
+        """The function returns the memory used by the arrays in bytes"""
+        arrays = (self.__genes, self.__diseases, self.__occurrences, self.__negOccurrences, self.__atLeast,
+                  self.__geneLabels, self.__diseaseLabels)
+        return sum(array.nbytes for array in arrays)
+
+    def __len__(self):
+        return len(self.__occurrences)
+
+
+def _compress(rows, cols, weights, n_rows, col_rank):
+    """
+    The function stores a sparse matrix in compressed rows: the non-zero values of row i are
+    indices[indptr[i]:indptr[i + 1]] (their column) and data[indptr[i]:indptr[i + 1]] (their value).
+    The values of every row are sorted by the highest value, then by the rank of their column.
+
+    :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+    """
+    order = np.lexsort((col_rank[cols], -weights, rows))
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n_rows))))
+    return indptr, cols[order], weights[order]
+
+
+class CooccurrenceMatrix:
+    """
+    The sparse matrix gene x disease with the number of sentences in which every gene is found together with
+    every disease. It's stored twice, by rows (one row per gene, CSR) and by columns (one column per disease, CSC),
+    as numpy arrays.
+
+    The diseases related to a gene are a slice of its row, already sorted by the highest number of sentences,
+    and the genes related to a disease a slice of its column. The genes most similar to a gene, which share with it
+    the most diseases, are computed with the product between the matrix and the row of the gene, and the same
+    for the diseases.
+    """
+
+    # The measures of similarity accepted by "similar_genes()" and "similar_diseases()"
+    METRICS = ('cosine', 'jaccard')
+
+    def __init__(self, genes, diseases, pairs=None):
+        """
+        Steps:
+        1) Replacing geneid and diseaseid with integer codes, and taking the gene symbol and the disease name of
+            every code. Every word of the diseases is capitalized to allow the sorting algorithm to sort them
+            correctly instead of putting the lowercase at the end.
+        2) Counting the sentences of every couple gene-disease, see "count_pairs()"
+        3) Storing the matrix by rows and by columns, see "_compress()"
+        4) Computing the norm and the number of non-zero values of every row and column, used by the similarities
+
+        :param genes: the gene dataset, with the columns 'pmid', 'nsentence', 'geneid' and 'gene_symbol'
+        :type genes: pandas.DataFrame
+        :param diseases: the disease dataset, with the columns 'pmid', 'nsentence', 'diseaseid' and 'disease_name'
+        :type diseases: pandas.DataFrame
+        :param pairs: the couples returned by "pair_gene_disease_rows()". If None they're computed
+        :type pairs: tuple(numpy.ndarray, numpy.ndarray)
+        """
+        if pairs is None:
+            pairs = pair_gene_disease_rows(genes, diseases)
+        gene_rows, disease_rows = pairs
+
+        # Step 1)
+        # The codes are the ones of the resolvers, which also find the codes of the genes and diseases given as input
+        gene_resolver = Resolver(genes['geneid'], genes['gene_symbol'])
+        disease_resolver = Resolver(diseases['diseaseid'], diseases['disease_name'])
+
+        # Step 2)
+        counts = count_pairs(gene_resolver.codes[gene_rows], disease_resolver.codes[disease_rows],
+                             len(gene_resolver), len(disease_resolver))
+        self.__build(gene_resolver, disease_resolver, *counts)
+
+    def __build(self, gene_resolver, disease_resolver, genes, diseases, weights):
+        """Builds the matrix from the couples counted, see steps 1), 3) and 4) of "__init__()" """
+        self.__geneResolver = gene_resolver
+        self.__diseaseResolver = disease_resolver
+        n_genes, n_diseases = len(self.__geneResolver), len(self.__diseaseResolver)
+
+        self.__geneIds = self.__geneResolver.ids
+        self.__diseaseIds = self.__diseaseResolver.ids
+        self.__geneLabels = self.__geneResolver.names
+        self.__diseaseLabels = pd.Series(self.__diseaseResolver.names, dtype=object).str.title()
+        self.__diseaseLabels = self.__diseaseLabels.to_numpy(dtype=object)
+
+        # Step 3)
+        self.__geneRank = np.argsort(np.argsort(self.__geneLabels.astype(str), kind='stable'))
+        self.__diseaseRank = np.argsort(np.argsort(self.__diseaseLabels.astype(str), kind='stable'))
+        self.__byGene = _compress(genes, diseases, weights, n_genes, self.__diseaseRank)
+        self.__byDisease = _compress(diseases, genes, weights, n_diseases, self.__geneRank)
+
+        # Step 4)
+        self.__geneNorms = np.sqrt(np.bincount(genes, weights.astype(np.float64) ** 2, minlength=n_genes))
+        self.__diseaseNorms = np.sqrt(np.bincount(diseases, weights.astype(np.float64) ** 2, minlength=n_diseases))
+        self.__geneDegrees = np.diff(self.__byGene[0])
+        self.__diseaseDegrees = np.diff(self.__byDisease[0])
+
+    def appended(self, genes, diseases, gene_offset, disease_offset, pairs):
+        """
+        The function returns the matrix with also the couples gene-disease of the rows appended to the datasets.
+        The resolvers are extended with the new rows (see "Resolver.appended()"), then only the new couples are
+        counted and added to the values of this matrix: the result is the same as building the matrix again.
+
+        :param genes: the whole gene dataset, whose first rows are the ones of this matrix
+        :type genes: pandas.DataFrame
+        :param diseases: the whole disease dataset, whose first rows are the ones of this matrix
+        :type diseases: pandas.DataFrame
+        :param gene_offset: the position of the first new row in the gene dataset
+        :type gene_offset: int
+        :param disease_offset: the position of the first new row in the disease dataset
+        :type disease_offset: int
+        :param pairs: the new couples returned by "SentencePairs.appended()"
+        :type pairs: tuple(numpy.ndarray, numpy.ndarray)
+        :rtype: CooccurrenceMatrix
+        """
+        gene_rows, disease_rows = pairs
+        gene_resolver = self.__geneResolver.appended(genes['geneid'].iloc[gene_offset:],
+                                                     genes['gene_symbol'].iloc[gene_offset:])
+        disease_resolver = self.__diseaseResolver.appended(diseases['diseaseid'].iloc[disease_offset:],
+                                                           diseases['disease_name'].iloc[disease_offset:])
+        n_genes, n_diseases = len(gene_resolver), len(disease_resolver)
+
+        # The values of this matrix, one row after the other, and the ones of the new couples
+        indptr, indices, data = self.__byGene
+        added = count_pairs(gene_resolver.codes[gene_rows], disease_resolver.codes[disease_rows], n_genes, n_diseases)
+        counts = count_pairs(np.concatenate((np.repeat(np.arange(len(indptr) - 1), np.diff(indptr)), added[0])),
+                             np.concatenate((indices, added[1])), n_genes, n_diseases,
+                             np.concatenate((data, added[2])))
+
+        matrix = object.__new__(CooccurrenceMatrix)
+        matrix.__build(gene_resolver, disease_resolver, *counts)
+        return matrix
+
+    def gene_codes(self, gene):
+        """
+        The function returns the codes of a gene given as geneid or as gene symbol, in any case.
+        A gene symbol can have more than one geneid. See "Resolver".
+
+        :param gene: the geneid or the gene symbol
+        :type gene: int or str
+        :rtype: numpy.ndarray
+        """
+        return Resolver.codes_of(self.__geneResolver.resolve(gene))
+
+    def disease_codes(self, disease):
+        """
+        The function returns the codes of a disease given as diseaseid or as disease name, in any case.
+        A disease name can have more than one diseaseid. See "Resolver".
+
+        :param disease: the diseaseid or the disease name
+        :type disease: str
+        :rtype: numpy.ndarray
+        """
+        return Resolver.codes_of(self.__diseaseResolver.resolve(disease))
+
+    @staticmethod
+    def __neighbours(matrix, codes, rank):
+        """
+        Returns the non-zero values of the rows "codes" of the compressed matrix, summed when the rows are many,
+        sorted by the highest value and then by the rank of their column.
+
+        :return: the columns and the values
+        :rtype: tuple(numpy.ndarray, numpy.ndarray)
+        """
+        indptr, indices, data = matrix
+        if len(codes) == 1:
+            # The row is already sorted
+            return indices[indptr[codes[0]]:indptr[codes[0] + 1]], data[indptr[codes[0]]:indptr[codes[0] + 1]]
+
+        positions = _ranges(indptr[codes], indptr[codes + 1] - indptr[codes])
+        weights = np.bincount(indices[positions], data[positions], minlength=len(rank))
+        cols = np.flatnonzero(weights)
+        weights = weights[cols].astype(np.int64)
+
+        order = np.lexsort((rank[cols], -weights))
+        return cols[order], weights[order]
+
+    @staticmethod
+    def __similar(rows, columns, codes, row_norms, row_degrees, column_rank, metric):
+        """
+        Returns the rows most similar to the rows "codes", by the columns they share.
+
+        The product between the matrix and the row (the sum of the rows if they're many) is computed by taking the
+        columns of its non-zero values and summing their values, multiplied by the value of the row, in the rows
+        where they're found.
+
+        "cosine" is the product divided by the norms of the two rows. "jaccard" ignores the values: it's the number
+        of columns shared divided by the number of columns of at least one of the two rows.
+
+        :return: the rows, their similarity and the number of columns shared, sorted by the highest similarity
+        :rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+        """
+        cols, weights = CooccurrenceMatrix.__neighbours(rows, codes, np.zeros(len(columns[0]) - 1, dtype=np.int64))
+        indptr, indices, data = columns
+
+        lengths = indptr[cols + 1] - indptr[cols]
+        positions = _ranges(indptr[cols], lengths)
+        n_rows = len(row_norms)
+
+        shared = np.bincount(indices[positions], minlength=n_rows)
+        if metric == 'cosine':
+            product = np.bincount(indices[positions], data[positions] * np.repeat(weights, lengths).astype(np.float64),
+                                  minlength=n_rows)
+            norms = row_norms * np.sqrt(np.sum(weights.astype(np.float64) ** 2))
+            similarity = np.divide(product, norms, out=np.zeros(n_rows), where=norms > 0)
+        else:
+            union = row_degrees + len(cols) - shared
+            similarity = np.divide(shared, union, out=np.zeros(n_rows), where=union > 0)
+
+        # The rows given are not similar to themselves
+        shared[codes] = 0
+        found = np.flatnonzero(shared)
+        order = np.lexsort((column_rank[found], -similarity[found]))
+        found = found[order]
+        return found, similarity[found], shared[found]
+
+    def __check_metric(self, metric):
+        if metric not in self.METRICS:
+            raise ValueError(f"metric must be one of {self.METRICS}, not '{metric}'")
+
+    def diseases_related_to_gene(self, gene):
+        """
+        The function returns the diseases found in the same sentences of the gene, sorted by the highest
+        number of sentences.
+
+        :param gene: the geneid or the gene symbol
+        :type gene: int or str
+        :return: dataframe with the labels ['disease_name', 'diseaseid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        diseases, weights = self.__neighbours(self.__byGene, self.gene_codes(gene), self.__diseaseRank)
+        return pd.DataFrame({'disease_name': self.__diseaseLabels[diseases],
+                             'diseaseid': self.__diseaseIds[diseases],
+                             'occurrences': weights})
+
+    def genes_related_to_disease(self, disease):
+        """
+        The function returns the genes found in the same sentences of the disease, sorted by the highest
+        number of sentences.
+
+        :param disease: the diseaseid or the disease name
+        :type disease: str
+        :return: dataframe with the labels ['gene_symbol', 'geneid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        genes, weights = self.__neighbours(self.__byDisease, self.disease_codes(disease), self.__geneRank)
+        return pd.DataFrame({'gene_symbol': self.__geneLabels[genes],
+                             'geneid': self.__geneIds[genes],
+                             'occurrences': weights})
+
+    def __batch_neighbours(self, resolver, values, matrix, rank, labels, ids, columns):
+        """
+        Returns the neighbours (see "__neighbours()") of many rows given by the user, one after the other, with the
+        column 'query' with the value given for every row. The values not found and the ones given more than once are
+        skipped, see "Resolver.resolve_all()".
+        """
+        found = resolver.resolve_all(values)[0]
+        neighbours = [self.__neighbours(matrix, Resolver.codes_of(key), rank) for _, key in found]
+
+        lengths = [len(cols) for cols, _ in neighbours]
+        cols = np.concatenate([cols for cols, _ in neighbours]) if neighbours else _NO_ROWS
+        weights = np.concatenate([weights for _, weights in neighbours]) if neighbours else _NO_ROWS
+
+        return pd.DataFrame({'query': np.repeat(np.array([value for value, _ in found], dtype=object), lengths),
+                             columns[0]: labels[cols],
+                             columns[1]: ids[cols],
+                             'occurrences': weights.astype(np.int64)})
+
+    def diseases_related_to_genes(self, genes):
+        """
+        The function returns the diseases related to every gene, see "diseases_related_to_gene()", one gene after
+        the other.
+
+        :param genes: the geneids or the gene symbols
+        :type genes: list
+        :return: dataframe with the labels ['query', 'disease_name', 'diseaseid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.__batch_neighbours(self.__geneResolver, genes, self.__byGene, self.__diseaseRank,
+                                       self.__diseaseLabels, self.__diseaseIds, ('disease_name', 'diseaseid'))
+
+    def genes_related_to_diseases(self, diseases):
+        """
+        The function returns the genes related to every disease, see "genes_related_to_disease()", one disease after
+        the other.
+
+        :param diseases: the diseaseids or the disease names
+        :type diseases: list
+        :return: dataframe with the labels ['query', 'gene_symbol', 'geneid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.__batch_neighbours(self.__diseaseResolver, diseases, self.__byDisease, self.__geneRank,
+                                       self.__geneLabels, self.__geneIds, ('gene_symbol', 'geneid'))
+
+    def similar_genes(self, gene, metric='cosine'):
+        """
+        The function returns the genes most similar to the gene by the diseases they share.
+
+        :param gene: the geneid or the gene symbol
+        :type gene: int or str
+        :param metric: 'cosine' or 'jaccard', see "__similar()"
+        :type metric: str
+        :return: dataframe with the labels ['gene_symbol', 'geneid', 'similarity', 'shared_diseases']
+        :rtype: pandas.DataFrame
+        """
+        self.__check_metric(metric)
+        genes, similarity, shared = self.__similar(self.__byGene, self.__byDisease, self.gene_codes(gene),
+                                                   self.__geneNorms, self.__geneDegrees, self.__geneRank, metric)
+        return pd.DataFrame({'gene_symbol': self.__geneLabels[genes],
+                             'geneid': self.__geneIds[genes],
+                             'similarity': similarity,
+                             'shared_diseases': shared})
+
+    def similar_diseases(self, disease, metric='cosine'):
+        """
+        The function returns the diseases most similar to the disease by the genes they share.
+
+        :param disease: the diseaseid or the disease name
+        :type disease: str
+        :param metric: 'cosine' or 'jaccard', see "__similar()"
+        :type metric: str
+        :return: dataframe with the labels ['disease_name', 'diseaseid', 'similarity', 'shared_genes']
+        :rtype: pandas.DataFrame
+        """
+        self.__check_metric(metric)
+        diseases, similarity, shared = self.__similar(self.__byDisease, self.__byGene, self.disease_codes(disease),
+                                                      self.__diseaseNorms, self.__diseaseDegrees,
+                                                      self.__diseaseRank, metric)
+        return pd.DataFrame({'disease_name': self.__diseaseLabels[diseases],
+                             'diseaseid': self.__diseaseIds[diseases],
+                             'similarity': similarity,
+                             'shared_genes': shared})
+
+    def memory(self):
+        """The function returns the memory used by the arrays in bytes"""
+        arrays = (*self.__byGene, *self.__byDisease, self.__geneNorms, self.__diseaseNorms, self.__geneDegrees,
+                  self.__diseaseDegrees, self.__geneRank, self.__diseaseRank, self.__diseaseLabels)
+        return sum(array.nbytes for array in arrays) + self.__geneResolver.memory() + self.__diseaseResolver.memory()
+
+    @property
+    def shape(self):
+        """The number of genes and of diseases"""
+        return len(self.__geneIds), len(self.__diseaseIds)
+
+
+class Testing(Analysis):
+    def __init__(self, geneTable, diseaseTable, geneDelimiter=None, diseaseDelimiter=None, store=None):
+        """
+        The function creates the class Testing with the two datasets.
+
+        The datasets can be given as paths, as DataFrames or as instances of GeneTable and DiseaseTable.
+        In the last two cases, or when a store is given, the DataFrames are shared and not read again.
+
+        :param geneTable: the gene dataset
+        :type geneTable: str or pandas.DataFrame or GeneTable
+        :param diseaseTable: the disease dataset
+        :type diseaseTable: str or pandas.DataFrame or DiseaseTable
+        :param geneDelimiter: the delimiter of the gene file. If None it's found based on the extension
+        :type geneDelimiter: str
+        :param diseaseDelimiter: the delimiter of the disease file. If None it's found based on the extension
+        :type diseaseDelimiter: str
+        :param store: the store from which the tables are loaded
+        :type store: DatasetStore
+        """
+
+        self.__geneTable = _load_table(geneTable, geneDelimiter, store)
+        self.__diseaseTable = _load_table(diseaseTable, diseaseDelimiter, store)
+
+        # The couples gene-disease found in the same sentence (see "pair_gene_disease_rows()"), the correlations
+        # and the co-occurrence matrix, computed only the first time they're needed
+        self.__pairs = None
+        self.__correlation = None
+        self.__cooccurrence = None
+
+        # The couples (sentence, gene) and (sentence, disease), computed only when rows are appended, see "appended()"
+        self.__sentencePairs = None
+
+    def appended(self, geneTable, diseaseTable):
+        """
+        The function returns a new Testing with the rows appended to the datasets, e.g. the tables returned by
+        "DatasetStore.append()". The new rows are paired only with the rows of the same sentences (see
+        "SentencePairs"), then the new couples are added to the correlations and to the co-occurrence matrix,
+        if they have been computed, instead of counting all the couples again. The result is the same as the
+        Testing of the whole datasets.
+        This instance is not modified, thus it can still be used while the new one is built.
+
+        :param geneTable: the whole gene dataset, whose first rows are the ones of this instance
+        :type geneTable: pandas.DataFrame or GeneTable
+        :param diseaseTable: the whole disease dataset, whose first rows are the ones of this instance
+        :type diseaseTable: pandas.DataFrame or DiseaseTable
+        :rtype: Testing
+        """
+        start = time.perf_counter()
+        genes, diseases = _load_table(geneTable), _load_table(diseaseTable)
+        gene_offset, disease_offset = len(self.__geneTable), len(self.__diseaseTable)
+
+        if self.__sentencePairs is None:
+            self.__sentencePairs = SentencePairs(self.__geneTable, self.__diseaseTable)
+
+        testing = Testing(genes, diseases)
+        testing.__sentencePairs, pairs = self.__sentencePairs.appended(
+            genes.iloc[gene_offset:], diseases.iloc[disease_offset:], gene_offset, disease_offset)
+
+        if self.__correlation is not None:
+            testing.__correlation = self.__correlation.appended(genes, diseases, gene_offset, disease_offset, pairs)
+        if self.__cooccurrence is not None:
+            testing.__cooccurrence = self.__cooccurrence.appended(genes, diseases, gene_offset, disease_offset, pairs)
+
+        logger.info("Testing: %d new couples gene-disease added in %.1f ms", len(pairs[0]),
+                    (time.perf_counter() - start) * 1000)
+        return testing
+
+    def __get_pairs(self):
+        """The couples gene-disease found in the same sentence, see pair_gene_disease_rows()"""
+        if self.__pairs is None:
+            self.__pairs = pair_gene_disease_rows(self.__geneTable, self.__diseaseTable)
+        return self.__pairs
+
+    def get_cooccurrence(self):
+        """
+        The function returns the co-occurrence matrix gene x disease, see "CooccurrenceMatrix".
+        It's computed only the first time it's called and then it's reused.
+
+        :rtype: CooccurrenceMatrix
+        """
+
+        if self.__cooccurrence is None:
+            start = time.perf_counter()
+
+            self.__cooccurrence = CooccurrenceMatrix(self.__geneTable, self.__diseaseTable, self.__get_pairs())
+
+            logger.info("Testing: co-occurrence matrix of %d genes x %d diseases computed in %.1f ms, %.1f KiB",
+                        *self.__cooccurrence.shape, (time.perf_counter() - start) * 1000,
+                        self.__cooccurrence.memory() / 1024)
+
+        return self.__cooccurrence
+
+    def get_correlation(self):
+        """
+        The function returns the correlations between genes and diseases as a CorrelationTable.
+        It's computed only the first time it's called and then it's reused.
+
+        :rtype: CorrelationTable
+        """
+
+        if self.__correlation is None:
+            start = time.perf_counter()
+
+            self.__correlation = CorrelationTable(*count_gene_disease_pairs(self.__geneTable, self.__diseaseTable,
+                                                                            self.__get_pairs()))
+
+            logger.info("Testing: %d correlations computed in %.1f ms, %.1f KiB", len(self.__correlation),
+                        (time.perf_counter() - start) * 1000, self.__correlation.memory() / 1024)
+
+        return self.__correlation
+
+    def correlation_gene_disease(self):
+        """
+        The function returns a dataframe with the correlation between genes and diseases sorted by the most frequent,
+        with the labels ['gene_symbol', 'disease_name', 'occurrences']. See "get_correlation()".
+
+        :returns: a DataFrame containing the correlations between genes and diseases and their count
+        :rtype: pandas.DataFrame
+        """
+        return self.get_correlation().frame()
+
+    def find_diseases_related_to_gene(self, gene):
+        """
+        The function receive as input a geneID or a gene symbol and then returns a dataframe with the
+        diseases related to the gene, sorted by the highest number of sentences in which they're found together.
+
+        It's the row of the gene in the co-occurrence matrix, see "get_cooccurrence()". The diseases
+        are returned with every word capitalized.
+
+        :param gene: the geneid or gene_symbol input, in any case
+        :type gene: str or int
+        :returns: a dataframe with the labels ['disease_name', 'diseaseid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().diseases_related_to_gene(gene)
+
+    def find_genes_related_to_disease(self, disease):
+        """
+        The function receive as input a diseaseid or a disease_name and then returns a dataframe with the
+        genes related to the disease, sorted by the highest number of sentences in which they're found together.
+
+        It's the column of the disease in the co-occurrence matrix, see "get_cooccurrence()".
+
+        :param disease: the diseaseid or disease_name input, in any case
+        :type disease: str
+        :returns: a dataframe with the labels ['gene_symbol', 'geneid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().genes_related_to_disease(disease)
+
+    def find_diseases_related_to_genes(self, genes):
+        """
+        The function receive as input many geneIDs or gene symbols and returns a dataframe with the diseases related
+        to each of them, see "find_diseases_related_to_gene()", one gene after the other. The column 'query' has the
+        gene as given in "genes". The genes not found and the ones given more than once are skipped.
+
+        :param genes: the geneids or gene_symbols input, in any case
+        :type genes: list
+        :returns: a dataframe with the labels ['query', 'disease_name', 'diseaseid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().diseases_related_to_genes(genes)
+
+    def find_genes_related_to_diseases(self, diseases):
+        """
+        The function receive as input many diseaseids or disease names and returns a dataframe with the genes related
+        to each of them, see "find_genes_related_to_disease()", one disease after the other. The column 'query' has
+        the disease as given in "diseases". The diseases not found and the ones given more than once are skipped.
+
+        :param diseases: the diseaseids or disease_names input, in any case
+        :type diseases: list
+        :returns: a dataframe with the labels ['query', 'gene_symbol', 'geneid', 'occurrences']
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().genes_related_to_diseases(diseases)
+
+    def find_similar_genes(self, gene, metric='cosine'):
+        """
+        The function receive as input a geneID or a gene symbol and returns a dataframe with the genes which
+        share with it the most diseases, see "CooccurrenceMatrix.similar_genes()".
+
+        :param gene: the geneid or gene_symbol input
+        :type gene: str or int
+        :param metric: 'cosine' or 'jaccard'
+        :type metric: str
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().similar_genes(gene, metric)
+
+    def find_similar_diseases(self, disease, metric='cosine'):
+        """
+        The function receive as input a diseaseid or a disease_name and returns a dataframe with the diseases
+        which share with it the most genes, see "CooccurrenceMatrix.similar_diseases()".
+
+        :param disease: the diseaseid or disease_name input
+        :type disease: str
+        :param metric: 'cosine' or 'jaccard'
+        :type metric: str
+        :rtype: pandas.DataFrame
+        """
+        return self.get_cooccurrence().similar_diseases(disease, metric)
 
 
 if __name__ == '__main__':
     # test
-    gene = GeneTable('./datasets/gene_evidences.tsv')
-    disease = DiseaseTable('./datasets/disease_evidences.tsv')
-    test = Testing('./datasets/disease_evidences.tsv', './datasets/gene_evidences.tsv')
+    store = DatasetStore()
+    gene = GeneTable('./datasets/gene_evidences.tsv', store=store)
+    disease = DiseaseTable('./datasets/disease_evidences.tsv', store=store)
+    test = Testing(gene, disease)
 
     # GeneTable
     # print(gene.get_dimensions())
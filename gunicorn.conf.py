@@ -0,0 +1,49 @@
+"""
+Settings of gunicorn, the production server of the website. It's read automatically when gunicorn is started from
+the folder of the project:
+
+    gunicorn wsgi:app
+
+The application is loaded by the main process before it forks the workers, so the datasets are read only once and
+the workers share their memory copy-on-write: a page of memory is copied in a worker only when the worker writes it.
+"""
+
+import os
+import gc
+from settings import SERVER_WORKERS, SERVER_THREADS, SERVER_BIND, SERVER_TIMEOUT, RELOAD_WATCH_INTERVAL
+
+bind = f"0.0.0.0:{os.environ['PORT']}" if 'PORT' in os.environ else SERVER_BIND
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+timeout = SERVER_TIMEOUT
+
+# Load wsgi.py, thus the datasets, in the main process before forking the workers
+preload_app = True
+
+accesslog = '-'
+
+
+def pre_fork(server, worker):
+    """
+    Called in the main process before every worker is forked.
+
+    The garbage collector writes in the header of every object it visits, thus its first collection in a worker would
+    copy most of the memory of the datasets. "gc.freeze()" moves the objects that already exist out of its reach,
+    so that they stay shared.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """
+    Called in every worker after it's forked.
+
+    The threads are not copied in a forked process, thus every worker starts its own thread which reloads the datasets
+    when they change (see RELOAD_WATCH_INTERVAL). A reload requested with "/api/v1/admin/reload" reloads only the
+    worker which answers the request: with more than one worker use RELOAD_WATCH_INTERVAL.
+    """
+    if RELOAD_WATCH_INTERVAL > 0:
+        import mediator
+
+        mediator.watch(RELOAD_WATCH_INTERVAL)
@@ -1,7 +1,13 @@
-import website
 import os
+import logging
 from pathlib import Path
 
+# The datasets are loaded when "website" is imported, thus logging is configured before it to show the
+# information about the loading of the datasets
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
+
+import website
+
 if __name__ == '__main__':
     os.chdir(Path(__file__).parent)
     website.run()
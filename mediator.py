@@ -1,8 +1,12 @@
 from functions import *
 from settings import *
+import numpy as np
 import pandas as pd
 import os
 import json
+import time
+import logging
+import threading
 
 # Compute the path to the databases and the documentation
 GENE_TABLE_PATH = os.path.join(os.getcwd(), GENE_TABLE_PATH)
@@ -10,51 +14,305 @@ DISEASE_TABLE_PATH = os.path.join(os.getcwd(), DISEASE_TABLE_PATH)
 DOCS_PATH = os.path.join(os.getcwd(), DOCS_PATH)
 
 
-# Instantiate the classes from functions.py
-geneTable = GeneTable(GENE_TABLE_PATH)
-diseaseTable = DiseaseTable(DISEASE_TABLE_PATH)
-test = Testing(GENE_TABLE_PATH, DISEASE_TABLE_PATH)
+# The results of the operations, kept so that the following pages of the same result and the same requests written
+# in a different way (e.g. a gene written with its geneid or its symbol) are not computed again
+memo = ResultCache(MEMO_MAX_BYTES)
+
+logger = logging.getLogger(__name__)
+
+
+class Datasets:
+    """
+    One version of the datasets: the classes of functions.py built from them and what the operations precompute.
+
+    When the datasets are reloaded (see "reload()") a new instance is built in the background and then it replaces
+    the previous one with a single assignment. The functions of this module take the version to use with
+    "current()", thus the requests which have pinned the previous version (see "pin()") keep using it until they end.
+    """
+
+    def __init__(self, version, previous=None):
+        """
+        Steps:
+        1) Instantiate the classes from functions.py. The datasets are loaded through the store, so each file is read
+            only once and the same DataFrames are shared between the three classes.
+            If the files of the previous version have only grown and RELOAD_INCREMENTAL is True, only the rows appended
+            are read and added to the classes of the previous version, see "__append()"
+        2) Compute what the operations use (correlations, co-occurrence matrix, distinct genes and diseases, the
+            information about the datasets, ...), so that the first requests after a reload don't wait for it
+
+        :param version: the number of the version, increased at every reload
+        :type version: int
+        :param previous: the version of the datasets in use, which is not modified
+        :type previous: Datasets
+        """
+        start = time.perf_counter()
+        self.version = version
+
+        # Step 1)
+        self.appended = previous is not None and RELOAD_INCREMENTAL and self.__append(previous)
+        if not self.appended:
+            self.store = DatasetStore(snapshots=SNAPSHOT_ENABLED, validation=SNAPSHOT_VALIDATION,
+                                      schema=DATASET_SCHEMA)
+            self.geneTable = GeneTable(GENE_TABLE_PATH, store=self.store, tags=EVIDENCE_TAGS)
+            self.diseaseTable = DiseaseTable(DISEASE_TABLE_PATH, store=self.store, tags=EVIDENCE_TAGS)
+            self.test = Testing(GENE_TABLE_PATH, DISEASE_TABLE_PATH, store=self.store)
+
+        # Identifies the content of the datasets in every process, unlike the version which is counted by each process
+        self.fingerprint = self.store.fingerprint(GENE_TABLE_PATH, DISEASE_TABLE_PATH)
+        self.modifiedAt = self.store.modified(GENE_TABLE_PATH, DISEASE_TABLE_PATH)
+
+        # The inverted index of the sentences of both datasets, used by the search
+        self.searchIndex = self.store.search_index()
+
+        # Step 2)
+        self.test.get_correlation()
+        self.test.get_cooccurrence()
+        for table in (self.geneTable, self.diseaseTable):
+            table.distinct()
+            table.prefix_index(EVIDENCE_TAG)
+        self.info = {'genes': _info(self.geneTable), 'diseases': _info(self.diseaseTable)}
+
+        self.loadTime = time.perf_counter() - start
+        self.loadedAt = time.time()
+
+    def __append(self, previous):
+        """
+        Builds the classes of this version from the ones of the previous version and the rows appended to the
+        datasets (see "DatasetStore.append()"), which gives the same result as loading the datasets again.
+        The previous version is not modified, as the requests may be still using it.
+
+        :return: False if the datasets have not only grown since the previous version, thus they must be loaded again
+        :rtype: bool
+        """
+        paths = (GENE_TABLE_PATH, DISEASE_TABLE_PATH)
+        if any(previous.store.changes(path) == 'modified' for path in paths):
+            return False
+
+        store = previous.store.copy()
+        try:
+            genes, diseases = (store.append(path) for path in paths)
+        except ValueError as err:
+            logger.info("The rows can't be appended, the datasets are loaded again: %s", err)
+            return False
+
+        self.store = store
+        self.geneTable = previous.geneTable.appended(genes)
+        self.diseaseTable = previous.diseaseTable.appended(diseases)
+        self.test = previous.test.appended(genes, diseases)
+        return True
+
+    def memo(self, key, compute, *args):
+        """
+        Returns compute(*args) from the cache of the results "memo", see "ResultCache.get()". The version is added
+        to the key, thus the results of different versions of the datasets are never mixed.
+
+        :param key: the key of the result, without the version
+        :type key: tuple
+        """
+        return memo.get((self.version,) + key, compute, *args)
+
+
+def _info(table):
+    """
+    Returns the information about a dataset shown by "/info": its dimensions, its labels, its first and last rows
+
+    :param table: the dataset
+    :type table: GeneTable or DiseaseTable
+    :rtype: dict
+    """
+    nrows, ncols = table.get_dimensions()
+    return {'nrows': nrows,
+            'ncols': ncols,
+            'labels': table.get_labels(),
+            'head': table.get_head().values.tolist(),
+            'tail': table.get_tail().values.tolist()}
+
+
+_datasets = Datasets(1)
+
+# The classes of the last version of the datasets. The functions of this module use "current()" instead
+store, geneTable, diseaseTable, test = _datasets.store, _datasets.geneTable, _datasets.diseaseTable, _datasets.test
+searchIndex = _datasets.searchIndex
+
+# The version pinned by the request handled by every thread, see "pin()"
+_pinned = threading.local()
+
+# Held while a new version is built, so that only one reload runs at a time
+_reloadLock = threading.Lock()
+_reloadError = None
+
+
+def current():
+    """
+    Returns the version of the datasets pinned by the request handled by this thread, or the last version if none
+    is pinned
+
+    :rtype: Datasets
+    """
+    datasets = getattr(_pinned, 'datasets', None)
+    return datasets if datasets is not None else _datasets
+
+
+def pin():
+    """Pins the last version of the datasets to the current thread, so that all the operations of a request use
+    the same version even if the datasets are reloaded meanwhile. It's undone by "unpin()"."""
+    _pinned.datasets = _datasets
+
+
+def unpin():
+    """Removes the version pinned by "pin()" """
+    _pinned.datasets = None
+
+
+def reload(wait=False):
+    """
+    Reloads the datasets in the background: a new version is built (see "Datasets") while the requests keep using
+    the previous one, then it replaces it at once. If it fails the previous version is kept.
+
+    :param wait: if True it returns after the new version has replaced the previous one
+    :type wait: bool
+    :return: False if a reload was already running, thus a new one was not started
+    :rtype: bool
+    """
+    if not _reloadLock.acquire(blocking=False):
+        return False
+
+    thread = threading.Thread(target=_reload, name='datasets-reload', daemon=True)
+    thread.start()
+    if wait:
+        thread.join()
+    return True
+
+
+def _reload():
+    """Builds the new version of the datasets and swaps it with the previous one. It must hold "_reloadLock"."""
+    global _datasets, _reloadError, store, geneTable, diseaseTable, test, searchIndex
+
+    try:
+        datasets = Datasets(_datasets.version + 1, previous=_datasets)
+    except Exception as err:
+        logger.exception("Could not reload the datasets, the version %d is kept", _datasets.version)
+        _reloadError = f"{type(err).__name__}: {err}"
+    else:
+        # The swap is a single assignment: a request sees either the previous version or the new one
+        _datasets = datasets
+        store, geneTable, diseaseTable, test = datasets.store, datasets.geneTable, datasets.diseaseTable, datasets.test
+        searchIndex = datasets.searchIndex
+        _reloadError = None
+
+        # The results of the previous versions are not requested anymore
+        memo.clear()
+        logger.info("Datasets %s in %.1f s, version %d", 'appended' if datasets.appended else 'reloaded',
+                    datasets.loadTime, datasets.version)
+    finally:
+        _reloadLock.release()
+
+
+def _files_signature():
+    """Returns the size and the modification time of the two datasets"""
+    return tuple((stat.st_size, stat.st_mtime_ns) for stat in map(os.stat, (GENE_TABLE_PATH, DISEASE_TABLE_PATH)))
+
+
+def watch(interval):
+    """
+    Starts a thread which checks every "interval" seconds if the datasets have changed, and if they have it reloads
+    them. A change is reloaded only when the files have not changed for a whole interval, so that a file which is
+    still being written is not read.
+
+    It's started by "website.run()" and, in production, by every worker after it's forked (see gunicorn.conf.py):
+    a thread is not copied in the processes forked, and each worker reloads its own copy of the datasets.
+
+    :param interval: the seconds between two checks
+    :type interval: float
+    :rtype: threading.Thread
+    """
+
+    def run():
+        loaded = seen = _files_signature()
+        while True:
+            time.sleep(interval)
+            try:
+                signature = _files_signature()
+            except OSError:
+                # e.g. the file is being replaced
+                continue
+
+            if signature != loaded and signature == seen and reload():
+                loaded = signature
+            seen = signature
+
+    thread = threading.Thread(target=run, name='datasets-watcher', daemon=True)
+    thread.start()
+    return thread
+
+
+def getDatasetsVersion():
+    """
+    Returns the version of the datasets used by the current request, its fingerprint (see "DatasetStore.fingerprint()"),
+    when its files were modified (unix time), when and in how many seconds it was loaded, if only the rows appended to
+    the datasets were read, if a reload is running and the error of the last reload if it failed
+
+    :rtype: dict
+    """
+    datasets = current()
+    return {'version': datasets.version,
+            'fingerprint': datasets.fingerprint,
+            'modified_at': datasets.modifiedAt,
+            'loaded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z', time.localtime(datasets.loadedAt)),
+            'load_time': datasets.loadTime,
+            'appended': datasets.appended,
+            'latest_version': _datasets.version,
+            'reloading': _reloadLock.locked(),
+            'last_error': _reloadError}
+
+
+def getCanonicalGene(gene):
+    """
+    Returns the geneid of the gene however it's written (geneid or gene symbol, in any case), or the gene stripped if
+    it's not found, e.g. to identify the same request written in different ways
+
+    :rtype: str
+    """
+    return current().geneTable.canonical(gene)
+
+
+def getCanonicalDisease(disease):
+    """
+    Returns the diseaseid of the disease however it's written (diseaseid or disease name, in any case), or the disease
+    stripped if it's not found
+
+    :rtype: str
+    """
+    return current().diseaseTable.canonical(disease)
 
 
 def getInfoGenes():
-    """Return a dictionary containing information of geneTable
+    """Return a dictionary containing information of geneTable, computed when the datasets are loaded.
+    It must not be modified.
 
     :return: Info about geneTable
     :rtype: dict"""
-
-    gene_data = {'nrows': geneTable.get_dimensions()[0],
-                 'ncols': geneTable.get_dimensions()[1],
-                 'labels': geneTable.get_labels(),
-                 'head': geneTable.get_head().values.tolist(),
-                 'tail': geneTable.get_tail().values.tolist()}
-
-    return gene_data
+    return current().info['genes']
 
 
 def getInfoDiseases():
-    """Return a dictionary containing information of diseaseTable
+    """Return a dictionary containing information of diseaseTable, computed when the datasets are loaded.
+    It must not be modified.
 
     :return Info about diseaseTable
     :rtype dict"""
-
-    disease_data = {'nrows': diseaseTable.get_dimensions()[0],
-                    'ncols': diseaseTable.get_dimensions()[1],
-                    'labels': diseaseTable.get_labels(),
-                    'head': diseaseTable.get_head().values.tolist(),
-                    'tail': diseaseTable.get_tail().values.tolist()}
-
-    return disease_data
+    return current().info['diseases']
 
 
 def getInfo():
     """
-    Returns two dictionaries containing information on the two datasets
+    Returns two dictionaries containing information on the two datasets, from the same version of the datasets
 
     :return two dictionaries
     :rtype tuple(dict, dict)
     """
-
-    return getInfoGenes(), getInfoDiseases()
+    info = current().info
+    return info['genes'], info['diseases']
 
 
 def getDiseaseTableList(start=0, end=None, step=1):
@@ -63,7 +321,8 @@ def getDiseaseTableList(start=0, end=None, step=1):
 
     :rtype: list
     """
-    return diseaseTable[start:end:step].values.tolist()
+    datasets = current()
+    return datasets.diseaseTable[start:end:step].values.tolist()
 
 
 def getGeneTableList(start=0, end=None, step=1):
@@ -72,145 +331,377 @@ def getGeneTableList(start=0, end=None, step=1):
 
     :rtype: list
     """
-    return geneTable[start:end:step].values.tolist()
+    datasets = current()
+    return datasets.geneTable[start:end:step].values.tolist()
 
 
-def getDistinctGenes():
-    table = geneTable.distinct()
+def getGeneTablePage(start=0, end=None, orient='rows'):
+    """
+    Returns a dictionary with the rows of Gene Table from start index to end index, and the total number of rows.
+    See "_page()" for "orient".
 
-    data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
-            'length': table.shape[0]}
+    :rtype: dict
+    """
+    datasets = current()
+    data = _page(datasets.geneTable[start:end], orient=orient)
+    data['length'] = datasets.geneTable.get_dimensions()[0]
 
     return data
 
 
-def getDistinctDiseases():
-    table = diseaseTable.distinct()
+def getDiseaseTablePage(start=0, end=None, orient='rows'):
+    """
+    Returns a dictionary with the rows of Disease Table from start index to end index, and the total number of rows.
+    See "_page()" for "orient".
+
+    :rtype: dict
+    """
+    datasets = current()
+    data = _page(datasets.diseaseTable[start:end], orient=orient)
+    data['length'] = datasets.diseaseTable.get_dimensions()[0]
+
+    return data
+
+
+def _page(table, start=0, end=None, orient='rows'):
+    """
+    Returns a dictionary with the labels of the table, its rows from index start to index end and the total
+    number of rows of the table, so that only the rows shown in a page are converted to a list.
+
+    With orient='columns' the rows are not converted to lists, instead under the key 'columns' there is a dictionary
+    with the label of every column as key and the numpy array of its values as value. It's used by the API as
+    the arrays can be serialized directly. With orient='frame' the rows are not converted at all, under the key
+    'frame' there is the table itself: it's used by the downloads, which convert it a few rows at a time.
+
+    :param table: the table
+    :type table: pandas.DataFrame
+    :param start: the index of the first row
+    :type start: int
+    :param end: the index after the last row. If None the rows go until the end of the table
+    :type end: int
+    :param orient: 'rows', 'columns' or 'frame'
+    :type orient: str
+
+    :return: dictionary with the keys 'labels', 'rows' (or 'columns', or 'frame') and 'length'
+    :rtype: dict
+    """
 
     data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
             'length': table.shape[0]}
 
+    table = table.iloc[start:end]
+    if orient == 'columns':
+        data['columns'] = {label: table[label].to_numpy() for label in data['labels']}
+    elif orient == 'frame':
+        data['frame'] = table
+    else:
+        data['rows'] = table.values.tolist()
+
     return data
 
 
-def getGeneEvidences(gene):
+def getDistinctGenes(start=0, end=None, orient='rows'):
+    """Returns a dictionary with the distinct genes from index start to index end, and their total number"""
+    datasets = current()
+    table = datasets.memo(('distinct_genes',), datasets.geneTable.distinct)
+
+    return _page(table, start, end, orient)
+
+
+def getDistinctDiseases(start=0, end=None, orient='rows'):
+    """Returns a dictionary with the distinct diseases from index start to index end, and their total number"""
+    datasets = current()
+    table = datasets.memo(('distinct_diseases',), datasets.diseaseTable.distinct)
+
+    return _page(table, start, end, orient)
+
+
+def getGeneEvidences(gene, start=0, end=None, orient='rows'):
     """Receives as input a geneid or a gene_symbol and returns a dictionary with the
     sentences that relates the COVID-19 with the gene.
 
+    Only the evidences from index start to index end are returned, while "length" is the number of all the evidences.
+    The sentences are retrieved only for the evidences returned.
+
     :param gene: the geneID or gene symbol input
     :type gene: str
 
     :returns: dictionary of sentences related with COVID-19 about the gene input
     :rtype: dict
     """
-    try:
-        gene = int(gene)
-    except ValueError:
-        gene = str(gene)
+    datasets = current()
+    key = datasets.geneTable.resolve(gene)
+    table = datasets.memo(('gene_evidences', key), datasets.geneTable.evidence, gene, EVIDENCE_TAG)
 
-    table = geneTable.evidence(gene)
-
-    data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
-            'length': table.shape[0]}
+    data = _page(datasets.geneTable.with_sentences(table.iloc[start:end]), orient=orient)
+    data['length'] = table.shape[0]
 
     return data
 
 
-def getDiseaseEvidences(disease):
-    """Receives as input a geneid or a gene_symbol and returns a dictionary with the
-    sentences that relates the COVID-19 with the gene.
+def getDiseaseEvidences(disease, start=0, end=None, orient='rows'):
+    """Receives as input a diseaseid or a disease_name and returns a dictionary with the
+    sentences that relates the COVID-19 with the disease.
+
+    Only the evidences from index start to index end are returned, while "length" is the number of all the evidences.
+    The sentences are retrieved only for the evidences returned.
 
-    :param disease: the geneID or gene symbol input
+    :param disease: the diseaseID or disease name input
     :type disease: str
 
-    :returns: dictionary of sentences related with COVID-19 about the gene input
+    :returns: dictionary of sentences related with COVID-19 about the disease input
     :rtype: dict
     """
-    table = diseaseTable.evidence(disease)
+    datasets = current()
+    key = datasets.diseaseTable.resolve(disease)
+    table = datasets.memo(('disease_evidences', key), datasets.diseaseTable.evidence, disease, EVIDENCE_TAG)
 
-    data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
-            'length': table.shape[0]}
+    data = _page(datasets.diseaseTable.with_sentences(table.iloc[start:end]), orient=orient)
+    data['length'] = table.shape[0]
 
     return data
 
 
-def getCorrelation(num_rows, min_occurrences):
+def getCorrelation(num_rows, min_occurrences, start=0, end=None, orient='rows'):
     """Returns a dict with the correlations between genes and diseases sorted by the highest number of occurrences.
 
-    It allows to customize the number of correlations and the minimum occurrence.
+    It allows to customize the number of correlations and the minimum occurrence. Of the correlations selected
+    only the ones from index start to index end are returned, while "length" is the number of all of them.
+    Under the key 'at_least' there is the number of correlations with at least k occurrences for some values of k,
+    see "CORRELATION_THRESHOLDS" in "settings.py".
 
     :return: A dictionary, the key for the rows is 'rows'
     :rtype: dict
     """
+    datasets = current()
+
+    # get the correlations, computed only once and sorted by the highest number of occurrences
+    corr = datasets.test.get_correlation()
+
+    # If min_occurrences is not zero the user wants only the correlations which occur more than min_occurrences,
+    # which are the first "length" as they're sorted. If it's at its default value (0) it means that the user
+    # hasn't input any min_occurrences
+    length = len(corr)
+    if min_occurrences != 0:
+        length = corr.count_at_least(min_occurrences)
+
+    # if num_rows == 0 it means the user wants to see all the correlations, otherwise only the first [num_rows].
+    # If num_rows is higher than the number of correlations all of them are kept
+    if num_rows != 0:
+        length = min(length, num_rows)
+
+    # create a dictionary containing the information and the rows of the page, which are the only ones converted
+    # from the arrays to a table
+    if end is None or end > length:
+        end = length
+    start = min(start, end)
+
+    data = _page(corr.frame(start, end), orient=orient)
+    data['length'] = length
+    data['min_occurrences'] = min_occurrences
+    data['at_least'] = corr.histogram(CORRELATION_THRESHOLDS)
 
-    # get the dataframe of the correlations
-    corr = test.correlation_gene_disease()
+    return data
 
-    # create a dictionary containing the information and the rows of the dataframe
-    data = {'labels': corr.columns.values.tolist(),
-            'rows': corr.values.tolist(),
-            'length': corr.shape[0],
-            'min_occurrences': min_occurrences}
 
-    # if min_occurrences is at its default value (0) it means that the user hasn't input any min_occurrences
-    if min_occurrences == 0:
-        # if num_rows == 0 it means the user wants to see all the correlations, thus returns all the data
-        if num_rows == 0:
-            return data
+def getDiseasesRelatedToGene(gene, start=0, end=None, orient='rows'):
+    """Returns a dictionary with the diseases related to the gene from index start to index end,
+    and their total number"""
+    datasets = current()
+    key = datasets.geneTable.resolve(gene)
+    table = datasets.memo(('diseases_related_to_gene', key), datasets.test.find_diseases_related_to_gene, gene)
 
-        # in case "rows" is higher than the number of correlations it will throw IndexError, and it will return all data
-        try:
-            # Select only the first [num_rows] rows from the dataframe
-            data['rows'] = corr.iloc[:num_rows].values.tolist()
-            data['length'] = len(data['rows'])
-            return data
+    return _page(table, start, end, orient)
 
-        except IndexError:
-            return data
 
-    else:
-        # If min_occurrences is not zero the user wants only the correlations which occur more than min_occurrences.
-
-        # Select only the rows with occurrences higher than min_occurrences
-        corr = corr.loc[corr['occurrences'] >= min_occurrences]
-
-        # if the user wants to see at most [num_rows] of rows, but we have more correlation, then are returned only
-        # the num of correlations the user has selected. If num_rows == 0 it means the user has proactively chosen
-        # that he wants to see all correlations
-        if num_rows < len(corr) and num_rows != 0:
-            data['rows'] = corr.iloc[:num_rows].values.tolist()
-            data['length'] = len(data['rows'])
-            return data
-        else:
-            data['rows'] = corr.values.tolist()
-            data['length'] = len(data['rows'])
-            return data
+def getGenesRelatedToDisease(disease, start=0, end=None, orient='rows'):
+    """Returns a dictionary with the genes related to the disease from index start to index end,
+    and their total number"""
+    datasets = current()
+    key = datasets.diseaseTable.resolve(disease)
+    table = datasets.memo(('genes_related_to_disease', key), datasets.test.find_genes_related_to_disease, disease)
 
+    return _page(table, start, end, orient)
 
-def getDiseasesRelatedToGene(gene):
-    table = test.find_diseases_related_to_gene(gene)
 
-    data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
-            'length': table.shape[0]}
+def getSimilarGenes(gene, metric='cosine', start=0, end=None, orient='rows'):
+    """Returns a dictionary with the genes most similar to the gene by the diseases they share, from index start to
+    index end, and their total number. "metric" is 'cosine' or 'jaccard', see "CooccurrenceMatrix"."""
+    datasets = current()
+    key = datasets.geneTable.resolve(gene)
+    table = datasets.memo(('similar_genes', key, metric), datasets.test.find_similar_genes, gene, metric)
+
+    return _page(table, start, end, orient)
+
+
+def getSimilarDiseases(disease, metric='cosine', start=0, end=None, orient='rows'):
+    """Returns a dictionary with the diseases most similar to the disease by the genes they share, from index start to
+    index end, and their total number. "metric" is 'cosine' or 'jaccard', see "CooccurrenceMatrix"."""
+    datasets = current()
+    key = datasets.diseaseTable.resolve(disease)
+    table = datasets.memo(('similar_diseases', key, metric), datasets.test.find_similar_diseases, disease, metric)
+
+    return _page(table, start, end, orient)
+
+
+def _search(datasets, query, gene=None, disease=None):
+    """Returns the sentences found by the search, only among the ones of the gene and of the disease if given"""
+    within = None
+    if gene:
+        within = datasets.geneTable.sentence_ids(gene)
+    if disease:
+        sentences = datasets.diseaseTable.sentence_ids(disease)
+        within = sentences if within is None else np.intersect1d(within, sentences, assume_unique=True)
+
+    return datasets.searchIndex.search(query, within, k1=SEARCH_BM25_K1, b=SEARCH_BM25_B)
+
+
+def getSearch(query, gene=None, disease=None, start=0, end=None, orient='rows'):
+    """Returns a dictionary with the sentences which contain all the words and the phrases (between double quotes)
+    of the query, sorted by their BM25 score. If gene or disease are given, only the sentences in which they are
+    found are searched. See "SearchIndex".
+
+    Only the sentences from index start to index end are returned, while "length" is the number of all of them.
+
+    :param query: the words and the phrases to search
+    :type query: str
+    :param gene: the geneID or gene symbol input
+    :type gene: str
+    :param disease: the diseaseID or disease name input
+    :type disease: str
+
+    :rtype: dict
+    """
+    datasets = current()
+    key = ('search', datasets.searchIndex.parse(query),
+           ('gene', datasets.geneTable.resolve(gene)) if gene else None,
+           ('disease', datasets.diseaseTable.resolve(disease)) if disease else None)
+    table = datasets.memo(key, _search, datasets, query, gene, disease)
+
+    data = _page(datasets.geneTable.with_sentences(table.iloc[start:end]), orient=orient)
+    data['length'] = table.shape[0]
 
     return data
 
 
-def getGenesRelatedToDisease(disease):
-    table = test.find_genes_related_to_disease(disease)
+def getSearchIndexInfo():
+    """
+    Returns the number of sentences, words and postings of the search index, the time needed to build it and the
+    memory it uses, see "SearchIndex.info()"
 
-    data = {'labels': table.columns.values.tolist(),
-            'rows': table.values.tolist(),
-            'length': table.shape[0]}
+    :rtype: dict
+    """
+    return current().searchIndex.info()
+
+
+def getBatchGeneEvidences(genes, start=0, end=None, orient='rows'):
+    """Receives as input many geneids or gene symbols and returns a dictionary with the evidences of all of them,
+    like "getGeneEvidences()", one gene after the other. The column 'query' has the gene as it was given.
+    Under the key 'not_found' there are the genes not found in the dataset.
+
+    :param genes: the geneIDs or gene symbols input
+    :type genes: list
+
+    :rtype: dict
+    """
+    datasets = current()
+    found, not_found = datasets.geneTable.resolve_all(genes)
+    table = datasets.memo(('batch_gene_evidences', tuple(found)), datasets.geneTable.batch_evidence,
+                          genes, EVIDENCE_TAG)
+
+    data = _page(datasets.geneTable.with_sentences(table.iloc[start:end]), orient=orient)
+    data['length'] = table.shape[0]
+    data['not_found'] = not_found
+
+    return data
+
+
+def getBatchDiseaseEvidences(diseases, start=0, end=None, orient='rows'):
+    """Receives as input many diseaseids or disease names and returns a dictionary with the evidences of all of
+    them, like "getDiseaseEvidences()", one disease after the other. The column 'query' has the disease as it was
+    given. Under the key 'not_found' there are the diseases not found in the dataset.
+
+    :param diseases: the diseaseIDs or disease names input
+    :type diseases: list
+
+    :rtype: dict
+    """
+    datasets = current()
+    found, not_found = datasets.diseaseTable.resolve_all(diseases)
+    table = datasets.memo(('batch_disease_evidences', tuple(found)), datasets.diseaseTable.batch_evidence,
+                          diseases, EVIDENCE_TAG)
+
+    data = _page(datasets.diseaseTable.with_sentences(table.iloc[start:end]), orient=orient)
+    data['length'] = table.shape[0]
+    data['not_found'] = not_found
+
+    return data
+
+
+def getBatchDiseasesRelatedToGenes(genes, start=0, end=None, orient='rows'):
+    """Returns a dictionary with the diseases related to many genes, like "getDiseasesRelatedToGene()", one gene
+    after the other. The column 'query' has the gene as it was given. Under the key 'not_found' there are the genes
+    not found in the dataset.
+
+    :rtype: dict
+    """
+    datasets = current()
+    found, not_found = datasets.geneTable.resolve_all(genes)
+    table = datasets.memo(('batch_diseases_related_to_genes', tuple(found)),
+                          datasets.test.find_diseases_related_to_genes, genes)
+
+    data = _page(table, start, end, orient)
+    data['not_found'] = not_found
+
+    return data
+
+
+def getBatchGenesRelatedToDiseases(diseases, start=0, end=None, orient='rows'):
+    """Returns a dictionary with the genes related to many diseases, like "getGenesRelatedToDisease()", one disease
+    after the other. The column 'query' has the disease as it was given. Under the key 'not_found' there are the
+    diseases not found in the dataset.
+
+    :rtype: dict
+    """
+    datasets = current()
+    found, not_found = datasets.diseaseTable.resolve_all(diseases)
+    table = datasets.memo(('batch_genes_related_to_diseases', tuple(found)),
+                          datasets.test.find_genes_related_to_diseases, diseases)
+
+    data = _page(table, start, end, orient)
+    data['not_found'] = not_found
 
     return data
 
 
+def getGeneSuggestions(prefix, limit=AUTOCOMPLETE_SUGGESTIONS):
+    """Returns the genes whose symbol or geneid begins with prefix, with their number of evidences. See "PrefixIndex"
+
+    :rtype: list
+    """
+    datasets = current()
+    return datasets.geneTable.prefix_index(EVIDENCE_TAG).search(prefix, limit)
+
+
+def getDiseaseSuggestions(prefix, limit=AUTOCOMPLETE_SUGGESTIONS):
+    """Returns the diseases whose name or diseaseid begins with prefix, with their number of evidences.
+    See "PrefixIndex"
+
+    :rtype: list
+    """
+    datasets = current()
+    return datasets.diseaseTable.prefix_index(EVIDENCE_TAG).search(prefix, limit)
+
+
+def getMemoStats():
+    """
+    Returns the hits, misses and evictions of the cache of the results and the memory it uses, see "ResultCache"
+
+    :rtype: dict
+    """
+    return memo.stats()
+
+
 def getDocumentation(path, name_file=''):
     """Reads the documentation from .json files and return a dict.
     You can either input the whole path, or the folder and the name of the file.
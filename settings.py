@@ -15,12 +15,130 @@ DOCS_PATH = r'static/docs'
 GENE_TABLE_PATH = './datasets/gene_evidences.tsv'
 DISEASE_TABLE_PATH = './datasets/disease_evidences.tsv'
 
+# ---------- Reload Settings ----------
+
+# The datasets can be reloaded while the website is running, without stopping it: the new version is loaded in the
+# background and it replaces the previous one only when it's ready.
+# If it's more than 0, every RELOAD_WATCH_INTERVAL seconds the program checks if the datasets have changed and,
+# if they have, it reloads them
+RELOAD_WATCH_INTERVAL = 0
+
+# The token to send in the header "Authorization: Bearer <token>" to reload the datasets with a POST request to
+# "/api/v1/admin/reload". If it's None the reload can't be requested
+RELOAD_TOKEN = None
+
+# If True and the datasets have only grown since they were loaded (new rows written at the end of the files), only the
+# new rows are read and added to what has already been computed, instead of loading everything again.
+# The result is the same, see "python benchmark.py append"
+RELOAD_INCREMENTAL = True
+
+# ---------- Schema Settings ----------
+
+# The types of the columns of the datasets, applied when they are loaded to reduce the memory they use.
+# 'category' is for columns with few distinct values repeated in many rows: every value is stored only once and the
+# rows keep an integer code, which is also what is compared when the column is filtered or merged.
+# 'integer' is for integer columns, stored with the narrowest integer type that fits their values.
+# The columns not written here are left as they are read from the file
+DATASET_SCHEMA = {
+    'pmid': 'integer',
+    'nsentence': 'integer',
+    'geneid': 'integer',
+    'gene_symbol': 'category',
+    'diseaseid': 'category',
+    'disease_name': 'category',
+}
+
+# ---------- Snapshot Settings ----------
+
+# If True, after a dataset is parsed the first time, a binary copy of it (the snapshot) is saved next to the file and
+# at the following starts it's loaded instead of parsing the file again, which is much faster
+SNAPSHOT_ENABLED = True
+
+# How to check if the dataset has changed since its snapshot was saved, in which case the snapshot is not used:
+# 'mtime' checks the size and the modification time of the file, 'hash' its size and its sha256 which is slower
+# but works also when the modification time is not reliable (e.g. the file is copied)
+SNAPSHOT_VALIDATION = 'mtime'
+
+# ---------- Evidences Settings ----------
+
+# Tags searched in the sentences of the datasets. The key is the name of the tag and the value is the text searched.
+# For every tag, which sentences contain it is computed only once when the datasets are loaded
+EVIDENCE_TAGS = {'COVID-19': '>COVID-19<'}
+
+# The tag the sentences returned as evidences of genes and diseases must contain. It must be a key of EVIDENCE_TAGS
+EVIDENCE_TAG = 'COVID-19'
+
+# ---------- Correlation Settings ----------
+
+# The page of the correlations shows how many correlations have at least these numbers of occurrences
+CORRELATION_THRESHOLDS = [1, 2, 5, 10, 20, 50, 100, 500, 1000]
+
+# ---------- Search Settings ----------
+
+# Parameters of BM25, the score used to sort the sentences found by the search. SEARCH_BM25_K1 is how much a word
+# found many times in a sentence raises its score, SEARCH_BM25_B how much the longer sentences are penalized (0-1)
+SEARCH_BM25_K1 = 1.2
+SEARCH_BM25_B = 0.75
+
+# ---------- Pages Settings ----------
+
+# Number of rows of the tables shown in each page
+ROWS_PER_PAGE = 30
+
+# Maximum number of rows returned in a page by the JSON API ("?per_page=")
+API_MAX_PER_PAGE = 1000
+
+# Number of genes or diseases suggested while the user types in the forms
+AUTOCOMPLETE_SUGGESTIONS = 10
+
+# The pages with the tables of the results are sent while they're rendered, in chunks of at least this number of
+# characters: the beginning of the page and its form are sent before the rows of the table are rendered.
+# If it's 0 every page is rendered whole before sending it
+STREAM_CHUNK_BYTES = 8 * 1024
+
+# ---------- Batch Settings ----------
+
+# Maximum number of genes or diseases accepted by a single batch request ("/batch")
+BATCH_MAX_ITEMS = 1000
+
+# ---------- Download Settings ----------
+
+# The tables are downloaded in chunks of this number of rows, so that the whole file is never kept in memory
+DOWNLOAD_CHUNK_ROWS = 1000
+
+# ---------- Memoization Settings ----------
+
+# Maximum memory, in bytes, used to keep the results of the operations (evidences, related genes and diseases, ...)
+# so that the following pages of a result and the same requests are not computed again.
+# When it's exceeded the results used least recently are removed
+MEMO_MAX_BYTES = 256 * 1024 ** 2
+
+# ---------- Server Settings ----------
+
+# Used by the production server (see wsgi.py and gunicorn.conf.py), not by "python main.py".
+# The datasets are loaded once by the main process before it starts the workers, which share its memory. Each worker
+# is a process which answers SERVER_THREADS requests at once: the workers use all the cores of the machine, the
+# threads keep a worker busy while a request waits (e.g. a download sent to a slow client)
+SERVER_WORKERS = 2
+SERVER_THREADS = 4
+
+# The address where the server listens. If the environment variable PORT is set (e.g. on Heroku) its port is used
+SERVER_BIND = '0.0.0.0:8000'
+
+# A worker which doesn't answer for this number of seconds is killed and started again
+SERVER_TIMEOUT = 120
+
 # ---------- Cache Settings ----------
 
 # IF YOU DON'T KNOW WHAT YOU ARE DOING, DON'T MODIFY THIS SETTINGS
 
-# cache settings
+# cache settings. The cache is a SQLite database in CACHE_DIR shared by all the workers of the server
+# (see cache_backend.py), which keeps the pages rendered once for every version of the datasets. It keeps at most
+# CACHE_THRESHOLD values and "max_bytes" bytes, then it removes the values used least recently
 CACHE_CONFIG = {
-    "CACHE_TYPE": "simple",  # Flask-Caching related configs
-    "CACHE_DEFAULT_TIMEOUT": 3600
+    "CACHE_TYPE": "cache_backend.sqlite",  # Flask-Caching related configs
+    "CACHE_DEFAULT_TIMEOUT": 3600,
+    "CACHE_THRESHOLD": 500,
+    "CACHE_DIR": "./cache",
+    "CACHE_OPTIONS": {"max_bytes": 64 * 1024 ** 2},
 }
@@ -0,0 +1,51 @@
+// Suggests the genes and the diseases while the user types in the inputs with the attribute "data-autocomplete",
+// whose value is the url of the autocomplete endpoint of the JSON API (e.g. "/api/v1/genes/autocomplete").
+// The suggestions are shown by the browser with a <datalist> under the input.
+
+document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('input[data-autocomplete]').forEach(function (input) {
+        const list = document.createElement('datalist');
+        list.id = input.name + '-suggestions';
+        input.setAttribute('list', list.id);
+        input.setAttribute('autocomplete', 'off');
+        input.after(list);
+
+        // The suggestions are requested only when the user stops typing for a moment
+        let timer = null;
+        let lastPrefix = '';
+
+        input.addEventListener('input', function () {
+            clearTimeout(timer);
+            timer = setTimeout(function () {
+                const prefix = input.value.trim();
+                if (prefix === lastPrefix) {
+                    return;
+                }
+                lastPrefix = prefix;
+
+                if (prefix === '') {
+                    list.replaceChildren();
+                    return;
+                }
+
+                fetch(input.dataset.autocomplete + '?q=' + encodeURIComponent(prefix))
+                    .then(function (response) {
+                        return response.ok ? response.json() : {data: []};
+                    })
+                    .then(function (response) {
+                        // The user has typed something else in the meantime
+                        if (input.value.trim() !== prefix) {
+                            return;
+                        }
+
+                        list.replaceChildren(...response.data.map(function (suggestion) {
+                            const option = document.createElement('option');
+                            option.value = suggestion.name;
+                            option.label = suggestion.id + ' - ' + suggestion.evidences + ' evidences';
+                            return option;
+                        }));
+                    });
+            }, 150);
+        });
+    });
+});
@@ -1,29 +1,119 @@
-from flask import Flask, render_template, request, send_file, flash, make_response, redirect
+from flask import Flask, Blueprint, render_template, request, send_file, flash, redirect, Response, url_for, \
+    abort, current_app, session, stream_with_context, get_flashed_messages
+from itsdangerous import URLSafeSerializer, BadSignature
 from flask_paginate import Pagination, get_page_parameter
 from flask_caching import Cache
 from settings import *
 from io import StringIO
+from itertools import groupby, islice
+from functools import wraps
 import os
+import gzip
 import csv
+import zlib
 import mediator
 from mediator import DISEASE_TABLE_PATH, GENE_TABLE_PATH, DOCS_PATH
+from api import api, dumps, json_response
 
-app = Flask(__name__)
+# The webpages of the website, registered on the application by "create_app()"
+pages = Blueprint('pages', __name__)
 
-# Used by "flash" for flashing comments or errors as popup
-app.secret_key = b'_5#y2L"F4Q8z\n\xec]/'
+# The cache shared by all the workers of the server, see cache_backend.py. It keeps the pages of "prerendered()"
+cache = Cache()
 
-# tell Flask to use the config (defined in settings.py)
-app.config.from_mapping(CACHE_CONFIG)
-cache = Cache(app)
+
+def create_app(config=None):
+    """
+    Creates the application of the website with its webpages, the JSON API (see "api.py") and the cache.
+
+    The datasets are not loaded here but when mediator.py is imported, thus they're loaded once per process and
+    shared by all the applications created in it. A production server which loads the application before forking
+    its workers (see "wsgi.py") shares them also with the workers.
+
+    :param config: settings of Flask which replace the default ones, e.g. {'TESTING': True}
+    :type config: dict
+    :rtype: flask.Flask
+    """
+    app = Flask(__name__)
+
+    # tell Flask to use the config (defined in settings.py)
+    app.config.from_mapping(CACHE_CONFIG)
+    if config is not None:
+        app.config.from_mapping(config)
+
+    # Used by "flash" for flashing comments or errors as popup, and to sign the download tokens
+    if not app.secret_key:
+        app.secret_key = secret_key(app)
+    cache.init_app(app)
+
+    # The pages kept by a previous start may be different also from the same datasets (e.g. the templates have
+    # changed). The server creates the application once, before forking the workers (see wsgi.py)
+    cache.clear()
+
+    app.register_blueprint(pages)
+
+    # The JSON API, see "api.py"
+    app.register_blueprint(api, url_prefix='/api/v1')
+
+    return app
+
+
+def secret_key(app):
+    """
+    Returns the secret key of the application, which signs the session and the download tokens: whoever knows it can
+    make tokens which "/download" accepts. It's read from the environment variable SECRET_KEY or, if it's not set,
+    from the file "secret_key" in the instance folder of the application (the folder "instance" of the program).
+    If neither exists a random key is saved in the file, thus it doesn't change when the server is restarted and it's
+    the same for all its workers.
+
+    :param app: the application
+    :type app: flask.Flask
+    :rtype: str or bytes
+    """
+    if os.environ.get('SECRET_KEY'):
+        return os.environ['SECRET_KEY']
+
+    path = os.path.join(app.instance_path, 'secret_key')
+    if not os.path.isfile(path):
+        os.makedirs(app.instance_path, exist_ok=True)
+
+        # The key is written in a file of this process, then linked to "secret_key" only if it doesn't exist yet,
+        # thus all the processes started at once read the same key
+        temporary = f"{path}.{os.getpid()}"
+        with open(os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'wb') as f:
+            f.write(os.urandom(32))
+        try:
+            os.link(temporary, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(temporary)
+
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+@pages.before_app_request
+def pin_datasets():
+    """Every request uses the same version of the datasets from its beginning to its end, also if the datasets
+    are reloaded meanwhile. See "reload()" in mediator.py"""
+    mediator.pin()
+
+
+@pages.teardown_app_request
+def unpin_datasets(exception):
+    mediator.unpin()
 
 
 def run(**kwargs):
-    """When called it starts the website"""
-    app.run(**kwargs)
+    """When called it starts the website with the development server of Flask, a single process, and the thread
+    which reloads the datasets when they change (see RELOAD_WATCH_INTERVAL). In production use "wsgi.py"."""
+    if RELOAD_WATCH_INTERVAL > 0:
+        mediator.watch(RELOAD_WATCH_INTERVAL)
+    create_app().run(**kwargs)
 
 
-@app.route('/')
+@pages.route('/')
 def homepage():
     """A webpage which explains briefly the project and allows you to download the datasets or to go through them"""
 
@@ -31,14 +121,14 @@ def homepage():
                            geneTablePath=GENE_TABLE_PATH)
 
 
-@app.route('/about')
+@pages.route('/about')
 def about():
     """A webpage with the member of the group"""
     return render_template('about.html')
 
 
-@app.route('/documentation', defaults={'file': 'projectOverview'})
-@app.route('/documentation/<file>')
+@pages.route('/documentation', defaults={'file': 'projectOverview'})
+@pages.route('/documentation/<file>')
 def documentation(file):
     """Return the webpages with the documentation of the project.
 
@@ -65,156 +155,424 @@ def documentation(file):
     return render_template('documentation/%s.html' % file, docs=docs)
 
 
-@app.route('/functions')
+@pages.route('/functions')
 def functions():
     """A webpage which lets you select the operation you want to do with the datasets"""
 
     return render_template('functions.html')
 
 
-@app.route('/download', methods=['POST'])
+def stream_tsv(labels, rows, compress=False):
+    """
+    Generator which returns the table as tsv in chunks of DOWNLOAD_CHUNK_ROWS rows (see "settings.py"),
+    so that the whole file is never in memory and the first rows are sent while the others are written.
+    If the rows are a DataFrame only the rows of a chunk are converted to lists at a time.
+
+    :param labels: the labels of the columns
+    :type labels: list
+    :param rows: the rows of the table
+    :type rows: list or pandas.DataFrame
+    :param compress: if True the chunks are compressed with gzip
+    :type compress: bool
+
+    :return: the chunks of the file
+    :rtype: generator
+    """
+
+    si = StringIO()
+    cw = csv.writer(si, delimiter='\t')
+
+    # wbits=31 writes the gzip header and trailer, not only the compressed data
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    cw.writerow(labels)
+    for start in range(0, len(rows), DOWNLOAD_CHUNK_ROWS):
+        if hasattr(rows, 'iloc'):
+            cw.writerows(rows.iloc[start:start + DOWNLOAD_CHUNK_ROWS].values.tolist())
+        else:
+            cw.writerows(rows[start:start + DOWNLOAD_CHUNK_ROWS])
+
+        chunk = si.getvalue().encode()
+        si.seek(0)
+        si.truncate()
+
+        if compressor is not None:
+            chunk = compressor.compress(chunk)
+        if chunk:
+            yield chunk
+
+    # the labels are still in "si" if the table has no rows
+    chunk = si.getvalue().encode()
+    if compressor is not None:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+
+def tsv_response(name_file, labels, rows):
+    """
+    Returns a response which streams the table as a tsv file to download, compressed with gzip if the client
+    accepts it.
+
+    :param name_file: the name of the file, without extension
+    :type name_file: str
+    :param labels: the labels of the columns
+    :type labels: list
+    :param rows: the rows of the table
+    :type rows: list or pandas.DataFrame
+
+    :rtype: flask.Response
+    """
+    compress = 'gzip' in request.accept_encodings
+
+    output = Response(stream_tsv(labels, rows, compress), mimetype='text/tsv')
+    output.headers["Content-Disposition"] = f"attachment; filename={name_file}.tsv"
+    output.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        output.headers["Content-Encoding"] = "gzip"
+    return output
+
+
+# The functions of mediator.py whose table can be downloaded with a token of "download_token()", with the types of
+# their arguments. "/download" calls only these functions, with these arguments
+DOWNLOAD_OPERATIONS = {
+    'getDistinctGenes': (),
+    'getDistinctDiseases': (),
+    'getGeneEvidences': (str,),
+    'getDiseaseEvidences': (str,),
+    'getCorrelation': (int, int),
+    'getDiseasesRelatedToGene': (str,),
+    'getGenesRelatedToDisease': (str,),
+}
+
+
+def _download_serializer():
+    """Returns the serializer which signs the download tokens with the secret key of the application"""
+    return URLSafeSerializer(current_app.secret_key, salt='download')
+
+
+def download_token(name_file, operation, *args):
+    """
+    Returns the token the page sends to "/download" to download its whole table. It contains how to compute the
+    table: the name of the function of mediator.py and its arguments, with the version of the datasets it's computed
+    from (its fingerprint, which is the same in all the workers). It's signed, so it can't be altered by the user.
+
+    Nothing is saved on the server: "/download" computes the table again from the token, or takes it from the cache
+    of the results of mediator.py, thus the download doesn't depend on what the cache still contains.
+    The same page gives always the same token, and the arguments are normalized (e.g. the gene as its geneid) so that
+    the result is found in the cache however the user wrote them.
+
+    :param name_file: the name of the file downloaded, without extension
+    :type name_file: str
+    :param operation: the name of the function of mediator.py which computes the table, one of DOWNLOAD_OPERATIONS
+    :type operation: str
+    :param args: the arguments of the function, which must be serializable as json
+    :rtype: str
+    """
+    fingerprint = mediator.getDatasetsVersion()['fingerprint']
+    return _download_serializer().dumps([name_file, operation, list(args), fingerprint])
+
+
+def prerendered(rows=None):
+    """
+    Decorator for the webpages which change only when the datasets change (e.g. "/info"). Every page is rendered only
+    once for every version of the datasets and kept compressed with gzip in the cache shared by the workers of the
+    server (see cache_backend.py), then its body is sent by all of them without rendering it again.
+
+    A page is identified by the name of the view and, if the table of the page is divided in pages, by the number of
+    the page: the other arguments of the url are ignored, so they can't fill the cache with copies of the same page.
+    The pages out of the table (or with flash messages) are rendered as usual, without keeping them.
+
+    The response has the headers ETag, made from the fingerprint of the datasets and the page, and Last-Modified,
+    when the datasets were modified: they're the same in all the workers of the server, so the browser which has the
+    page asks if it has changed ("If-None-Match" and "If-Modified-Since") and receives "304 Not Modified" without
+    the page if it hasn't.
+
+    Steps:
+    Step 1) Get the page requested. If there are messages to show with flash, the page contains them: it's rendered
+        as usual, like a page out of the table
+    Step 2) Get the body of the page compressed, rendering it only if it's not in the cache
+    Step 3) Send it compressed if the browser accepts gzip, otherwise decompressed
+    Step 4) Add ETag and Last-Modified, and answer 304 if the page the browser has is still valid
+
+    :param rows: if the table of the page is divided in pages ("?page="), the function which returns its number of
+        rows
+    :type rows: callable
+    """
+
+    def decorator(view):
+
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+
+            # Step 1)
+            key = (view.__name__,)
+            if rows is not None:
+                page = request.args.get(get_page_parameter(), type=int, default=1)
+                if not 1 <= page <= max(1, -(-rows() // ROWS_PER_PAGE)):
+                    return view(*args, **kwargs)
+                key += (page,)
+
+            if session.get('_flashes'):
+                return view(*args, **kwargs)
+
+            # Step 2)
+            version = mediator.getDatasetsVersion()
+            name = '/'.join(map(str, ('prerendered', version['fingerprint']) + key))
+            body = cache.get(name)
+            if body is None:
+                body = gzip.compress(view(*args, **kwargs).encode(), compresslevel=6)
+                # The pages of the previous versions of the datasets are never requested again, thus they're the
+                # first removed when the cache is full
+                cache.set(name, body, timeout=0)
+
+            # Step 3)
+            compress = 'gzip' in request.accept_encodings
+            response = Response(body if compress else gzip.decompress(body), mimetype='text/html')
+            response.headers['Vary'] = 'Accept-Encoding'
+            if compress:
+                response.headers['Content-Encoding'] = 'gzip'
+
+            # Step 4)
+            # The browser must ask every time if the page has changed, as the datasets can be reloaded at any time
+            response.headers['Cache-Control'] = 'no-cache'
+            response.set_etag('-'.join(map(str, (version['fingerprint'],) + key + (('gzip',) if compress else ()))))
+            if version['modified_at'] is not None:
+                response.last_modified = version['modified_at']
+            return response.make_conditional(request)
+
+        return wrapper
+
+    return decorator
+
+
+def _chunks(pieces, size):
+    """
+    Generator which joins the pieces of text generated by a template in chunks of at least "size" characters,
+    encoded in utf-8. The pieces are many and short (a template generates one for every text between two tags), thus
+    they're joined 64 at a time before checking the length of the chunk.
+
+    :param pieces: the pieces of text
+    :type pieces: iterable
+    :param size: the minimum number of characters of a chunk, except the last one
+    :type size: int
+    :rtype: generator
+    """
+    pieces = iter(pieces)
+    buffer, length = [], 0
+    batch = list(islice(pieces, 64))
+    while batch:
+        text = ''.join(batch)
+        buffer.append(text)
+        length += len(text)
+        if length >= size:
+            yield ''.join(buffer).encode()
+            buffer, length = [], 0
+        batch = list(islice(pieces, 64))
+
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def stream_page(template_name, **context):
+    """
+    Returns a response which sends the page while the template is rendered, in chunks of STREAM_CHUNK_BYTES
+    characters, instead of rendering the whole page before sending it. The beginning of the page and its form are
+    sent at once, then the rows of the table as they're rendered (the tables are included from "templates/tables",
+    as a macro would render the whole table before returning it).
+
+    The messages of flash are taken before the page is sent, as they're removed from the session and the session
+    can't be changed once the headers of the response have been sent.
+    If STREAM_CHUNK_BYTES is 0 the page is rendered with "render_template()".
+
+    :param template_name: the name of the template
+    :type template_name: str
+    :param context: the variables of the template
+    :rtype: flask.Response or str
+    """
+    if STREAM_CHUNK_BYTES <= 0:
+        return render_template(template_name, **context)
+
+    get_flashed_messages()
+
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    return Response(stream_with_context(_chunks(template.generate(context), STREAM_CHUNK_BYTES)),
+                    mimetype='text/html')
+
+
+def get_page():
+    """
+    Returns the number of the page requested with the argument "page" of the url, and the indexes of its
+    first and last row. The value of "page" is taken with functions from flask-paginate otherwise it raises errors.
+
+    :return: the page, the index of its first row and the index after its last row
+    :rtype: tuple(int, int, int)
+    """
+
+    page = request.args.get(get_page_parameter(), type=int, default=1)
+    if page < 1:
+        flash({'type': 'warning',
+               'header': 'Warning!',
+               'message': 'You need to insert a positive number!'})
+        page = 1
+
+    start = (page - 1) * ROWS_PER_PAGE
+    end = page * ROWS_PER_PAGE
+    return page, start, end
+
+
+def dataset_file(name_file):
+    """
+    Returns the path of the dataset "name_file" sent to "/download", which can be its path (absolute or relative to
+    the main directory of the program) or the name of its file. Only the datasets can be downloaded, any other file
+    of the server is never sent.
+
+    :param name_file: the dataset requested
+    :type name_file: str
+    :return: the path of the dataset, or None if "name_file" is not one of the datasets
+    :rtype: str or None
+    """
+    requested = os.path.normpath(os.path.join(os.getcwd(), name_file))
+    for path in (GENE_TABLE_PATH, DISEASE_TABLE_PATH):
+        if requested == os.path.normpath(path) or name_file == os.path.basename(path):
+            return path
+    return None
+
+
+@pages.route('/download', methods=['GET', 'POST'])
 def download():
-    """Allows to download the table computed as tsv file.
+    """Allows to download the table computed as tsv file, or one of the datasets.
 
     Steps:
-    Step 1) Get "name_file" from the page that requested the download.
-    Step 2) Check if "name_file" is None. If it is it means that the previous page did not return any value,
-        or does not have any button named "name_file".
-    Step 3) If "name_file" is not None, it computes the complete path by joining the current path of execution
-        of the program, thus the main directory of the program, and "name_file". Then it checks if it's a file
-        and if it's exists. If it does, it means the previous page requested a file to download, and it downloads it,
-        Otherwise it means "name_file" is the name of the name that will have the table once it'll be converted to .tsv.
-    Step 3.1) In the latter case, it requests the table from the cache by using the global variable "TABLE_CACHE_NAME"
-        define in "settings.py". If the data retrieved is None it means that there was not any table in the cache, thus
-        it redirect to the previous page and tells the user through a notification that he needs to reload the page as
-        the table probably expired from the cache.
-    Step 4) Extract from the dictionary "data_to_save" the rows and the labels of the table.
-    Step 5) A csv.writer is instantiated. It needs StringIO to instantiate a file-object.
-    Step 6) Write as the first row the labels of the columns, then write all the rows
-    Step 7) Make a response which allows the .tsv file to be downloaded
-    Step 8) Set some information of the file that will be downloaded like its name and filetype
+    Step 1) Get "token" or "name_file" from the page that requested the download. The tables are requested with
+        'POST', the datasets also with 'GET' as only in this way the browser can resume their download: 'GET' accepts
+        only "name_file", thus a link to "/download" can download only the datasets.
+    Step 2) If "name_file" is sent it must be one of the datasets, see "dataset_file()", otherwise it returns 404.
+        If the dataset is a file it's downloaded (the download supports range requests, so it can be resumed if it's
+        interrupted). If neither of them is sent, or the file doesn't exist, it redirects to the previous page and
+        tells the user through a notification.
+    Step 3) Otherwise read from the token, made by "download_token()", the name of the file and how to compute the
+        table. If the signature is not valid the token was not made by the website, if the fingerprint is not the
+        one of the datasets in use they have been reloaded after the page was shown: in both cases it redirects to
+        the previous page and tells the user to reload it. If the function is not one of DOWNLOAD_OPERATIONS, or its
+        arguments are not the ones it accepts, it returns 400.
+    Step 4) Compute the whole table with the function of mediator.py written in the token, as the pages have only
+        the rows they show. It's returned as a DataFrame (orient='frame'), its rows are converted a chunk at a time
+        while the file is sent.
+    Step 5) Make a response which streams the .tsv file to download in chunks of rows, see "tsv_response()".
 
     """
 
     # Step 1)
-    name_file = request.form.get('name_file')
+    if request.method == 'GET':
+        token = None
+        name_file = request.args.get('name_file', '')
+    else:
+        token = request.form.get('token')
+        name_file = request.form.get('name_file')
 
     # Step 2)
-    if name_file is None:
+    if token is None:
+        if name_file is not None:
+            path = dataset_file(name_file)
+            if path is None:
+                abort(404)
+
+            if os.path.isfile(path) is True:
+                return send_file(path, as_attachment=True, conditional=True)
+
         flash({'type': 'warning',
                'header': 'Something went wrong!',
                'message': 'Error in downloading the table, please try reloading the page!',
-               'details': f"\"name_file\" not found in the forms. It means that the page that "
-                          f"requested the download did not send any value."})
+               'details': f"\"{name_file}\" was not found." if name_file is not None else
+                          "\"token\" not found in the forms. It means that the page that requested the download "
+                          "did not send any value."})
         return redirect(request.referrer)
-    else:
-        complete_path = os.path.join(os.getcwd(), name_file)
 
-        # Step 3)
-        if os.path.isfile(complete_path) is True:
-            return send_file(complete_path, as_attachment=True)
-        else:
-            # Step 3.1)
-            data_to_save = cache.get(name_file)
-            if data_to_save is None:
-                flash({'type': 'warning',
-                       'header': 'Something went wrong!',
-                       'message': 'I could not get the table to let you download it, please try reloading the page!',
-                       'details': f"\"{name_file}\" was not found or the data was not in the cache!"})
-                return redirect(request.referrer)
+    # Step 3)
+    try:
+        name_file, operation, args, fingerprint = _download_serializer().loads(token)
+    except (BadSignature, ValueError, TypeError):
+        flash({'type': 'warning',
+               'header': 'Something went wrong!',
+               'message': 'I could not get the table to let you download it, please try reloading the page!',
+               'details': "The download token is not valid."})
+        return redirect(request.referrer)
 
-    # Step 4)
-    rows = data_to_save['rows']
-    labels = [data_to_save['labels']]
+    kinds = DOWNLOAD_OPERATIONS.get(operation) if isinstance(operation, str) else None
+    if kinds is None or not isinstance(name_file, str) or not isinstance(args, list) or len(args) != len(kinds) or \
+            any(type(arg) is not kind for arg, kind in zip(args, kinds)):
+        abort(400)
 
-    # Step 5)
-    si = StringIO()
-    cw = csv.writer(si, delimiter='\t')
-
-    # Step 6)
-    cw.writerows(labels)
-    cw.writerows(rows)
+    if fingerprint != mediator.getDatasetsVersion()['fingerprint']:
+        flash({'type': 'warning',
+               'header': 'The datasets have been updated!',
+               'message': 'The table may have changed since the page was loaded, please reload the page!',
+               'details': "The download token was made from a previous version of the datasets."})
+        return redirect(request.referrer)
 
-    # Step 7)
-    output = make_response(si.getvalue())
+    # Step 4)
+    data = getattr(mediator, operation)(*args, orient='frame')
+    rows = data['frame']
+    labels = data['labels']
 
-    # Step 8)
-    output.headers["Content-Disposition"] = f"attachment; filename={name_file}.tsv"
-    output.headers["Content-type"] = "text/tsv"
-    return output
+    # Step 5)
+    return tsv_response(name_file, labels, rows)
 
 
-@app.route('/browseGenesDataset')
+@pages.route('/browseGenesDataset')
 def browseGenesDataset():
     """A webpage which lets you go through gene dataset.
     To do the pagination it uses Pagination() from flask-paginate"""
 
-    # variables
-    data = mediator.getInfoGenes()
-    rows_per_page = 30
-
-    # Get the page from the form to let the user go to a specific page
-    # The value of "page" is taken with functions from flask-paginate otherwise it raises errors
-    page = int(request.args.get(get_page_parameter(), type=int, default=1))
-    if page < 1:
-        flash({'type': 'warning',
-               'header': 'Warning!',
-               'message': 'You need to insert a positive number!'})
+    # variables. The information is shared by all the requests, thus it's copied before adding the rows of the page
+    data = dict(mediator.getInfoGenes())
 
-    # start and end indexes of the table
-    start = (page - 1) * rows_per_page
-    end = page * rows_per_page
+    # Get the page from the form to let the user go to a specific page, and the start and end indexes of the table
+    page, start, end = get_page()
 
     # Returns a list of the rows from index start to index end
     data['rows'] = mediator.getGeneTableList(start, end)
 
     # Prepares the pagination that allows you to click the number of the page and view it in the webpage
     pagination = Pagination(page=page, total=data['nrows'], record_name="gene entries",
-                            css_framework='bulma', per_page=rows_per_page)
+                            css_framework='bulma', per_page=ROWS_PER_PAGE)
 
-    return render_template('browseGenesDataset.html',
-                           base_pmid_url=BASE_PMID_URL,
-                           data=data,
-                           pagination=pagination)
+    return stream_page('browseGenesDataset.html',
+                       base_pmid_url=BASE_PMID_URL,
+                       data=data,
+                       pagination=pagination)
 
 
-@app.route('/browseDiseasesDataset')
+@pages.route('/browseDiseasesDataset')
 def browseDiseasesDataset():
     """A webpage which lets you go through disease dataset.
     To do the pagination it uses Pagination() from flask-paginate"""
 
-    # variables
-    data = mediator.getInfoDiseases()
-    rows_per_page = 30
+    # variables. The information is shared by all the requests, thus it's copied before adding the rows of the page
+    data = dict(mediator.getInfoDiseases())
 
-    # Get the page from the form to let the user go to a specific page
-    # The value of "page" is taken with functions from flask-paginate otherwise it raises errors
-
-    page = int(request.args.get(get_page_parameter(), type=int, default=1))
-    if page < 1:
-        flash({'type': 'warning',
-               'header': 'Warning!',
-               'message': 'You need to insert a positive number!'})
-
-    # start and end index of the table
-    start = (page - 1) * rows_per_page
-    end = page * rows_per_page
+    # Get the page from the form to let the user go to a specific page, and the start and end indexes of the table
+    page, start, end = get_page()
 
     # Returns a list of the rows from index start to index end
     data['rows'] = mediator.getDiseaseTableList(start, end)
 
     # Prepares the pagination that allows you to click the number of the page and view it
     pagination = Pagination(page=page, total=data['nrows'], record_name="diseases entries",
-                            css_framework='bulma', per_page=rows_per_page)
+                            css_framework='bulma', per_page=ROWS_PER_PAGE)
 
-    return render_template('browseDiseasesDataset.html',
-                           base_pmid_url=BASE_PMID_URL,
-                           data=data,
-                           pagination=pagination)
+    return stream_page('browseDiseasesDataset.html',
+                       base_pmid_url=BASE_PMID_URL,
+                       data=data,
+                       pagination=pagination)
 
 
 # for a and b objective
-@app.route('/info')
+@pages.route('/info')
+@prerendered()
 def info():
     """Returns a webpage with all the information about the data tables and a preview of heads and tails"""
 
@@ -224,80 +582,114 @@ def info():
 
 
 # for c objective
-@app.route('/distinctGenes')
+@pages.route('/distinctGenes')
+@prerendered(rows=lambda: mediator.getDistinctGenes(0, 0)['length'])
 def distinctGenes():
-    """A webpage with all the unique distinct genes in the gene dataset"""
+    """A webpage with all the unique distinct genes in the gene dataset, divided in pages"""
 
     NAME_FILE = 'distinct_genes'
 
-    data = mediator.getDistinctGenes()
+    page, start, end = get_page()
+    data = mediator.getDistinctGenes(start, end)
 
-    cache.set(NAME_FILE, data)
+    DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getDistinctGenes')
 
-    return render_template('operations/distinctGenes.html', data=data, NAME_FILE=NAME_FILE)
+    # The links to the other pages don't keep the other arguments of the url, as the page is kept for all of them
+    pagination = Pagination(page=page, total=data['length'], record_name="genes", css_framework='bulma',
+                            per_page=ROWS_PER_PAGE, href=url_for('.distinctGenes') + '?page={0}')
+
+    return render_template('operations/distinctGenes.html', data=data, DOWNLOAD_TOKEN=DOWNLOAD_TOKEN,
+                           pagination=pagination)
 
 
 # for e objective
-@app.route('/distinctDiseases')
+@pages.route('/distinctDiseases')
+@prerendered(rows=lambda: mediator.getDistinctDiseases(0, 0)['length'])
 def distinctDiseases():
-    """A webpage with all the unique distinct disease in the disease table"""
+    """A webpage with all the unique distinct disease in the disease table, divided in pages"""
 
     NAME_FILE = 'distinct_diseases'
 
-    data = mediator.getDistinctDiseases()
+    page, start, end = get_page()
+    data = mediator.getDistinctDiseases(start, end)
+
+    DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getDistinctDiseases')
 
-    cache.set(NAME_FILE, data)
+    # The links to the other pages don't keep the other arguments of the url, as the page is kept for all of them
+    pagination = Pagination(page=page, total=data['length'], record_name="diseases", css_framework='bulma',
+                            per_page=ROWS_PER_PAGE, href=url_for('.distinctDiseases') + '?page={0}')
 
-    return render_template('operations/distinctDiseases.html', data=data, NAME_FILE=NAME_FILE)
+    return render_template('operations/distinctDiseases.html', data=data, DOWNLOAD_TOKEN=DOWNLOAD_TOKEN,
+                           pagination=pagination)
 
 
 # for d objective
-@app.route('/geneEvidences', methods=["POST", "GET"])
+@pages.route('/geneEvidences', methods=["POST", "GET"])
 def geneEvidences():
     """The first time the user access "geneEvidences" it is requested with 'GET' method.
     Then it returns a webpage which lets the user input a geneSymbol or a geneID.
-    It is then submitted back to "geneEvidences" but with 'POST' method.
+    It is then submitted back to "geneEvidences" in the argument "gene" of the url.
     Now it returns a webpage which lists all the evidences in literature of the relation between
-    the gene and COVID-19"""
+    the gene and COVID-19, divided in pages.
+
+    If the gene is sent with 'POST' method it redirects to the url with the argument "gene", so that the links
+    to the other pages keep the gene"""
+
+    if request.method == "POST":
+        return redirect(url_for('.geneEvidences', gene=request.form['gene']))
 
-    if request.method == "GET":
+    gene = request.args.get('gene')
+    if gene is None:
         return render_template('operations/inputGeneEvidences.html')
     else:
-        gene = request.form['gene']
         NAME_FILE = gene + '_evidences'
 
-        data = mediator.getGeneEvidences(gene)
+        page, start, end = get_page()
+        data = mediator.getGeneEvidences(gene, start, end)
 
-        cache.set(NAME_FILE, data)
+        DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getGeneEvidences', mediator.getCanonicalGene(gene))
 
-        return render_template("operations/geneEvidences.html", gene=gene, data=data, NAME_FILE=NAME_FILE,
-                               base_pmid_url=BASE_PMID_URL)
+        pagination = Pagination(page=page, total=data['length'], record_name="evidences",
+                                css_framework='bulma', per_page=ROWS_PER_PAGE)
+
+        return stream_page("operations/geneEvidences.html", gene=gene, data=data, DOWNLOAD_TOKEN=DOWNLOAD_TOKEN,
+                           base_pmid_url=BASE_PMID_URL, pagination=pagination)
 
 
 # for f objective
-@app.route('/diseaseEvidences', methods=["POST", "GET"])
+@pages.route('/diseaseEvidences', methods=["POST", "GET"])
 def diseaseEvidences():
     """The first time the user access "diseaseEvidences" it is requested with 'GET' method.
     Then it returns a webpage which lets the user input a diseaseID or a diseaseName.
-    It is then submitted back to "diseaseEvidences" but with 'POST' method.
-    Now it returns a webpage which lists all the evidences in literature of the disease"""
+    It is then submitted back to "diseaseEvidences" in the argument "disease" of the url.
+    Now it returns a webpage which lists all the evidences in literature of the disease, divided in pages.
+
+    If the disease is sent with 'POST' method it redirects to the url with the argument "disease", so that the links
+    to the other pages keep the disease"""
+
+    if request.method == "POST":
+        return redirect(url_for('.diseaseEvidences', disease=request.form['disease']))
 
-    if request.method == "GET":
+    disease = request.args.get('disease')
+    if disease is None:
         return render_template('operations/inputDiseaseEvidences.html')
     else:
-        disease = request.form['disease']
         NAME_FILE = disease + '_evidences'
 
-        data = mediator.getDiseaseEvidences(disease)
+        page, start, end = get_page()
+        data = mediator.getDiseaseEvidences(disease, start, end)
 
-        cache.set(NAME_FILE, data)
+        DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getDiseaseEvidences', mediator.getCanonicalDisease(disease))
 
-        return render_template('operations/diseaseEvidences.html', disease=disease, data=data,
-                               base_pmid_url=BASE_PMID_URL, NAME_FILE=NAME_FILE)
+        pagination = Pagination(page=page, total=data['length'], record_name="evidences",
+                                css_framework='bulma', per_page=ROWS_PER_PAGE)
+
+        return stream_page('operations/diseaseEvidences.html', disease=disease, data=data,
+                           base_pmid_url=BASE_PMID_URL, DOWNLOAD_TOKEN=DOWNLOAD_TOKEN, pagination=pagination)
 
 
 # for g objective
-@app.route('/correlation', methods=["POST", "GET"])
+@pages.route('/correlation', methods=["POST", "GET"])
 def correlation():
     """The webpage lists the correlations between genes and diseases.
 
@@ -308,17 +700,24 @@ def correlation():
     anything in "rows" then it sets "rows" to 0 which means that all rows will be returned.
     Also, if the user wants 50 rows, but the rows which meet the occurrence requirement are 30,
     only 30 rows will be returned.
+
+    The values are sent in the arguments of the url, and the correlations are divided in pages. If they are sent
+    with 'POST' method it redirects to the url with the arguments, so that the links to the other pages keep them.
     """
 
+    if request.method == "POST":
+        return redirect(url_for('.correlation', rows=request.form.get('rows', ''),
+                                min_occurrences=request.form.get('min_occurrences', '')))
+
     # This is for the first time the user visits the page
-    if request.method == "GET":
+    if 'rows' not in request.args and 'min_occurrences' not in request.args:
         nrows = 10
         min_occurrences = 0
 
     # if it's not the first time the user visit the page, it tries to get any eventual value inserted in the form
     else:
         try:
-            min_occurrences = request.form['min_occurrences']
+            min_occurrences = request.args.get('min_occurrences', '')
             min_occurrences = int(min_occurrences)
 
             # The minimum occurrences is 1, so if the user has selected a negative number occurrences will be changed
@@ -344,7 +743,7 @@ def correlation():
                 min_occurrences = 0
 
         try:
-            nrows = request.form['rows']
+            nrows = request.args.get('rows', '')
             nrows = int(nrows)
 
             # if the user has inserted a negative number it converts it to 0 (show all correlation) if the user
@@ -378,59 +777,195 @@ def correlation():
             else:
                 nrows = 0
 
-    data = mediator.getCorrelation(nrows, min_occurrences)
+    page, start, end = get_page()
+    data = mediator.getCorrelation(nrows, min_occurrences, start, end)
 
     NAME_FILE = 'correlation_top' + str(data['length'])
 
-    cache.set(NAME_FILE, data)
+    DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getCorrelation', nrows, min_occurrences)
+
+    pagination = Pagination(page=page, total=data['length'], record_name="correlations",
+                            css_framework='bulma', per_page=ROWS_PER_PAGE)
 
-    return render_template('operations/correlation.html', data=data, NAME_FILE=NAME_FILE)
+    return stream_page('operations/correlation.html', data=data, DOWNLOAD_TOKEN=DOWNLOAD_TOKEN,
+                       pagination=pagination)
 
 
 # for h objective
-@app.route('/diseasesRelatedToGene', methods=["POST", "GET"])
+@pages.route('/diseasesRelatedToGene', methods=["POST", "GET"])
 def diseasesRelatedToGene():
     """The first time the user access "diseasesRelatedToGene" it is requested with 'GET' method.
     Then it returns a webpage which lets the user input a geneSymbol or a geneID.
-    It is then submitted back to "diseasesRelatedToGene" but with 'POST' method.
-    Now it returns a webpage which lists all the diseases related to the gene found in literature"""
+    It is then submitted back to "diseasesRelatedToGene" in the argument "gene" of the url.
+    Now it returns a webpage which lists all the diseases related to the gene found in literature, divided in pages.
+
+    If the gene is sent with 'POST' method it redirects to the url with the argument "gene", so that the links
+    to the other pages keep the gene"""
 
-    if request.method == "GET":
+    if request.method == "POST":
+        return redirect(url_for('.diseasesRelatedToGene', gene=request.form['gene']))
+
+    gene = request.args.get('gene')
+    if gene is None:
         return render_template('operations/inputDiseasesRelatedToGene.html')
     else:
-        gene = request.form['gene']
         NAME_FILE = 'diseases_rel_to_' + gene
 
-        data = mediator.getDiseasesRelatedToGene(gene)
+        page, start, end = get_page()
+        data = mediator.getDiseasesRelatedToGene(gene, start, end)
+
+        DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getDiseasesRelatedToGene', mediator.getCanonicalGene(gene))
 
-        cache.set(NAME_FILE, data)
+        pagination = Pagination(page=page, total=data['length'], record_name="diseases",
+                                css_framework='bulma', per_page=ROWS_PER_PAGE)
 
-        return render_template("operations/diseasesRelatedToGene.html", gene=gene, data=data,
-                               NAME_FILE=NAME_FILE)
+        return stream_page("operations/diseasesRelatedToGene.html", gene=gene, data=data,
+                           DOWNLOAD_TOKEN=DOWNLOAD_TOKEN, pagination=pagination)
 
 
 # for i objective
-@app.route('/genesRelatedToDisease', methods=["POST", "GET"])
+@pages.route('/genesRelatedToDisease', methods=["POST", "GET"])
 def genesRelatedToDisease():
     """The first time the user access "genesRelatedToDisease" it is requested with 'GET' method.
     Then it returns a webpage which lets the user input a diseaseName or a diseaseID.
-    It is then submitted back to "genesRelatedToDisease" but with 'POST' method.
-    Now it returns a webpage which lists all the genes related to the disease found in literature"""
+    It is then submitted back to "genesRelatedToDisease" in the argument "disease" of the url.
+    Now it returns a webpage which lists all the genes related to the disease found in literature, divided in pages.
+
+    If the disease is sent with 'POST' method it redirects to the url with the argument "disease", so that the links
+    to the other pages keep the disease"""
 
-    if request.method == "GET":
+    if request.method == "POST":
+        return redirect(url_for('.genesRelatedToDisease', disease=request.form['disease']))
+
+    disease = request.args.get('disease')
+    if disease is None:
         return render_template('operations/inputGenesRelatedToDisease.html')
     else:
-        disease = request.form['disease']
         NAME_FILE = 'genes_rel_to_' + disease
 
-        data = mediator.getGenesRelatedToDisease(disease)
+        page, start, end = get_page()
+        data = mediator.getGenesRelatedToDisease(disease, start, end)
 
-        cache.set(NAME_FILE, data)
-        return render_template("operations/genesRelatedToDisease.html", data=data, disease=disease,
-                               NAME_FILE=NAME_FILE)
+        DOWNLOAD_TOKEN = download_token(NAME_FILE, 'getGenesRelatedToDisease', mediator.getCanonicalDisease(disease))
 
+        pagination = Pagination(page=page, total=data['length'], record_name="genes",
+                                css_framework='bulma', per_page=ROWS_PER_PAGE)
 
-if __name__ == '__main__':
-    import mediator
+        return stream_page("operations/genesRelatedToDisease.html", data=data, disease=disease,
+                           DOWNLOAD_TOKEN=DOWNLOAD_TOKEN, pagination=pagination)
+
+
+# The operations which can be done on many genes or diseases at once by "/batch", with the function of mediator.py
+# which computes them
+BATCH_OPERATIONS = {
+    'geneEvidences': 'getBatchGeneEvidences',
+    'diseaseEvidences': 'getBatchDiseaseEvidences',
+    'diseasesRelatedToGenes': 'getBatchDiseasesRelatedToGenes',
+    'genesRelatedToDiseases': 'getBatchGenesRelatedToDiseases',
+}
+
+
+def batch_items():
+    """
+    Returns the genes or the diseases sent to "/batch". They can be sent as:
+        json: a list, or a dictionary with the list under the key "items" (and the operation and the format under
+            "operation" and "format", see "batch()")
+        an uploaded file "file": one per line, only the first column if the lines are separated by tabs
+        the field "items" of the form: one per line
+
+    :return: the genes or the diseases, without the empty ones
+    :rtype: list
+    """
+    if request.is_json:
+        body = request.get_json(silent=True)
+        items = body.get('items') if isinstance(body, dict) else body
+        if not isinstance(items, list):
+            items = []
+    else:
+        upload = request.files.get('file')
+        if upload is not None and upload.filename:
+            text = upload.read().decode('utf-8', errors='replace')
+            items = [line.split('\t')[0] for line in text.splitlines()]
+        else:
+            items = request.form.get('items', '').splitlines()
+
+    return [item for item in (str(item).strip() for item in items) if item]
+
+
+def stream_batch_json(data):
+    """
+    Generator which returns the result of a batch operation as json, with the rows grouped by the gene or
+    the disease of the request (the column 'query'), one group at a time.
+
+    :param data: the dictionary returned by the function of mediator.py, with 'labels', 'rows' and 'not_found'
+    :type data: dict
 
-    app.run(debug=True)
+    :return: the chunks of the json
+    :rtype: generator
+    """
+    yield b'{"labels": ' + dumps(data['labels'][1:]) + b', "not_found": ' + dumps(data['not_found']) + \
+        b', "results": ['
+
+    for i, (query, rows) in enumerate(groupby(data['rows'], key=lambda row: row[0])):
+        yield (b', ' if i else b'') + dumps({'query': query, 'rows': [row[1:] for row in rows]})
+
+    yield b']}'
+
+
+@pages.route('/batch', methods=['GET', 'POST'])
+def batch():
+    """The first time the user access "batch" it is requested with 'GET' method and it returns a webpage
+    which lets the user paste or upload a list of genes or diseases and choose the operation.
+
+    With 'POST' the operation ("operation", one of BATCH_OPERATIONS) is done on all the genes or diseases at once,
+    see "batch_items()" for how they're sent, and the result is returned as a single tsv file to download or,
+    if "format" is 'json', as json with the rows grouped by gene or disease. Both are streamed.
+    "operation" and "format" are fields of the form or arguments of the url, or keys of the body if it's a json
+    dictionary.
+    The errors are returned as json if the request is json or asks for json, otherwise they're shown with flash.
+
+    Steps:
+    Step 1) Get the operation and the genes or diseases, and check them
+    Step 2) Compute the result with the function of mediator.py of the operation
+    Step 3) Stream the result as tsv or json
+    """
+
+    if request.method == 'GET':
+        return render_template('operations/batch.html', max_items=BATCH_MAX_ITEMS)
+
+    # Step 1)
+    body = request.get_json(silent=True) if request.is_json else None
+    values = body if isinstance(body, dict) else {}
+    operation = values.get('operation', request.values.get('operation'))
+    output = values.get('format', request.values.get('format', 'tsv'))
+    items = batch_items()
+
+    error = None
+    if not isinstance(operation, str) or operation not in BATCH_OPERATIONS:
+        error = f"'operation' must be one of {', '.join(BATCH_OPERATIONS)}"
+    elif output not in ('tsv', 'json'):
+        error = "'format' must be 'tsv' or 'json'"
+    elif not items:
+        error = 'No gene or disease was given'
+    elif len(items) > BATCH_MAX_ITEMS:
+        error = f"At most {BATCH_MAX_ITEMS} genes or diseases can be given at once, not {len(items)}"
+
+    if error is not None:
+        if request.is_json or output == 'json':
+            return json_response({'error': error}, status=400)
+        flash({'type': 'warning',
+               'header': 'Something went wrong!',
+               'message': error})
+        return redirect(url_for('.batch'))
+
+    # Step 2)
+    data = getattr(mediator, BATCH_OPERATIONS[operation])(items)
+
+    # Step 3)
+    if output == 'json':
+        return Response(stream_batch_json(data), mimetype='application/json')
+    return tsv_response('batch_' + operation, data['labels'], data['rows'])
+
+
+if __name__ == '__main__':
+    run(debug=True)
@@ -0,0 +1,27 @@
+"""
+Entry point of the website for a production WSGI server:
+
+    gunicorn wsgi:app
+
+gunicorn reads its settings from gunicorn.conf.py, which takes the number of workers and threads from settings.py.
+
+The datasets are loaded when this module is imported (see mediator.py). gunicorn imports it once in the main process
+before forking the workers ("preload_app"), thus the workers share the memory of the datasets and of everything
+computed from them (indexes, correlations, co-occurrence matrix, ...) instead of loading their own copy, and a new
+worker is ready as soon as it's forked.
+"""
+
+import os
+import logging
+from pathlib import Path
+
+# The datasets are loaded when "website" is imported, thus logging is configured before it to show the
+# information about the loading of the datasets
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(name)s: %(message)s')
+
+# The paths in settings.py are relative to the folder of the project
+os.chdir(Path(__file__).parent)
+
+from website import create_app
+
+app = create_app()